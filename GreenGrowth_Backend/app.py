@@ -2,6 +2,7 @@
 #
 # Main entry point for the Flask application. Configures extensions, blueprints, and CLI commands.
 
+import click
 from flask import Flask
 from models import db, Tag
 from dotenv import load_dotenv
@@ -11,6 +12,7 @@ from sqlite3 import Connection as SQLite3Connection
 import os
 from flask_cors import CORS
 from routers import message_bp, user_bp, geo_bp
+from utils import ee_metrics, jobs
 
 # Load environment variables from .env file
 load_dotenv()
@@ -30,6 +32,12 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 CORS(app, resources={r"/*": {"origins": "*"}})
 db.init_app(app)
 
+# Earth Engine call metrics: Server-Timing header and Prometheus /metrics endpoint
+ee_metrics.init_app(app)
+
+# Asynchronous jobs (e.g. POST /geo/simulate-polygons with "async": true), polled at /geo/jobs/<id>
+jobs.job_runner.init_app(app)
+
 # Register API blueprints
 app.register_blueprint(message_bp)
 app.register_blueprint(user_bp)
@@ -55,3 +63,136 @@ def init_db():
 
     print(Tag.get_tags())
     print("Base de datos inicializada")
+
+
+# CLI command to pre-fit the calibration coefficients of a list of locations
+# Usage: flask prefit-calibration 19.4326,-99.1332 25.6866,-100.3161 --buffer 50000
+@app.cli.command("prefit-calibration")
+@click.argument("locations", nargs=-1)
+@click.option("--file", "locations_file", type=click.Path(exists=True), help="File with one '[name,]lat,lon' per line.")
+@click.option("--buffer", default=50000, show_default=True, type=int, help="Region buffer in meters.")
+@click.option("--force", is_flag=True, help="Refit even if the store already has coefficients.")
+def prefit_calibration(locations, locations_file, buffer, force):
+    from utils import GeoAnalytics
+
+    points = list(locations)
+    if locations_file:
+        with open(locations_file) as fh:
+            points += [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+
+    if not points:
+        raise click.UsageError("Provide at least one 'lat,lon' location or --file")
+
+    for point in points:
+        try:
+            lat_str, lon_str = point.split(",")[-2:]
+            analyzer = GeoAnalytics(latitude=float(lat_str), longitude=float(lon_str), buffer=buffer)
+            round_trips = analyzer.calibrate_precision(refresh=force)
+            print(f"{point}: calibrated ({'fitted' if round_trips else 'already stored'})")
+        except Exception as e:
+            print(f"{point}: calibration failed: {e}")
+
+
+# CLI command to export the offline wind climatology used by the industry model
+# Usage: flask export-wind-grid --bounds=-118.5,14.5,-86.5,32.8 --resolution 0.1
+@app.cli.command("export-wind-grid")
+@click.option("--bounds", default=None, help="'west,south,east,north' in degrees (default: global land).")
+@click.option("--resolution", default=0.1, show_default=True, type=float, help="Cell size in degrees.")
+@click.option("--years", default="2015-2024", show_default=True, help="Climatology years 'start-end'.")
+@click.option("--chunk", default=256, show_default=True, type=int, help="Cells per side of each computePixels window.")
+@click.option("--output", default=None, help="Grid path (default: WIND_GRID_PATH or data/wind_grid.npz).")
+def export_wind_grid(bounds, resolution, years, chunk, output):
+    from utils.wind_grid import DEFAULT_PATH, GLOBAL_BOUNDS, export_wind_grid as export
+
+    try:
+        grid_bounds = tuple(float(v) for v in bounds.split(",")) if bounds else GLOBAL_BOUNDS
+        start_year, end_year = (int(v) for v in years.split("-"))
+    except ValueError:
+        raise click.UsageError("--bounds must be 'west,south,east,north' and --years 'start-end'")
+    if len(grid_bounds) != 4:
+        raise click.UsageError("--bounds must be 'west,south,east,north'")
+
+    path = output or os.getenv("WIND_GRID_PATH", DEFAULT_PATH)
+    meta = export(path, grid_bounds, resolution, (start_year, end_year), chunk)
+    print(f"Wind grid {meta['shape']} written to {path}")
+
+
+# CLI command to convert the facility data sources (GHGRP workbook, LST and wind exports) to columns
+# Usage: flask cache-facility-data (only changed sources are converted again; --force converts all)
+@app.cli.command("cache-facility-data")
+@click.option("--source", "names", multiple=True, help="Source to convert (repeatable; default: all).")
+@click.option("--force", is_flag=True, help="Convert even if the cached columns are current.")
+def cache_facility_data(names, force):
+    from utils.facility_data import facility_data
+
+    try:
+        tables = facility_data.refresh(list(names) or None, force=force)
+    except KeyError as e:
+        raise click.ClickException(e.args[0])
+    for name, table in tables.items():
+        print(f"{name}: {table.rows} rows x {len(table.columns)} columns in {table.directory}")
+
+
+# CLI command to export the pickled industry model to the pickle-free tree-ensemble format
+# Usage: flask export-industry-model (reads ML_Models/industry_model.pkl, writes industry_model.npz)
+@app.cli.command("export-industry-model")
+@click.option("--source", default=None, help="Pickled model (default: ML_MODEL_DIR/industry_model.pkl).")
+@click.option("--output", default=None, help="Exported ensemble (default: next to the source, .npz).")
+@click.option("--check-rows", default=2000, show_default=True, type=int, help="Probe rows compared against sklearn.")
+def export_industry_model(source, output, check_rows):
+    import pickle
+
+    from utils.model_registry import INDUSTRY_MODEL, MODEL_DIR
+    from utils.tree_ensemble import export_tree_ensemble
+
+    source = source or os.path.join(MODEL_DIR, f"{INDUSTRY_MODEL}.pkl")
+    output = output or os.path.splitext(source)[0] + ".npz"
+    with open(source, "rb") as fh:
+        model = pickle.load(fh)
+
+    try:
+        meta = export_tree_ensemble(model, output, check_rows=check_rows)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print(
+        f"{meta['n_estimators']} trees ({meta['n_nodes']} nodes, {meta['bytes'] / 1e6:.2f} MB) written to {output}; "
+        f"max |sklearn - exported| = {meta['max_abs_diff']:.3g} over {meta['checked_rows']} rows"
+    )
+    if meta["max_abs_diff"] > 1e-9:
+        # The registry prefers the .npz: never leave a mismatching one behind
+        os.remove(output)
+        raise click.ClickException("Exported ensemble does not match the source model")
+
+
+# CLI command to train the industry model and publish it to the model registry
+# Usage: flask train-industry-model --budget 600 (writes ML_Models/industry_model.{pkl,npz,report.json})
+@app.cli.command("train-industry-model")
+@click.option("--n-iter", default=50, show_default=True, type=int, help="Hyperparameter candidates sampled.")
+@click.option("--cv", default=5, show_default=True, type=int, help="Cross-validation folds.")
+@click.option("--budget", default=None, type=float, help="Search time budget in seconds (default: no limit).")
+@click.option("--n-jobs", default=-1, show_default=True, type=int, help="Parallel fits (-1: every core).")
+@click.option("--output", default=None, help="Model directory (default: ML_MODEL_DIR).")
+@click.option("--rebuild-features", is_flag=True, help="Ignore the cached feature matrix.")
+def train_industry_model(n_iter, cv, budget, n_jobs, output, rebuild_features):
+    from utils.industry import train_industry_model as train
+    from utils.model_registry import MODEL_DIR
+
+    try:
+        report = train(
+            output_dir=output or MODEL_DIR,
+            n_iter=n_iter,
+            cv=cv,
+            budget_s=budget,
+            n_jobs=n_jobs,
+            rebuild_features=rebuild_features,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    timings = ", ".join(f"{k} {v:.1f}s" for k, v in report["timings_s"].items())
+    print(
+        f"Best CV R² {report['search']['best_cv_r2']:.4f} ({report['search']['evaluated']}/"
+        f"{report['search']['candidates']} candidates), test R² {report['test_r2']:.4f}"
+    )
+    print(f"Best parameters: {report['search']['best_params']}")
+    print(f"Timings: {timings}")
@@ -0,0 +1,170 @@
+# benchmarks/bench_facilities.py
+#
+# Benchmark of the facility spatial index (utils/facility_index.py) on synthetic facilities:
+# clustered around random "cities" over the contiguous US like the GHGRP ones, with random
+# subparts and emissions. Measures the index build and, per query type, p50/p95/p99 latency of
+# the index lookup alone and of lookup + records (what /geo/facilities* returns), against a
+# brute-force NumPy haversine scan over every facility. Results are written as JSON.
+#
+# Usage (from GreenGrowth_Backend/):
+#   python benchmarks/bench_facilities.py --facilities 100000 --queries 2000 --output bench_facilities.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Contiguous US: west, south, east, north
+BOUNDS = (-124.0, 25.0, -67.0, 49.0)
+SUBPARTS = ["C", "C,D", "C,W-PROC", "C,HH", "C,Y,MM", "C,AA", "C,H", "C,RR (RPT),W-PROC", "TT", "W-NGTC"]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(int(math.ceil(p / 100.0 * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+def synthetic_columns(n: int, seed: int = 0):
+    """Columns and categories of `n` facilities clustered around 300 random centers."""
+    rng = np.random.default_rng(seed)
+    west, south, east, north = BOUNDS
+    centers = np.column_stack([rng.uniform(south, north, 300), rng.uniform(west, east, 300)])
+    cluster = rng.integers(0, 300, n)
+    lat = np.clip(centers[cluster, 0] + rng.normal(0, 0.4, n), south, north)
+    lon = np.clip(centers[cluster, 1] + rng.normal(0, 0.5, n), west, east)
+    co2, ch4, n2o = rng.lognormal(10, 1.5, n), rng.lognormal(2, 1, n), rng.lognormal(0, 1, n)
+    columns = {
+        "id": np.arange(n, dtype=np.int64),
+        "latitude": lat,
+        "longitude": lon,
+        "subparts": rng.integers(-1, len(SUBPARTS), n).astype(np.int32),
+        "total_reported_direct": co2 + ch4 * 25 + n2o * 298,
+        "co2": co2,
+        "ch4": ch4,
+        "n2o": n2o,
+        "co2e": co2 + ch4 * 25 + n2o * 298,
+        "lst": rng.normal(32, 4, (n, 3)),
+        "wind_speeds": rng.gamma(2, 1.5, (n, 3)),
+    }
+    return columns, {"subparts": SUBPARTS}
+
+
+def square(lat: float, lon: float, size_m: float) -> Dict[str, Any]:
+    half_lat = size_m / 2 / 111320.0
+    half_lon = half_lat / max(math.cos(math.radians(lat)), 1e-6)
+    ring = [
+        [lon - half_lon, lat - half_lat],
+        [lon + half_lon, lat - half_lat],
+        [lon + half_lon, lat + half_lat],
+        [lon - half_lon, lat + half_lat],
+        [lon - half_lon, lat - half_lat],
+    ]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def haversine_m(lat: np.ndarray, lon: np.ndarray, point_lat: float, point_lon: float) -> np.ndarray:
+    from utils.facility_index import EARTH_RADIUS_M
+
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = math.radians(point_lat), math.radians(point_lon)
+    h = np.sin((lat1 - lat2) / 2) ** 2 + np.cos(lat1) * math.cos(lat2) * np.sin((lon1 - lon2) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(h))
+
+
+def timed(fn: Callable[[Any], Any], args: List[Any]) -> Dict[str, Any]:
+    """Latency percentiles (ms) of fn over every argument, plus the mean result size."""
+    latencies, sizes = [], []
+    for arg in args:
+        start = time.perf_counter()
+        result = fn(arg)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(result))
+    return {
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_results": round(float(np.mean(sizes)), 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark the facility spatial index.")
+    parser.add_argument("--facilities", type=int, default=100000, help="Synthetic facilities.")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries per scenario.")
+    parser.add_argument("--brute-queries", type=int, default=100, help="Queries of the brute-force baseline.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_facilities.json")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BASE_DIR)
+    from utils.facility_index import FacilityIndex
+
+    columns, categories = synthetic_columns(args.facilities, args.seed)
+    start = time.perf_counter()
+    index = FacilityIndex(columns, categories)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Queries near facilities (where the results are), like the map's requests
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, len(index), args.queries)
+    points = list(zip(index.lat[picks] + rng.normal(0, 0.05, args.queries), index.lon[picks] + rng.normal(0, 0.05, args.queries)))
+    squares = [square(lat, lon, 10000) for lat, lon in points]
+
+    # One warm-up of each query type
+    index.within_radius(*points[0], 5000)
+    index.nearest(*points[0], 10)
+    index.in_polygon(squares[0])
+
+    def with_records(indices_and_distances):
+        indices, distances = indices_and_distances
+        return index.records(indices[:100], distances[:100])
+
+    scenarios = {
+        "radius_5km": timed(lambda p: index.within_radius(p[0], p[1], 5000)[0], points),
+        "radius_25km": timed(lambda p: index.within_radius(p[0], p[1], 25000)[0], points),
+        "nearest_k10": timed(lambda p: index.nearest(p[0], p[1], 10)[0], points),
+        "in_polygon_10km": timed(index.in_polygon, squares),
+        "radius_5km_records": timed(lambda p: with_records(index.within_radius(p[0], p[1], 5000)), points),
+        "nearest_k10_records": timed(lambda p: with_records(index.nearest(p[0], p[1], 10)), points),
+        "brute_force_radius_5km": timed(
+            lambda p: np.flatnonzero(haversine_m(index.lat, index.lon, p[0], p[1]) <= 5000),
+            points[: args.brute_queries],
+        ),
+    }
+
+    results = {
+        "meta": {
+            "facilities": len(index),
+            "queries": args.queries,
+            "seed": args.seed,
+            "build_ms": round(build_ms, 2),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "scenarios": scenarios,
+    }
+    print(f"{len(index)} facilities indexed in {build_ms:.1f} ms")
+    for name, result in scenarios.items():
+        print(
+            f"{name}: p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+            f"results={result['mean_results']:g}"
+        )
+
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# benchmarks/bench_geo.py
+#
+# Benchmark of the /geo endpoints (get_simulation_report, simulate_polygons, get_initial_data,
+# getKpis) through the Flask test client. Runs against the offline fake backend by default and
+# reports, per scenario, p50/p95/p99 latency, getInfo/getMapId/computePixels calls per request,
+# the serialized graph size and the number of graph nodes built. Results are written as JSON
+# that can be diffed between commits.
+#
+# Usage (from GreenGrowth_Backend/):
+#   python benchmarks/bench_geo.py --latency-ms 100 --repeat 5 --output bench_geo.json
+#   python benchmarks/bench_geo.py --quick --compare bench_geo.json
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CENTER = (19.4326, -99.1332)
+BUFFERS = [1000, 5000, 20000, 50000]
+POLYGON_COUNTS = [1, 10, 50, 200]
+PRESETS = ["industrial", "residential_real", "green_real"]
+LAYERS = ["temp", "ndvi", "aq"]
+KPI_LAYERS = ["heat", "NDVI", "AQ"]
+
+PRESET_FIELDS = {
+    "industrial": {"co2": 12000, "ch4": 40, "n2o": 3, "industries_used": ["Cement Production"]},
+    "residential_real": {"densidad": 1500, "trafico": 20000, "albedo": 0.2},
+    "green_real": {"arboles": 120, "pasto": 40, "agua": False, "copa": 35},
+}
+
+
+def _setup_environment(backend: str, latency_ms: float, workdir: str) -> None:
+    """Points every store at a scratch directory before the app is imported."""
+    os.environ["GEO_BACKEND"] = backend
+    os.environ["GEO_FAKE_LATENCY_MS"] = str(latency_ms)
+    os.environ.setdefault("DB_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ["CALIBRATION_STORE_PATH"] = os.path.join(workdir, "calibration.sqlite")
+    os.environ["RASTER_STORE_DIR"] = os.path.join(workdir, "raster_store")
+    sys.path.insert(0, BASE_DIR)
+
+
+def square(lat: float, lon: float, size_m: float = 200.0) -> Dict[str, Any]:
+    half_lat = size_m / 2 / 111320.0
+    half_lon = half_lat / max(math.cos(math.radians(lat)), 1e-6)
+    ring = [
+        [lon - half_lon, lat - half_lat],
+        [lon + half_lon, lat - half_lat],
+        [lon + half_lon, lat + half_lat],
+        [lon - half_lon, lat + half_lat],
+        [lon - half_lon, lat - half_lat],
+    ]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def polygons(count: int, buffer: int) -> List[Dict[str, Any]]:
+    """`count` deterministic 200 m squares spread on a spiral inside the buffer."""
+    lat0, lon0 = CENTER
+    radius_deg = min(buffer, 5000) / 111320.0 * 0.8
+    out = []
+    for i in range(count):
+        angle = i * 2.399963  # golden angle
+        r = radius_deg * math.sqrt((i + 0.5) / count)
+        out.append(square(lat0 + r * math.sin(angle), lon0 + r * math.cos(angle)))
+    return out
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(int(math.ceil(p / 100.0 * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+def build_scenarios(quick: bool) -> List[Dict[str, Any]]:
+    buffers = [1000, 50000] if quick else BUFFERS
+    counts = [1, 10] if quick else POLYGON_COUNTS
+    lat, lon = CENTER
+    scenarios = []
+
+    for layer in LAYERS:
+        for buffer in buffers:
+            scenarios.append({
+                "name": f"get_initial_data/{layer}/buffer={buffer}",
+                "method": "GET",
+                "url": f"/geo/get-initial-data/{layer}?latitude={lat}&longitude={lon}&buffer={buffer}",
+            })
+
+    for layer in KPI_LAYERS + ["all"]:
+        for buffer in buffers:
+            path = "/geo/get-kpis?layers=heat,NDVI,AQ&" if layer == "all" else f"/geo/get-kpis/{layer}?"
+            scenarios.append({
+                "name": f"getKpis/{layer}/buffer={buffer}",
+                "method": "GET",
+                "url": f"{path}latitude={lat}&longitude={lon}&buffer={buffer}",
+            })
+
+    for preset in PRESETS:
+        for buffer in buffers:
+            scenarios.append({
+                "name": f"get_simulation_report/{preset}/buffer={buffer}",
+                "method": "POST",
+                "url": "/geo/simulate",
+                "json": {
+                    "latitude": lat,
+                    "longitude": lon,
+                    "buffer": buffer,
+                    "preset": preset,
+                    "geometry": square(lat, lon),
+                    **PRESET_FIELDS[preset],
+                },
+            })
+
+    for preset in PRESETS:
+        for count in counts:
+            for buffer in buffers:
+                scenarios.append({
+                    "name": f"simulate_polygons/{preset}/polygons={count}/buffer={buffer}",
+                    "method": "POST",
+                    "url": "/geo/simulate-polygons",
+                    "json": {
+                        "latitude": lat,
+                        "longitude": lon,
+                        "buffer": buffer,
+                        "preset": preset,
+                        "geometries": polygons(count, buffer),
+                        **PRESET_FIELDS[preset],
+                    },
+                })
+
+    # Same requests through the shared-baseline batch engine
+    for preset in PRESETS:
+        for count in counts:
+            if count == 1:
+                continue
+            for buffer in buffers:
+                scenarios.append({
+                    "name": f"simulate_polygons_batch/{preset}/polygons={count}/buffer={buffer}",
+                    "method": "POST",
+                    "url": "/geo/simulate-polygons",
+                    "json": {
+                        "latitude": lat,
+                        "longitude": lon,
+                        "buffer": buffer,
+                        "preset": preset,
+                        "geometries": polygons(count, buffer),
+                        "batch": True,
+                        **PRESET_FIELDS[preset],
+                    },
+                })
+    return scenarios
+
+
+def reset_caches() -> None:
+    """Drops every process and on-disk cache so each repetition starts cold."""
+    from utils.calibration_store import calibration_store
+    from utils.geo_cache import baseline_cache, ndvi_percentile_cache
+    from utils.tile_renderer import tile_cache
+
+    baseline_cache.clear()
+    ndvi_percentile_cache.clear()
+    tile_cache.clear()
+    calibration_store.clear()
+
+
+def nodes_built(backend) -> int:
+    """Graph nodes constructed so far (only the fake backend can count them)."""
+    return backend.module.nodes_built() if backend.name == "fake" else 0
+
+
+def run_scenario(client, backend, scenario: Dict[str, Any], repeat: int, warm: bool) -> Dict[str, Any]:
+    latencies: List[float] = []
+    calls: List[Dict[str, int]] = []
+    nodes: List[int] = []
+    statuses: Dict[str, int] = {}
+
+    for _ in range(repeat):
+        if not warm:
+            reset_caches()
+        backend.reset_stats()
+        nodes_before = nodes_built(backend)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            if scenario["method"] == "GET":
+                response = client.get(scenario["url"])
+            else:
+                response = client.post(scenario["url"], json=scenario["json"])
+            latencies.append(time.perf_counter() - start)
+        calls.append(backend.stats())
+        nodes.append(nodes_built(backend) - nodes_before)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    def per_request(kind: str) -> float:
+        return sum(c.get(kind, 0) for c in calls) / len(calls)
+
+    return {
+        "requests": repeat,
+        "status_codes": statuses,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+        },
+        "calls_per_request": {
+            "getInfo": per_request("getInfo"),
+            "getMapId": per_request("getMapId"),
+            "computePixels": per_request("computePixels"),
+        },
+        "graph_bytes_per_request": per_request("graph_bytes"),
+        "graph_nodes_built_per_request": sum(nodes) / len(nodes),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(previous_path: str, current: Dict[str, Any]) -> None:
+    """Prints the round-trip, graph and latency change of every scenario present in both runs."""
+    with open(previous_path) as fh:
+        previous = json.load(fh)["scenarios"]
+
+    print(f"\n{'scenario':<68} {'getInfo':>15} {'getMapId':>15} {'graph KB':>17} {'nodes':>15} {'p50 ms':>19}")
+    for name, result in current["scenarios"].items():
+        old = previous.get(name)
+        if old is None:
+            continue
+        row = []
+        for kind in ("getInfo", "getMapId"):
+            row.append(f"{old['calls_per_request'][kind]:g} -> {result['calls_per_request'][kind]:g}")
+        row.append(f"{old['graph_bytes_per_request'] / 1024:.1f} -> {result['graph_bytes_per_request'] / 1024:.1f}")
+        row.append(
+            f"{old.get('graph_nodes_built_per_request', 0):.0f} -> {result['graph_nodes_built_per_request']:.0f}"
+        )
+        row.append(f"{old['latency_ms']['p50']:g} -> {result['latency_ms']['p50']:g}")
+        print(f"{name:<68} {row[0]:>15} {row[1]:>15} {row[2]:>17} {row[3]:>15} {row[4]:>19}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark the /geo endpoints.")
+    parser.add_argument("--backend", default="fake", choices=["fake", "earthengine"])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated round-trip latency (fake backend).")
+    parser.add_argument("--repeat", type=int, default=3, help="Requests per scenario.")
+    parser.add_argument("--warm", action="store_true", help="Keep caches between repetitions.")
+    parser.add_argument("--quick", action="store_true", help="Reduced scenario grid.")
+    parser.add_argument("--filter", default="", help="Only run scenarios whose name contains this text.")
+    parser.add_argument("--output", default="bench_geo.json")
+    parser.add_argument("--compare", help="Previous results file to compare against.")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_geo_")
+    _setup_environment(args.backend, args.latency_ms, workdir)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from app import app
+        from utils.geo_backend import get_backend
+
+    backend = get_backend()
+    backend.measure_graphs = True
+    client = app.test_client()
+
+    scenarios = [s for s in build_scenarios(args.quick) if args.filter in s["name"]]
+    results: Dict[str, Any] = {
+        "meta": {
+            "revision": git_revision(),
+            "backend": backend.name,
+            "latency_ms": args.latency_ms,
+            "repeat": args.repeat,
+            "warm": args.warm,
+            "python": platform.python_version(),
+        },
+        "scenarios": {},
+    }
+
+    for i, scenario in enumerate(scenarios, 1):
+        result = run_scenario(client, backend, scenario, args.repeat, args.warm)
+        results["scenarios"][scenario["name"]] = result
+        calls = result["calls_per_request"]
+        print(
+            f"[{i}/{len(scenarios)}] {scenario['name']}: p50={result['latency_ms']['p50']}ms "
+            f"getInfo={calls['getInfo']:g} getMapId={calls['getMapId']:g} "
+            f"graph={result['graph_bytes_per_request']:.0f}B nodes={result['graph_nodes_built_per_request']:.0f}"
+        )
+
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
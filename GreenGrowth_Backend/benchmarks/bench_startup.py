@@ -0,0 +1,158 @@
+# benchmarks/bench_startup.py
+#
+# Cold-start benchmark. Every measurement runs in a fresh interpreter with the Earth Engine
+# credentials removed from the environment, so it also checks that importing the app and
+# running `flask init-db` neither need credentials nor pull in ee/NumPy/matplotlib.
+#
+# Measured per run:
+#   import_app        `import app` (what each gunicorn worker pays on boot)
+#   init_db           `flask --app app init-db` on an empty SQLite database
+#   first_request     `GET /` through the test client right after import
+#   first_geo_request first /geo call on the fake backend, which pays the deferred backend init
+#
+# Usage (from GreenGrowth_Backend/):
+#   python benchmarks/bench_startup.py --repeat 5 --output bench_startup.json
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CREDENTIAL_VARS = ("GEE_PROJECT", "GOOGLE_APPLICATION_CREDENTIALS")
+HEAVY_MODULES = ("ee", "numpy", "matplotlib", "pandas", "sklearn", "PIL", "scipy")
+
+# Runs inside the child interpreter; prints one JSON line with its timings
+_CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import app
+import_s = time.perf_counter() - start
+
+from utils import geo_backend
+loaded = [m for m in sys.argv[1].split(",") if m in sys.modules]
+backend_initialized = geo_backend._backend is not None
+
+client = app.app.test_client()
+start = time.perf_counter()
+status = client.get("/").status_code
+first_request_s = time.perf_counter() - start
+
+result = {
+    "import_app": import_s,
+    "first_request": first_request_s,
+    "first_request_status": status,
+    "heavy_modules_after_import": loaded,
+    "backend_initialized_after_import": backend_initialized,
+}
+if sys.argv[2] == "geo":
+    start = time.perf_counter()
+    response = client.get("/geo/get-kpis/heat?latitude=19.4326&longitude=-99.1332&buffer=1000")
+    result["first_geo_request"] = time.perf_counter() - start
+    result["first_geo_request_status"] = response.status_code
+print("BENCH " + json.dumps(result))
+"""
+
+
+def _environment(workdir: str, geo_backend: Optional[str]) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k not in CREDENTIAL_VARS and k != "GEO_BACKEND"}
+    env["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    env["CALIBRATION_STORE_PATH"] = os.path.join(workdir, "calibration.sqlite")
+    env["RASTER_STORE_DIR"] = os.path.join(workdir, "raster_store")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    if geo_backend:
+        env["GEO_BACKEND"] = geo_backend
+    return env
+
+
+def run_import(workdir: str, geo: bool) -> Dict[str, Any]:
+    env = _environment(workdir, "fake" if geo else None)
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, ",".join(HEAVY_MODULES), "geo" if geo else "plain"],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            return json.loads(line[len("BENCH "):])
+    raise RuntimeError(f"Startup child failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def run_init_db(workdir: str) -> Dict[str, Any]:
+    env = _environment(workdir, None)
+    db_path = os.path.join(workdir, "startup.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", "init-db"],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"flask init-db failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    return {"init_db": elapsed}
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "min": round(ordered[0] * 1000, 2),
+        "median": round(ordered[len(ordered) // 2] * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark cold application startup.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement.")
+    parser.add_argument("--output", default="bench_startup.json")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    timings: Dict[str, List[float]] = {}
+    checks: Dict[str, Any] = {}
+    try:
+        for _ in range(args.repeat):
+            plain = run_import(workdir, geo=False)
+            geo = run_import(workdir, geo=True)
+            init_db = run_init_db(workdir)
+            for name, value in (
+                ("import_app", plain["import_app"]),
+                ("first_request", plain["first_request"]),
+                ("first_geo_request", geo["first_geo_request"]),
+                ("init_db", init_db["init_db"]),
+            ):
+                timings.setdefault(name, []).append(value)
+            checks = {
+                "heavy_modules_after_import": plain["heavy_modules_after_import"],
+                "backend_initialized_after_import": plain["backend_initialized_after_import"],
+                "first_geo_request_status": geo["first_geo_request_status"],
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "meta": {"repeat": args.repeat, "python": platform.python_version()},
+        "checks": checks,
+        "timings_ms": {name: summarize(values) for name, values in timings.items()},
+    }
+    for name, summary in results["timings_ms"].items():
+        print(f"{name:<20} median={summary['median']}ms min={summary['min']}ms max={summary['max']}ms")
+    print(f"heavy modules after import: {checks['heavy_modules_after_import'] or 'none'}")
+    print(f"backend initialized at import: {checks['backend_initialized_after_import']}")
+
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
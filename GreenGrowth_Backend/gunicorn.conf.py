@@ -0,0 +1,61 @@
+# gunicorn.conf.py
+#
+# Gunicorn settings used by the Docker image. When PROMETHEUS_MULTIPROC_DIR is set, every worker
+# writes its metrics there and /metrics aggregates them (see utils/ee_metrics.py).
+
+import os
+import shutil
+
+bind = "0.0.0.0:5000"
+workers = 4
+timeout = 120
+# preload_app: the master imports the app, loads the ML models (utils/model_registry.py) and builds
+# the facility index (utils/facility_index.py) once, and the forked workers share those pages.
+# Importing the app opens no Earth Engine session, database connection or thread (all created
+# lazily, after fork), so nothing unsafe crosses fork().
+# GUNICORN_PRELOAD=0 makes every worker import the app and load them itself at boot.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    # Drop the metric files of a previous run so counters start from zero
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def when_ready(server):
+    # Runs in the master before the first fork: with preload_app the models and the facility index
+    # are loaded only once
+    if preload_app:
+        from utils.model_registry import model_registry
+
+        model_registry.preload()
+
+        from utils.facility_index import preload_facility_index
+
+        preload_facility_index()
+
+
+def post_worker_init(worker):
+    # Resume queued or abandoned async jobs as soon as the worker is up, not on its first request
+    from utils.jobs import job_runner
+
+    job_runner.start()
+
+    # Warm load (a no-op when the master already loaded them), so no request pays for it
+    from utils.model_registry import model_registry
+
+    model_registry.preload()
+
+    from utils.facility_index import preload_facility_index
+
+    preload_facility_index()
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,112 @@
+# models/JobModel.py
+#
+# Defines the Job and JobItem models backing the asynchronous job API (utils/jobs.py).
+# A job is one submitted request (e.g. a simulate-polygons scenario); each of its units of
+# work (one polygon) is a JobItem whose status and result are persisted as soon as it finishes,
+# so progress and results survive a worker restart.
+
+import json
+import time
+
+from . import db
+
+
+class Job(db.Model):
+    """
+    Job model representing an asynchronous request and its lease.
+    """
+    __tablename__ = "jobs"
+
+    # Primary key (uuid4 hex, returned to the client)
+    id = db.Column(db.String(32), primary_key=True)
+
+    # Handler name registered in utils/jobs.py (e.g. "simulate_polygons")
+    kind = db.Column(db.String(64), nullable=False)
+
+    # queued | running | succeeded | partial | failed | cancelled
+    status = db.Column(db.String(16), nullable=False, default="queued", index=True)
+
+    # Original request body as JSON
+    payload = db.Column(db.Text, nullable=False)
+
+    # Item counters
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+
+    # Job-level attempts (a failure outside the items, e.g. the backend being unreachable)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    error = db.Column(db.Text, nullable=True)
+
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+
+    # Worker currently running the job; another worker may take it over once the lease expires
+    lease_owner = db.Column(db.String(128), nullable=True)
+    lease_expires_at = db.Column(db.Float, nullable=True)
+
+    # Unix timestamps
+    created_at = db.Column(db.Float, nullable=False, default=time.time)
+    started_at = db.Column(db.Float, nullable=True)
+    finished_at = db.Column(db.Float, nullable=True)
+
+    items = db.relationship(
+        "JobItem",
+        backref="job",
+        lazy=True,
+        order_by="JobItem.index",
+        cascade="all, delete-orphan",
+    )
+
+    def get_payload(self):
+        return json.loads(self.payload)
+
+    def to_dict(self, include_items: bool = True):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "attempts": self.attempts,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_items:
+            data["items"] = [item.to_dict() for item in self.items]
+        return data
+
+
+class JobItem(db.Model):
+    """
+    JobItem model representing one unit of work of a job (one polygon) and its result.
+    """
+    __tablename__ = "job_items"
+
+    # Composite primary key: job and position of the item in the request
+    job_id = db.Column(db.String(32), db.ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    index = db.Column(db.Integer, primary_key=True)
+
+    # pending | running | done | failed | cancelled
+    status = db.Column(db.String(16), nullable=False, default="pending")
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    # Result as JSON (same shape as one entry of the synchronous response) or the last error
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    updated_at = db.Column(db.Float, nullable=False, default=time.time)
+
+    def to_dict(self):
+        return {
+            "index": self.index,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+        }
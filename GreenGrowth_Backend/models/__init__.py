@@ -12,3 +12,4 @@ db = SQLAlchemy()
 from .MessageModel import Message, message_tags
 from .TagModel import Tag
 from .UserModel import User
+from .JobModel import Job, JobItem
@@ -1,21 +1,27 @@
 # routers/geo_router.py
 #
 # This module defines the geospatial API endpoints for simulation and data retrieval.
+# NumPy, the ML models and the tile renderer are imported inside the endpoints that use them, so
+# importing the app (gunicorn boot, `flask init-db`) stays fast and needs no GEE credentials.
 
-import matplotlib
-
-matplotlib.use("Agg")  # Use non-interactive backend for server environments
-
-from flask import Blueprint, jsonify, request
-import ee
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from utils.geo_backend import ee
+from utils import ee_metrics, jobs
 from dotenv import load_dotenv
 import os
-from utils import GeoAnalytics, get_wind_speed
-import numpy as np
+from utils import GeoAnalytics
+from utils.model_registry import (
+    INDUSTRIES,
+    ModelUnavailable,
+    model_registry,
+    predict_industry_temp,
+    reported_emissions,
+)
 import math
-import pickle
 import json
-from functools import lru_cache
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 # Load environment variables from .env file
@@ -24,73 +30,6 @@ load_dotenv()
 # Define the Blueprint for geospatial routes
 geo_bp = Blueprint("geo", __name__, url_prefix="/geo")
 
-GWP_CH4 = 25
-GWP_N2O = 298
-
-industries = {
-    "Stationary Combustion": 0,
-    "Electricity Generation": 1,
-    "Adipic Acid Production": 2,
-    "Aluminum Production": 3,
-    "Ammonia Manufacturing": 4,
-    "Cement Production": 5,
-    "Electronics Manufacture": 6,
-    "Ferroalloy Production": 7,
-    "Fluorinated GHG Production": 8,
-    "Glass Production": 9,
-    "HCFC-22 Production and HFC-23 Destruction": 10,
-    "Hydrogen Production": 11,
-    "Iron and Steel Production": 12,
-    "Lead Production": 13,
-    "Lime Production": 14,
-    "Magnesium Production": 15,
-    "Miscellaneous Use of Carbonates": 16,
-    "Nitric Acid Production": 17,
-    "Petrochemical Production": 18,
-    "Petroleum Refining": 19,
-    "Phosphoric Acid Production": 20,
-    "Pulp and Paper Manufacturing": 21,
-    "Silicon Carbide Production": 22,
-    "Soda Ash Manufacturing": 23,
-    "SF6 from Electrical Equipment": 24,
-    "Titanium Dioxide Production": 25,
-    "Underground Coal Mines": 26,
-    "Zinc Production": 27,
-    "Municipal Landfills": 28,
-    "Industrial Wastewater Treatment": 29,
-    "Industrial Waste Landfills": 30,
-    "Offshore Production": 31,
-    "Natural Gas Processing": 32,
-    "Natural Gas Transmission/Compression": 33,
-    "Underground Natural Gas Storage": 34,
-    "Liquified Natural Gas Storage": 35,
-    "Liquified Natural Gas Import/Export Equipment": 36,
-    "Petroleum Refinery (Producer)": 37,
-    "Petroleum Product Importer": 38,
-    "Petroleum Product Exporter": 39,
-    "Natural Gas Liquids Fractionator": 40,
-    "Natural Gas Local Distribution Company (supply)": 41,
-    "Non-CO2 Industrial Gas Supply": 42,
-    "Carbon Dioxide (CO2) Supply": 43,
-    "Import and Export of Equipment Containing Fluorinated GHGs": 44,
-    "Injection of Carbon Dioxide": 45,
-    "Electric Transmission and Distribution Equipment": 46,
-}
-
-# Model loading: use a cached loader and a safe path
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-MODEL_DIR = os.path.join(BASE_DIR, "ML_Models")
-
-
-@lru_cache(maxsize=4)
-def load_model_cached(filename: str):
-    path = os.path.join(MODEL_DIR, filename)
-    try:
-        with open(path, "rb") as fh:
-            return pickle.load(fh)
-    except Exception:
-        return None
-
 # Endpoint: /geo/simulate
 # Simulates an environmental impact report for a given location and parameters
 @geo_bp.post("/simulate")
@@ -128,40 +67,33 @@ def get_simulation_report():
         report = None
 
         if preset == "industrial":
-            reported_emissions = co2 + (ch4 * GWP_CH4) + (n2o * GWP_N2O)
-            industries_vector = [0] * len(industries)
-            wind_speeds = get_wind_speed(lat=latitude, lon=longitude)
-            if industries_used:
-                for i in industries_used:
-                    if i in industries:
-                        print(industries[i])
-                        industries_vector[industries[i]] = 1
-                    else:
-                        print(f"Warning: Unknown industry '{i}' ignored.")
-            data_to_predict = [
-                latitude,
-                longitude,
-                reported_emissions,
-                *industries_vector,
-                wind_speeds[0],
-                wind_speeds[1],
-                wind_speeds[2],
-            ]
-
-            x = np.array([data_to_predict], dtype=float)
-            
-
-            with open('\ML_Models\industry_model.pkl', 'rb') as file: 
-                model = pickle.load(file)
-            
-            temp = int(model.predict(x))
+            aq_industry = reported_emissions(co2, ch4, n2o)
+            for i in industries_used or []:
+                if i not in INDUSTRIES:
+                    print(f"Warning: Unknown industry '{i}' ignored.")
+            try:
+                temp = predict_industry_temp(
+                    [
+                        {
+                            "latitude": latitude,
+                            "longitude": longitude,
+                            "co2": co2,
+                            "ch4": ch4,
+                            "n2o": n2o,
+                            "industries_used": industries_used,
+                        }
+                    ]
+                )[0]
+            except ModelUnavailable as e:
+                print(f"Warning: {e}; industrial temperature set to 0")
+                temp = 0
 
             geoanalytics = GeoAnalytics(
                 latitude=latitude,
                 longitude=longitude,
                 buffer=buffer,
                 temp_industry=temp,
-                aq_industry=reported_emissions,
+                aq_industry=aq_industry,
             )
             report = geoanalytics.impact_report(
                 geojson_area=geometry,
@@ -240,6 +172,19 @@ def get_simulation_report():
             'sim_aq_url': sim_aq_url,
         }
 
+        # Optionally pull the simulated layers into the raster store and serve them as local tiles
+        if data.get("local_tiles"):
+            try:
+                sim_id = uuid.uuid4().hex
+                geoanalytics.cache_sim_rasters(sim_id)
+                query = f"latitude={latitude}&longitude={longitude}&buffer={buffer}&sim_id={sim_id}"
+                payload['sim_tiles'] = {
+                    layer: f"{request.host_url.rstrip('/')}/geo/tiles/{layer}/{{z}}/{{x}}/{{y}}.png?{query}"
+                    for layer in ("sim_temp", "sim_ndvi", "sim_aq")
+                }
+            except Exception as e:
+                print('Warning: failed to cache simulated rasters:', e)
+
         return (
             jsonify(
                 {
@@ -293,20 +238,10 @@ def get_initial_data(layer_name):
         longitude = float(longitude_str)
         buffer = int(buffer_str)
 
-        # Create a GeoAnalytics instance
-        analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
-
-        # Map layer names to their corresponding images and visualization parameters
-        layer_map = {
-            "temp": (analyzer.base_temp, analyzer.temp_vis_params),
-            "ndvi": (analyzer.base_ndvi, analyzer.ndvi_vis_params),
-            "aq": (analyzer.base_aq, analyzer.aq_vis_params),
-        }
-     
-
-        if layer_name in layer_map:
-            image, params = layer_map[layer_name]
-            url = analyzer.get_tile_url(image, params)
+        if layer_name in ("temp", "ndvi", "aq"):
+            # Baseline layers and their tile URLs come from the shared baseline cache
+            analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
+            url = analyzer.get_base_tile_url(layer_name)
 
             return (
                 jsonify(
@@ -342,10 +277,171 @@ def get_initial_data(layer_name):
         )
 
 
-#Valid layer names are "heat", "NDVI", "AQ" respectively for avg_heat, avg_NVDI and avg_AQ. 
+# Endpoint: /geo/bootstrap
+# Returns the tile URLs of every baseline layer and all initial KPIs in a single request
+@geo_bp.get("/bootstrap")
+def bootstrap():
+    data = request.args
+
+    try:
+        latitude_str = data.get("latitude")
+        longitude_str = data.get("longitude")
+        buffer_str = data.get("buffer")
+
+        if not latitude_str or not longitude_str or not buffer_str:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Missing required parameters: latitude, longitude, and buffer",
+                        "payload": None,
+                    }
+                ),
+                400,
+            )
+
+        latitude = float(latitude_str)
+        longitude = float(longitude_str)
+        buffer = int(buffer_str)
+        # The editor computes KPIs over a smaller area than the map layers
+        kpi_buffer = int(data.get("kpi_buffer") or buffer)
+
+        # Baselines are built once and shared through the baseline cache
+        analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
+        kpi_analyzer = (
+            analyzer
+            if kpi_buffer == buffer
+            else GeoAnalytics(latitude=latitude, longitude=longitude, buffer=kpi_buffer)
+        )
+
+        layer_names = ("temp", "ndvi", "aq")
+        layers, kpis, errors = {}, {}, {}
+
+        # getMapId / getInfo calls are blocking HTTPS requests, so run them concurrently
+        with ThreadPoolExecutor(max_workers=len(layer_names) + 1) as pool:
+            # bind() keeps the pool threads' Earth Engine calls attributed to this request
+            layer_futures = {
+                name: pool.submit(ee_metrics.bind(analyzer.get_base_tile_url), name)
+                for name in layer_names
+            }
+            # All KPIs are resolved with a single multi-band reduction
+            kpi_future = pool.submit(ee_metrics.bind(kpi_analyzer.get_kpis), ["heat", "NDVI", "AQ"])
+
+            for name, future in layer_futures.items():
+                try:
+                    layers[name] = {"url": future.result(), "layer": name}
+                except Exception as e:
+                    layers[name] = None
+                    errors[name] = str(e)
+
+            result = kpi_future.result()
+            if result is None:
+                errors["kpis"] = "Failed to calculate KPIs"
+            else:
+                kpis.update(result)
+
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "message": "Initial data retrieved successfully",
+                    "payload": {"layers": layers, "kpis": kpis, "errors": errors},
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": str(e),
+                    "payload": None,
+                }
+            ),
+            500,
+        )
+
+
+# Endpoint: /geo/tiles/<layer>/<z>/<x>/<y>.png
+# Renders XYZ tiles locally from the cached rasters instead of streaming them from Earth Engine.
+# Base layers: temp, ndvi, aq. Simulated layers (sim_temp, sim_ndvi, sim_aq) also need `sim_id`.
+@geo_bp.get("/tiles/<layer>/<int:z>/<int:x>/<int:y>.png")
+def get_local_tile(layer, z, x, y):
+    from utils.raster_store import get_raster_store
+    from utils.tile_renderer import LAYER_VIS, get_tile as render_cached_tile
+
+    data = request.args
+
+    try:
+        latitude_str = data.get("latitude")
+        longitude_str = data.get("longitude")
+        buffer_str = data.get("buffer")
+
+        if not latitude_str or not longitude_str or not buffer_str:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "message": "Missing required parameters: latitude, longitude, and buffer",
+                        "payload": None,
+                    }
+                ),
+                400,
+            )
+
+        if layer not in LAYER_VIS:
+            return jsonify({"status": "error", "message": "Layer not found", "payload": None}), 404
+
+        latitude, longitude, buffer = float(latitude_str), float(longitude_str), int(buffer_str)
+        # The tile cache is checked first: a cached tile needs neither the raster store nor GeoAnalytics
+        raster_key = GeoAnalytics.raster_key_for(latitude, longitude, buffer)
+
+        if layer.startswith("sim_"):
+            sim_id = data.get("sim_id")
+            if not sim_id:
+                return jsonify({"status": "error", "message": "Missing required parameter: sim_id", "payload": None}), 400
+            raster_key = f"{raster_key}:{sim_id}"
+
+            def load_raster():
+                raster = get_raster_store().get(raster_key, layer)
+                if raster is None:
+                    raise LookupError("Simulation not found")
+                return raster
+
+        else:
+
+            def load_raster():
+                analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
+                return analyzer.cache_base_rasters(layers=[layer])[layer]
+
+        vis = GeoAnalytics._CFG["vis"][LAYER_VIS[layer]]
+        try:
+            png = render_cached_tile(raster_key, layer, load_raster, vis, z, x, y)
+        except LookupError as e:
+            return jsonify({"status": "error", "message": str(e), "payload": None}), 404
+        return Response(png, mimetype="image/png", headers={"Cache-Control": "public, max-age=3600"})
+
+    except Exception as e:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": str(e),
+                    "payload": None,
+                }
+            ),
+            500,
+        )
+
+
+#Valid layer names are "heat", "NDVI", "AQ" respectively for avg_heat, avg_NVDI and avg_AQ.
+# Several layers can be requested at once with `layers=heat,NDVI,AQ`, resolved in a single reduction.
+# Optional `percentiles=10,90` and `stddev=true` add distribution stats under `stats`.
+@geo_bp.get("/get-kpis")
 @geo_bp.get("/get-kpis/<layer_name>")
-def getKpis(layer_name):
-    #Currently gets avg-heat
+def getKpis(layer_name=None):
     data = request.args
     try: 
         latitude = data.get("latitude")
@@ -354,13 +450,24 @@ def getKpis(layer_name):
         if not latitude or not longitude or not buffer: 
             return jsonify({"status": "error", "message": "Missing params"}), 400      
 
+        layers_str = data.get("layers")
+        layer_names = [l.strip() for l in layers_str.split(",") if l.strip()] if layers_str else []
+        if layer_name:
+            layer_names = [layer_name] + [l for l in layer_names if l != layer_name]
+        if not layer_names:
+            return jsonify({"status": "error", "message": "Missing params: layers"}), 400
+
+        percentiles_str = data.get("percentiles")
+        percentiles = [int(p) for p in percentiles_str.split(",") if p.strip()] if percentiles_str else None
+        stddev = data.get("stddev", "false").lower() in ("1", "true", "yes")
+
         analyzer = GeoAnalytics(
             latitude=float(latitude), 
             longitude=float(longitude), 
             buffer=int(buffer)
         )
 
-        kpis = analyzer.get_initial_kpis(layer_name)
+        kpis = analyzer.get_kpis(layer_names, percentiles=percentiles, stddev=stddev)
         if kpis is None:
             return jsonify({"status": "error", "message": "Failed to calculate KPIs"}), 500
         
@@ -370,6 +477,8 @@ def getKpis(layer_name):
             "payload": kpis
         }), 200
 
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500 
 
@@ -460,331 +569,795 @@ def get_simulation_tiles():
         )
     
 
+class PolygonRequestError(ValueError):
+    """Invalid simulate-polygons request (answered with 400)."""
+
+
+def _parse_polygon_request(data):
+    """
+    Validates a simulate-polygons body and returns its normalized parameters: the geometry list,
+    the global preset and the default value of every preset attribute.
+    """
+    if not data:
+        raise PolygonRequestError("The body of the request is empty")
+
+    geometry = data.get("geometry")
+    geometries = data.get("geometries")
+
+    geometries_list = None
+    if geometries is not None:
+        if not isinstance(geometries, list) or len(geometries) == 0:
+            raise PolygonRequestError("`geometries` must be a non-empty list")
+        geometries_list = geometries
+
+    elif geometry is not None:
+        if isinstance(geometry, list):
+            if len(geometry) == 0:
+                raise PolygonRequestError("`geometry` list is empty")
+            geometries_list = geometry
+        else:
+            geometries_list = [geometry]
+    else:
+        raise PolygonRequestError("Missing required parameter: geometry or geometries")
+
+    preset = data.get("preset")
+    if preset is None:
+        def _geom_has_preset(g):
+            if not isinstance(g, dict):
+                return False
+            if g.get("preset"):
+                return True
+            props = g.get("properties")
+            if isinstance(props, dict) and props.get("preset"):
+                return True
+            return False
+
+        missing_global_preset = any(not _geom_has_preset(g) for g in geometries_list)
+        if missing_global_preset:
+            raise PolygonRequestError(
+                "Missing required parameter: a top-level `preset` or per-geometry `preset` must be provided"
+            )
+
+    return {
+        "latitude": data.get("latitude", 0),
+        "longitude": data.get("longitude", 0),
+        "buffer": data.get("buffer", 1000),
+        "preset": preset,
+        "geometries": geometries_list,
+        "has_industrial_params": all(k in data for k in ("co2", "ch4", "n2o", "industries_used")),
+        "co2": data.get("co2") or 0,
+        "ch4": data.get("ch4") or 0,
+        "n2o": data.get("n2o") or 0,
+        "industries_used": data.get("industries_used", []),
+        "densidad": data.get("densidad") or 0,
+        "trafico": data.get("trafico") or 0,
+        "albedo": data.get("albedo") or 0,
+        "arboles": data.get("arboles") or 0,
+        "pasto": data.get("pasto") or 0,
+        "agua": data.get("agua") or 0,
+        "copa": data.get("copa") or 0,
+        "batch": bool(data.get("batch", False)),
+    }
+
+
+def _geometry_area(geom):
+    """
+    GeoJSON area of one `geometries` entry. Feature properties are copied into the entry so
+    per-geometry keys ('preset', 'densidad', 'co2', ...) read the same for every format.
+    Raises ValueError on an invalid entry.
+    """
+    if isinstance(geom, dict) and geom.get("type") == "Feature" and "geometry" in geom:
+        # Support GeoJSON Feature with properties: copy properties into geom so
+        # downstream code can read per-geometry keys like 'preset', 'densidad', etc.
+        geojson_area = geom["geometry"]
+        props = geom.get("properties", {})
+        if isinstance(props, dict):
+            # Only copy keys that don't already exist in the feature dict
+            for k, v in props.items():
+                if k not in geom:
+                    geom[k] = v
+    elif isinstance(geom, dict) and "geometry" in geom and isinstance(geom["geometry"], dict):
+        geojson_area = geom["geometry"]
+    elif isinstance(geom, dict) and "type" in geom and "coordinates" in geom:
+        geojson_area = geom
+    else:
+        raise ValueError("Invalid geometry entry; expected a GeoJSON geometry or Feature with 'geometry'")
+    return geojson_area
+
+
+_INDUSTRY_KEYS = ("co2", "ch4", "n2o", "industries_used")
+
+
+def _prepare_polygon_simulation(req):
+    """
+    Computes what every polygon of the request shares: the reported emissions and the industry
+    model's prediction for the request-level industrial parameters and for every industrial
+    polygon with its own parameters, all in one batched prediction. Stored in `req`.
+    """
+    req["reported_emissions"] = 0
+    req["temp_industry"] = 0
+    # id(geometry entry) -> predicted temperature
+    req["geometry_temps"] = {}
+
+    rows, owners = [], []
+    industrial = False
+    for geom in req["geometries"]:
+        try:
+            _geometry_area(geom)
+        except ValueError:
+            continue
+        if (geom.get("preset") or req["preset"]) != "industrial":
+            continue
+        industrial = True
+        if all(k in geom for k in _INDUSTRY_KEYS):
+            # The model is fed the request's location for every polygon
+            rows.append(
+                {"latitude": req["latitude"], "longitude": req["longitude"], **{k: geom[k] for k in _INDUSTRY_KEYS}}
+            )
+            owners.append(id(geom))
+
+    if industrial and req["has_industrial_params"]:
+        req["reported_emissions"] = reported_emissions(req["co2"], req["ch4"], req["n2o"])
+        rows.append({k: req[k] for k in ("latitude", "longitude", *_INDUSTRY_KEYS)})
+        owners.append(None)
+
+    if rows:
+        for row in rows:
+            for i in row["industries_used"] or []:
+                if i not in INDUSTRIES:
+                    print(f"Warning: Unknown industry '{i}' ignored.")
+        try:
+            temps = predict_industry_temp(rows)
+        except ModelUnavailable as e:
+            print(f"Warning: {e}; industrial predictions disabled")
+        except Exception as e:
+            print('Warning: failed to predict industry temp:', e)
+        else:
+            for owner, temp in zip(owners, temps):
+                if owner is None:
+                    req["temp_industry"] = temp
+                else:
+                    req["geometry_temps"][owner] = temp
+
+    return req
+
+
+def _geometry_spec(req, geom):
+    """
+    Resolves one polygon of a prepared request into the arguments of its simulation: the GeoJSON
+    area, the preset, the analysis buffer, whether to calibrate and the industrial deltas.
+    Raises ValueError on an invalid entry.
+    """
+    buffer = req["buffer"]
+
+    geojson_area = _geometry_area(geom)
+
+    local_preset = None
+    if isinstance(geom, dict) and geom.get("preset"):
+        local_preset = geom.get("preset")
+    else:
+        local_preset = req["preset"]
+
+    if local_preset not in ("industrial", "residential_real", "green_real"):
+        raise ValueError(f"Invalid or missing preset for geometry: {local_preset}")
+
+    if local_preset == "industrial":
+        g_co2 = geom.get("co2", req["co2"])
+        g_ch4 = geom.get("ch4", req["ch4"])
+        g_n2o = geom.get("n2o", req["n2o"])
+
+        if any(k not in geom for k in _INDUSTRY_KEYS) and req["reported_emissions"] is None:
+            raise ValueError("Missing industrial parameters (co2, ch4, n2o, industries_used) for industrial preset")
+
+        local_reported_emissions = reported_emissions(g_co2, g_ch4, g_n2o)
+        # Predicted for the whole request by _prepare_polygon_simulation
+        local_temp = req["geometry_temps"].get(id(geom), req["temp_industry"])
+
+        return {
+            "geojson_area": geojson_area,
+            "preset": "industrial",
+            "buffer_m": buffer,
+            "calibrate": True,
+            "temp_industry": local_temp,
+            "aq_industry": local_reported_emissions,
+        }
+
+    elif local_preset == "residential_real":
+
+        g_densidad = geom.get("densidad") or req["densidad"]
+        g_trafico = geom.get("trafico") or req["trafico"]
+        g_albedo = geom.get("albedo") or req["albedo"]
+
+        attr_real = {
+            "densidad": {"value": g_densidad, "unit": "buildings_per_km2"},
+            "trafico": {"value": g_trafico, "unit": "veh_day"},
+            "albedo": {"value": g_albedo, "unit": "albedo_0_1"},
+        }
+        return {
+            "geojson_area": geojson_area,
+            "preset": ("residential_real", attr_real),
+            "buffer_m": 1000,
+            "calibrate": False,
+            "temp_industry": 0,
+            "aq_industry": 0,
+        }
+
+    else:
+        g_arboles = geom.get("arboles") or req["arboles"]
+        g_pasto = geom.get("pasto") or req["pasto"]
+        g_agua = geom.get("agua") or req["agua"]
+        g_copa = geom.get("copa") or req["copa"]
+
+        attr_green = {
+            "arboles": {"value": g_arboles, "unit": "trees_per_ha"},
+            "pasto": {"value": g_pasto, "unit": "pct"},
+            "agua": g_agua,
+            "copa": {"value": g_copa, "unit": "pct"},
+        }
+        return {
+            "geojson_area": geojson_area,
+            "preset": ("green_real", attr_green),
+            "buffer_m": 1000,
+            "calibrate": False,
+            "temp_industry": 0,
+            "aq_industry": 0,
+        }
+
+
+def _simulate_geometry(req, geom):
+    """Simulates one polygon of a prepared request; raises on failure."""
+    spec = _geometry_spec(req, geom)
+    analyzer = GeoAnalytics(
+        latitude=req["latitude"],
+        longitude=req["longitude"],
+        buffer=req["buffer"],
+        temp_industry=spec["temp_industry"],
+        aq_industry=spec["aq_industry"],
+    )
+    report = analyzer.impact_report(
+        geojson_area=spec["geojson_area"],
+        preset=spec["preset"],
+        buffer_m=spec["buffer_m"],
+        calibrate=spec["calibrate"],
+    )
+
+    sim_temp_url = None
+    sim_ndvi_url = None
+    sim_aq_url = None
+    try:
+        if getattr(analyzer, 'sim_temp', None) is not None:
+            sim_temp_url = analyzer.get_tile_url(analyzer.sim_temp, analyzer.temp_vis_params)
+        if getattr(analyzer, 'sim_ndvi', None) is not None:
+            sim_ndvi_url = analyzer.get_tile_url(analyzer.sim_ndvi, analyzer.ndvi_vis_params)
+        if getattr(analyzer, 'sim_aq', None) is not None:
+            sim_aq_url = analyzer.get_tile_url(analyzer.sim_aq, analyzer.aq_vis_params)
+    except Exception as e:
+        print('Warning: failed to generate sim tile URLs for a polygon:', e)
+
+    return {
+        "report": report,
+        "sim_temp_url": sim_temp_url,
+        "sim_ndvi_url": sim_ndvi_url,
+        "sim_aq_url": sim_aq_url,
+    }
+
+
+def _polygon_result(req, geom):
+    """One entry of the simulate-polygons response; failures become an entry with `error`."""
+    try:
+        return _simulate_geometry(req, geom)
+    except Exception as e:
+        return {
+            "report": None,
+            "sim_temp_url": None,
+            "sim_ndvi_url": None,
+            "sim_aq_url": None,
+            "error": str(e),
+        }
+
+
+# Polygons simulated at once per request. Their Earth Engine calls are further capped per
+# worker by GEO_EE_MAX_CONCURRENT (utils/geo_backend.py).
+POLYGON_CONCURRENCY = int(os.getenv("GEO_POLYGON_CONCURRENCY", "8"))
+
+
+def _batch_polygon_results(req):
+    """
+    Simulates every polygon of a prepared request against one shared baseline (utils/batch_simulation.py)
+    and returns their entries in request order. Every valid entry carries the plan's tile URLs.
+    """
+    from utils.batch_simulation import BatchSimulation
+
+    batch = BatchSimulation(latitude=req["latitude"], longitude=req["longitude"], buffer=req["buffer"])
+    entries = [None] * len(req["geometries"])
+    positions = []
+    for index, geom in enumerate(req["geometries"]):
+        try:
+            batch.add(**_geometry_spec(req, geom))
+            positions.append(index)
+        except Exception as e:
+            entries[index] = {
+                "report": None,
+                "sim_temp_url": None,
+                "sim_ndvi_url": None,
+                "sim_aq_url": None,
+                "error": str(e),
+            }
+
+    if positions:
+        reports = batch.run()
+        urls = batch.tile_urls()
+        for index, report in zip(positions, reports):
+            entries[index] = {"report": report, **urls}
+    return entries
+
+
+def _iter_polygon_results(req):
+    """
+    Yields (index, entry) for every polygon of a prepared request as soon as it finishes,
+    simulating up to GEO_POLYGON_CONCURRENCY polygons concurrently. With `"batch": true` all
+    polygons are evaluated together and fall back to one simulation each if the batch fails.
+    """
+    geometries = req["geometries"]
+    if req.get("batch") and len(geometries) > 1:
+        try:
+            entries = _batch_polygon_results(req)
+        except Exception as e:
+            print(f"Warning: batch simulation failed, simulating polygons one by one: {e}")
+        else:
+            yield from enumerate(entries)
+            return
+
+    workers = max(1, min(POLYGON_CONCURRENCY, len(geometries)))
+    if workers == 1:
+        for index, geom in enumerate(geometries):
+            yield index, _polygon_result(req, geom)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # bind() keeps the pool threads' Earth Engine calls attributed to this request
+        futures = {
+            pool.submit(ee_metrics.bind(_polygon_result), req, geom): index
+            for index, geom in enumerate(geometries)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # A closed stream (client gone) must not keep simulating the remaining polygons
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+STREAM_MIMETYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def _stream_mode(data):
+    """Streaming format requested through `"stream"` in the body or the Accept header, if any."""
+    mode = data.get("stream")
+    if mode is True:
+        return "ndjson"
+    if isinstance(mode, str) and mode.lower() in STREAM_MIMETYPES:
+        return mode.lower()
+    accept = request.headers.get("Accept", "")
+    for name, mimetype in STREAM_MIMETYPES.items():
+        if mimetype in accept:
+            return name
+    return None
+
+
+def _stream_polygon_results(req, mode):
+    """
+    Yields one record per polygon as soon as it is simulated (in completion order), then a
+    summary record. Every result record is the synchronous entry plus its `index` in the request.
+    """
+    def encode(event, record):
+        if mode == "sse":
+            return f"event: {event}\ndata: {json.dumps(record)}\n\n"
+        return json.dumps({"type": event, **record}) + "\n"
+
+    start = time.perf_counter()
+    failed = 0
+    for index, entry in _iter_polygon_results(req):
+        failed += 1 if "error" in entry else 0
+        yield encode("result", {"index": index, **entry})
+
+    total = len(req["geometries"])
+    yield encode(
+        "summary",
+        {
+            "total": total,
+            "succeeded": total - failed,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            "ee_calls": len(ee_metrics.request_calls()),
+        },
+    )
+
+
+@jobs.register("simulate_polygons")
+def _simulate_polygons_job(payload):
+    """Job handler: prepares the request once, then simulates one polygon per item."""
+    req = _prepare_polygon_simulation(_parse_polygon_request(payload))
+    return lambda index: _simulate_geometry(req, req["geometries"][index])
+
+
 # Endpoint: /geo/simulate-polygon
 # Simulates environmental impact for a given polygon area
+# With "async": true the polygons run as a background job: the response (202) carries the job id
+# to poll at /geo/jobs/<job_id>. With "stream": "ndjson" | "sse" (or the matching Accept header)
+# each polygon's entry is streamed as soon as it is simulated, followed by a summary record.
+# With "batch": true all polygons share one baseline and are evaluated in a single round trip.
 @geo_bp.post("/simulate-polygons")
 def simulate_polygons():
     # data request
     data = request.get_json()
     print("Incoming data:", data)
 
-    if not data:
-        return jsonify(
-            {
-                "status": "error",
-                "message": "The body of the request is empty",
-                "payload": None,
-            }
-        ), 400
-
     try:
-        latitude = data.get("latitude", 0)
-        longitude = data.get("longitude", 0)
-        preset = data.get("preset")
-        geometry = data.get("geometry")
-        geometries = data.get("geometries")
-        buffer = data.get("buffer", 1000)
+        req = _parse_polygon_request(data)
+    except PolygonRequestError as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
 
-
-        geometries_list = None
-        if geometries is not None:
-            if not isinstance(geometries, list) or len(geometries) == 0:
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "`geometries` must be a non-empty list",
-                            "payload": None,
-                        }
-                    ),
-                    400,
-                )
-            geometries_list = geometries
-
-
-        elif geometry is not None:
-            if isinstance(geometry, list):
-                if len(geometry) == 0:
-                    return (
-                        jsonify(
-                            {
-                                "status": "error",
-                                "message": "`geometry` list is empty",
-                                "payload": None,
-                            }
-                        ),
-                        400,
-                    )
-                geometries_list = geometry
-            else:
-                geometries_list = [geometry]
-        else:
+    try:
+        if data.get("async"):
+            job = jobs.job_runner.submit("simulate_polygons", data, total=len(req["geometries"]))
             return (
                 jsonify(
                     {
-                        "status": "error",
-                        "message": "Missing required parameter: geometry or geometries",
-                        "payload": None,
+                        "status": "success",
+                        "message": "Simulation job submitted",
+                        "payload": {
+                            "job_id": job.id,
+                            "status": job.status,
+                            "total": job.total,
+                            "status_url": f"{geo_bp.url_prefix}/jobs/{job.id}",
+                        },
                     }
                 ),
-                400,
+                202,
             )
 
-        if preset is None:
-            def _geom_has_preset(g):
-                if not isinstance(g, dict):
-                    return False
-                if g.get("preset"):
-                    return True
-                props = g.get("properties")
-                if isinstance(props, dict) and props.get("preset"):
-                    return True
-                return False
+        _prepare_polygon_simulation(req)
 
-            missing_global_preset = any(not _geom_has_preset(g) for g in geometries_list)
-            if missing_global_preset:
-                return (
-                    jsonify(
-                        {
-                            "status": "error",
-                            "message": "Missing required parameter: a top-level `preset` or per-geometry `preset` must be provided",
-                            "payload": None,
-                        }
-                    ),
-                    400,
-                )
+        mode = _stream_mode(data)
+        if mode:
+            return Response(
+                stream_with_context(ee_metrics.stream(_stream_polygon_results(req, mode))),
+                mimetype=STREAM_MIMETYPES[mode],
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
 
-        co2 = data.get("co2") or 0
-        ch4 = data.get("ch4") or 0
-        n2o = data.get("n2o") or 0
-        industries_used = data.get("industries_used", [])
-        densidad = data.get("densidad") or 0
-        trafico = data.get("trafico") or 0
-        albedo = data.get("albedo") or 0
-        arboles = data.get("arboles") or 0
-        pasto = data.get("pasto") or 0
-        agua = data.get("agua") or 0
-        copa = data.get("copa") or 0
-
-        reported_emissions = 0
-        temp_industry = 0
-        industry_model = None
-
-
-        if preset == "industrial" or any(isinstance(g, dict) and g.get("preset") == "industrial" for g in geometries_list):
-            local_temp = 0
-            local_reported_emissions = 0
-            if all(k in data for k in ("co2", "ch4", "n2o", "industries_used")):
-                reported_emissions = co2 + (ch4 * GWP_CH4) + (n2o * GWP_N2O)
-                industries_vector = [0] * len(industries)
-                wind_speeds = get_wind_speed(lat=latitude, lon=longitude)
-                if industries_used:
-                    for i in industries_used:
-                        if i in industries:
-                            industries_vector[industries[i]] = 1
-                        else:
-                            print(f"Warning: Unknown industry '{i}' ignored.")
-                data_to_predict = [
-                    latitude,
-                    longitude,
-                    reported_emissions,
-                    *industries_vector,
-                    wind_speeds[0],
-                    wind_speeds[1],
-                    wind_speeds[2],
-                ]
-                x = np.array([data_to_predict], dtype=float)
-                industry_model = load_model_cached('industry_model.pkl')
-                if industry_model is None:
-                    print("Warning: Industry model not found; industrial predictions disabled")
-                else:
-                    try:
-                        pred = industry_model.predict(x)
-                        temp_industry = int(pred[0]) if hasattr(pred, '__len__') else int(pred)
-                    except Exception as e:
-                        print('Warning: failed to predict industry temp:', e)
+        # Entries keep the input order whatever order the polygons finish in
+        results = [None] * len(req["geometries"])
+        for index, entry in _iter_polygon_results(req):
+            results[index] = entry
 
-            if temp_industry is None:
-                temp_industry = 0
-            if reported_emissions is None:
-                reported_emissions = 0
+        return (
+            jsonify(
+                {
+                    "status": "success",
+                    "message": "Simulation(s) completed successfully",
+                    "payload": results,
+                }
+            ),
+            201,
+        )
 
+    except jobs.JobQueueFull as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 429
 
-        results = []
-        for geom in geometries_list:
-            try:
-                if isinstance(geom, dict) and geom.get("type") == "Feature" and "geometry" in geom:
-                    # Support GeoJSON Feature with properties: copy properties into geom so
-                    # downstream code can read per-geometry keys like 'preset', 'densidad', etc.
-                    geojson_area = geom["geometry"]
-                    props = geom.get("properties", {})
-                    if isinstance(props, dict):
-                        # Only copy keys that don't already exist in the feature dict
-                        for k, v in props.items():
-                            if k not in geom:
-                                geom[k] = v
-                elif isinstance(geom, dict) and "geometry" in geom and isinstance(geom["geometry"], dict):
-                    geojson_area = geom["geometry"]
-                elif isinstance(geom, dict) and "type" in geom and "coordinates" in geom:
-                    geojson_area = geom
-                else:
-                    raise ValueError("Invalid geometry entry; expected a GeoJSON geometry or Feature with 'geometry'")
+    except Exception as e:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": str(e),
+                    "payload": None,
+                }
+            ),
+            500,
+        )
 
 
-                local_preset = None
-                if isinstance(geom, dict) and geom.get("preset"):
-                    local_preset = geom.get("preset")
-                else:
-                    local_preset = preset
-
-                if local_preset not in ("industrial", "residential_real", "green_real"):
-                    raise ValueError(f"Invalid or missing preset for geometry: {local_preset}")
-
-                if local_preset == "industrial":
-                    g_co2 = geom.get("co2", co2)
-                    g_ch4 = geom.get("ch4", ch4)
-                    g_n2o = geom.get("n2o", n2o)
-                    g_industries_used = geom.get("industries_used", industries_used)
-
-                    if any(k not in geom for k in ("co2", "ch4", "n2o", "industries_used")) and reported_emissions is None:
-                        raise ValueError("Missing industrial parameters (co2, ch4, n2o, industries_used) for industrial preset")
-
-                    local_reported_emissions = g_co2 + (g_ch4 * GWP_CH4) + (g_n2o * GWP_N2O)
-
-                    local_temp = 0
-                    if all(k in geom for k in ("co2", "ch4", "n2o", "industries_used")) and industry_model is not None:
-
-                        local_industries_vector = [0] * len(industries)
-                        for i in g_industries_used:
-                            if i in industries:
-                                local_industries_vector[industries[i]] = 1
-                        wind_speeds = get_wind_speed(lat=latitude, lon=longitude)
-                        data_to_predict = [
-                            latitude,
-                            longitude,
-                            local_reported_emissions,
-                            *local_industries_vector,
-                            wind_speeds[0],
-                            wind_speeds[1],
-                            wind_speeds[2],
-                        ]
-                        x = np.array([data_to_predict], dtype=float)
-                        try:
-                            p = industry_model.predict(x)
-                            local_temp = int(p[0]) if hasattr(p, '__len__') else int(p)
-                        except Exception:
-                            local_temp = temp_industry
-                    else:
-                        local_temp = temp_industry
-
-                    analyzer = GeoAnalytics(
-                        latitude=latitude,
-                        longitude=longitude,
-                        buffer=buffer,
-                        temp_industry=local_temp,
-                        aq_industry=local_reported_emissions,
-                    )
-                  
-                    report = analyzer.impact_report(
-                        geojson_area=geojson_area,
-                        preset="industrial",
-                        buffer_m=buffer,
-                        calibrate=True,
-                    )
-
-                elif local_preset == "residential_real":
-
-                    g_densidad = geom.get("densidad") or densidad
-                    g_trafico = geom.get("trafico") or trafico
-                    g_albedo = geom.get("albedo") or albedo
-
-                    attr_real = {
-                        "densidad": {"value": g_densidad, "unit": "buildings_per_km2"},
-                        "trafico": {"value": g_trafico, "unit": "veh_day"},
-                        "albedo": {"value": g_albedo, "unit": "albedo_0_1"},
-                    }
-                    analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
-                    report = analyzer.impact_report(
-                        geojson_area=geojson_area,
-                        preset=("residential_real", attr_real),
-                        buffer_m=1000,
-                        calibrate=False,
-                    )
-
-                else: 
-                    g_arboles = geom.get("arboles") or arboles
-                    g_pasto = geom.get("pasto") or pasto
-                    g_agua = geom.get("agua") or agua
-                    g_copa = geom.get("copa") or copa
-
-                    attr_green = {
-                        "arboles": {"value": g_arboles, "unit": "trees_per_ha"},
-                        "pasto": {"value": g_pasto, "unit": "pct"},
-                        "agua": g_agua,
-                        "copa": {"value": g_copa, "unit": "pct"},
-                    }
-                    analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
-                    report = analyzer.impact_report(
-                        geojson_area=geojson_area,
-                        preset=("green_real", attr_green),
-                        buffer_m=1000,
-                        calibrate=False,
-                    )
-
-                sim_temp_url = None
-                sim_ndvi_url = None
-                sim_aq_url = None
-                try:
-                    if getattr(analyzer, 'sim_temp', None) is not None:
-                        sim_temp_url = analyzer.get_tile_url(analyzer.sim_temp, analyzer.temp_vis_params)
-                    if getattr(analyzer, 'sim_ndvi', None) is not None:
-                        sim_ndvi_url = analyzer.get_tile_url(analyzer.sim_ndvi, analyzer.ndvi_vis_params)
-                    if getattr(analyzer, 'sim_aq', None) is not None:
-                        sim_aq_url = analyzer.get_tile_url(analyzer.sim_aq, analyzer.aq_vis_params)
-                except Exception as e:
-                    print('Warning: failed to generate sim tile URLs for a polygon:', e)
+# Endpoint: /geo/simulate-scenario
+# Composes every polygon of the body (same format as simulate-polygons) into one scenario and
+# reports their combined effect. Polygons are painted in order: where they overlap, the later wins.
+# "report_buffer" (m, default 1000) extends the report area around the polygons.
+@geo_bp.post("/simulate-scenario")
+def simulate_scenario():
+    data = request.get_json()
 
-                results.append({
-                    "report": report,
-                    "sim_temp_url": sim_temp_url,
-                    "sim_ndvi_url": sim_ndvi_url,
-                    "sim_aq_url": sim_aq_url,
-                })
+    try:
+        req = _parse_polygon_request(data)
+    except PolygonRequestError as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
 
-            except Exception as e:
-                results.append({
-                    "report": None,
-                    "sim_temp_url": None,
-                    "sim_ndvi_url": None,
-                    "sim_aq_url": None,
-                    "error": str(e),
-                })
+    try:
+        from utils.scenario import Scenario
+
+        _prepare_polygon_simulation(req)
+        scenario = Scenario(
+            latitude=req["latitude"],
+            longitude=req["longitude"],
+            buffer=req["buffer"],
+            report_buffer_m=int(data.get("report_buffer", 1000)),
+        )
+        for geom in req["geometries"]:
+            spec = _geometry_spec(req, geom)
+            scenario.add(
+                spec["geojson_area"],
+                spec["preset"],
+                calibrate=spec["calibrate"],
+                temp_industry=spec["temp_industry"],
+                aq_industry=spec["aq_industry"],
+            )
+        result = scenario.run()
 
         return (
             jsonify(
                 {
                     "status": "success",
-                    "message": "Simulation(s) completed successfully",
-                    "payload": results,
+                    "message": "Scenario simulated successfully",
+                    "payload": result,
                 }
             ),
             201,
         )
 
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
+
     except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
+
+
+# Facilities accepted by one /geo/predict-industry call
+PREDICT_MAX_FACILITIES = int(os.getenv("GEO_PREDICT_MAX_FACILITIES", "10000"))
+
+
+def _parse_facilities(data):
+    """Validated facility rows of a predict-industry body (`facilities` list or a bare list)."""
+    facilities = data.get("facilities") if isinstance(data, dict) else data
+    if not isinstance(facilities, list) or not facilities:
+        raise ValueError("`facilities` must be a non-empty list")
+    if len(facilities) > PREDICT_MAX_FACILITIES:
+        raise ValueError(f"At most {PREDICT_MAX_FACILITIES} facilities per request")
+
+    rows = []
+    for index, facility in enumerate(facilities):
+        if not isinstance(facility, dict) or facility.get("latitude") is None or facility.get("longitude") is None:
+            raise ValueError(f"Facility {index} needs latitude and longitude")
+        industries_used = facility.get("industries_used") or []
+        if not isinstance(industries_used, list):
+            raise ValueError(f"Facility {index}: `industries_used` must be a list")
+        row = {
+            "latitude": float(facility["latitude"]),
+            "longitude": float(facility["longitude"]),
+            "co2": float(facility.get("co2") or 0),
+            "ch4": float(facility.get("ch4") or 0),
+            "n2o": float(facility.get("n2o") or 0),
+            "industries_used": industries_used,
+        }
+        wind_speeds = facility.get("wind_speeds")
+        if wind_speeds is not None:
+            if not isinstance(wind_speeds, list) or len(wind_speeds) != 3:
+                raise ValueError(f"Facility {index}: `wind_speeds` must be [1km, 5km, 10km]")
+            row["wind_speeds"] = [float(v) for v in wind_speeds]
+        rows.append(row)
+    return rows
+
+
+# Endpoint: /geo/predict-industry
+# Industrial temperature increase of many facilities with one model call. Body:
+# {"facilities": [{"latitude", "longitude", "co2", "ch4", "n2o", "industries_used", "wind_speeds"?}]}.
+# Wind speeds that are not given are fetched for all facilities at once (utils/wind.py).
+@geo_bp.post("/predict-industry")
+def predict_industry():
+    from utils.model_registry import INDUSTRY_MODEL, industry_features
+
+    data = request.get_json(silent=True)
+    try:
+        rows = _parse_facilities(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
+
+    try:
+        model = model_registry.get(INDUSTRY_MODEL)
+        start = time.perf_counter()
+        x, unknown = industry_features(rows)
+        predictions = model.predict(x)
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        results = [
+            {
+                "index": i,
+                "temp_industry": int(predictions[i]),
+                "reported_emissions": float(x[i, 2]),
+                "wind_speeds": [float(v) for v in x[i, -3:]],
+                "unknown_industries": unknown[i],
+            }
+            for i in range(len(rows))
+        ]
         return (
             jsonify(
                 {
-                    "status": "error",
-                    "message": str(e),
-                    "payload": None,
+                    "status": "success",
+                    "message": "Prediction completed successfully",
+                    "payload": {"predictions": results, "model": model.info(), "elapsed_ms": elapsed_ms},
                 }
             ),
-            500,
+            200,
         )
 
+    except ModelUnavailable as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 503
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
+
+
+# Endpoint: /geo/models
+# Models loaded by this worker: version (content hash), load time and process
+@geo_bp.get("/models")
+def get_models():
+    try:
+        return jsonify({"status": "success", "message": "Loaded models", "payload": model_registry.info()}), 200
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
+
+
+FACILITIES_MAX_RESULTS = int(os.getenv("GEO_FACILITIES_MAX_RESULTS", "1000"))
 
 
+def _query_point(args):
+    """Validated (lat, lon) of a facilities query string."""
+    try:
+        lat, lon = float(args["lat"]), float(args["lon"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("`lat` and `lon` are required numbers")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("`lat` must be within [-90, 90] and `lon` within [-180, 180]")
+    return lat, lon
+
+
+def _query_limit(value):
+    limit = int(value) if value is not None else FACILITIES_MAX_RESULTS
+    if not 1 <= limit <= FACILITIES_MAX_RESULTS:
+        raise ValueError(f"`limit` must be within [1, {FACILITIES_MAX_RESULTS}]")
+    return limit
+
+
+def _facilities_response(index, indices, distances, limit, start):
+    """Payload shared by the facility queries: the first `limit` matches plus their total."""
+    returned = indices[:limit]
+    facilities = index.records(returned, distances[:limit] if distances is not None else None)
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": f"{len(indices)} facilities found",
+                "payload": {
+                    "count": int(len(indices)),
+                    "truncated": bool(len(indices) > limit),
+                    "facilities": facilities,
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+                },
+            }
+        ),
+        200,
+    )
+
+
+# Endpoint: /geo/facilities?lat=&lon=&radius=[&limit=]
+# GHGRP facilities within `radius` meters of a point, nearest first, with their emissions,
+# industries, heat flags, LST and wind speeds (utils/facility_index.py)
+@geo_bp.get("/facilities")
+def get_facilities():
+    from utils.facility_index import get_facility_index
+
+    try:
+        lat, lon = _query_point(request.args)
+        radius = float(request.args.get("radius", 10000))
+        if not 0 < radius <= 1_000_000:
+            raise ValueError("`radius` must be within (0, 1000000] meters")
+        limit = _query_limit(request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
+
+    try:
+        index = get_facility_index()
+        start = time.perf_counter()
+        indices, distances = index.within_radius(lat, lon, radius)
+        return _facilities_response(index, indices, distances, limit, start)
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
+
+
+# Endpoint: /geo/facilities/nearest?lat=&lon=&k=[&max_distance=]
+# The `k` GHGRP facilities nearest to a point (optionally within `max_distance` meters)
+@geo_bp.get("/facilities/nearest")
+def get_nearest_facilities():
+    from utils.facility_index import get_facility_index
+
+    try:
+        lat, lon = _query_point(request.args)
+        k = _query_limit(request.args.get("k", 10))
+        max_distance = request.args.get("max_distance")
+        max_distance = float(max_distance) if max_distance is not None else None
+        if max_distance is not None and max_distance <= 0:
+            raise ValueError("`max_distance` must be positive")
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
+
+    try:
+        index = get_facility_index()
+        start = time.perf_counter()
+        indices, distances = index.nearest(lat, lon, k, max_distance)
+        return _facilities_response(index, indices, distances, k, start)
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
 
 
+# Endpoint: /geo/facilities/in-polygon
+# GHGRP facilities inside a GeoJSON Polygon/MultiPolygon (holes excluded). Body:
+# {"geometry": {...}, "limit"?}; a bare geometry or Feature is accepted too.
+@geo_bp.post("/facilities/in-polygon")
+def get_facilities_in_polygon():
+    from utils.facility_index import get_facility_index, parse_polygons
 
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "The body must be a GeoJSON geometry", "payload": None}), 400
+    geometry = data.get("geometry") if "coordinates" not in data and data.get("type") != "Feature" else data
+
+    try:
+        limit = _query_limit(data.get("limit"))
+        if not isinstance(geometry, dict):
+            raise ValueError("`geometry` must be a GeoJSON Polygon or MultiPolygon")
+        parse_polygons(geometry)
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 400
+
+    try:
+        index = get_facility_index()
+        start = time.perf_counter()
+        indices = index.in_polygon(geometry)
+        return _facilities_response(index, indices, None, limit, start)
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
+
+
+# Endpoint: /geo/jobs/<job_id>
+# Status, per-polygon progress and results of an asynchronous job. `?results=false` omits the items.
+@geo_bp.get("/jobs/<job_id>")
+def get_job(job_id):
+    try:
+        job = jobs.job_runner.get(job_id)
+        if job is None:
+            return jsonify({"status": "error", "message": "Job not found", "payload": None}), 404
+
+        include_items = request.args.get("results", "true").lower() != "false"
+        return jsonify({"status": "success", "message": f"Job {job.status}", "payload": job.to_dict(include_items)}), 200
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
+
+
+# Endpoint: /geo/jobs/<job_id>/cancel (or DELETE /geo/jobs/<job_id>)
+# Cancels a job; polygons already simulated keep their results
+@geo_bp.post("/jobs/<job_id>/cancel")
+@geo_bp.delete("/jobs/<job_id>")
+def cancel_job(job_id):
+    try:
+        job = jobs.job_runner.cancel(job_id)
+        if job is None:
+            return jsonify({"status": "error", "message": "Job not found", "payload": None}), 404
+
+        return jsonify({"status": "success", "message": "Cancellation requested", "payload": job.to_dict(False)}), 202
+
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e), "payload": None}), 500
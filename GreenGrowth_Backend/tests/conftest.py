@@ -0,0 +1,75 @@
+# tests/conftest.py
+#
+# Shared pytest setup. Run from GreenGrowth_Backend/:  python -m pytest -q
+#
+# Every test runs on the offline fake Earth Engine backend (utils/fake_ee.py) with each store
+# the app writes to pointed at a scratch directory, so the suite needs neither credentials nor
+# the network. The environment is set before anything imports the app.
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+SCRATCH = tempfile.mkdtemp(prefix="gg_tests_")
+os.environ.update(
+    {
+        "GEO_BACKEND": "fake",
+        "GEO_FAKE_LATENCY_MS": "0",
+        "DB_URL": f"sqlite:///{os.path.join(SCRATCH, 'app.db')}",
+        "CALIBRATION_STORE_PATH": os.path.join(SCRATCH, "calibration.sqlite"),
+        "RASTER_STORE_DIR": os.path.join(SCRATCH, "raster_store"),
+        "WIND_GRID_PATH": os.path.join(SCRATCH, "no_wind_grid.npz"),
+        "ML_MODEL_DIR": os.path.join(SCRATCH, "models"),
+        "FACILITY_DATA_DIR": os.path.join(SCRATCH, "facility_data"),
+        "INDUSTRY_FEATURES_CACHE": os.path.join(SCRATCH, "industry_features.npz"),
+    }
+)
+os.environ.pop("GEE_PROJECT", None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as flask_app
+
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """The fake backend with its call counters reset and every geo cache emptied."""
+    from utils import raster_store, wind_grid
+    from utils.calibration_store import calibration_store
+    from utils.geo_backend import get_backend
+    from utils.geo_cache import baseline_cache, ndvi_percentile_cache, wind_cache
+    from utils.tile_renderer import tile_cache
+
+    for cache in (baseline_cache, ndvi_percentile_cache, wind_cache, tile_cache):
+        cache.clear()
+    calibration_store.clear()
+    # A fresh raster store per test
+    monkeypatch.setenv("RASTER_STORE_DIR", str(tmp_path / "raster_store"))
+    monkeypatch.setattr(raster_store, "_store", None)
+    monkeypatch.setattr(wind_grid, "_grid", None)
+    monkeypatch.setattr(wind_grid, "_grid_loaded", False)
+    monkeypatch.setattr(wind_grid, "_grid_retry_at", 0.0)
+
+    fake = get_backend()
+    assert fake.name == "fake"
+    fake.reset_stats()
+    return fake
@@ -0,0 +1,203 @@
+# tests/test_geo_fake_backend.py
+#
+# Earth Engine round trips of GeoAnalytics, WindService and the /geo endpoints on the offline
+# fake backend. The counts are the ones the caches, batching and local tiles are built around:
+# a change that adds a getInfo or getMapId to a request path fails here.
+
+import io
+import math
+
+import pytest
+from PIL import Image
+
+from utils.geo_cache import region_key
+from utils.geoprocessor import GeoAnalytics
+from utils.wind import WindService
+
+LAT, LON = 19.4326, -99.1332
+BUFFER = 1000
+
+PRESET_FIELDS = {
+    "industrial": {"co2": 12000, "ch4": 40, "n2o": 3, "industries_used": ["Cement Production"]},
+    "residential_real": {"densidad": 1500, "trafico": 20000, "albedo": 0.2},
+}
+
+
+def calls(backend):
+    stats = backend.stats()
+    return {name: stats.get(name, 0) for name in ("getInfo", "getMapId", "computePixels")}
+
+
+def square(lat, lon, size_m=200.0):
+    half_lat = size_m / 2 / 111320.0
+    half_lon = half_lat / math.cos(math.radians(lat))
+    ring = [
+        [lon - half_lon, lat - half_lat],
+        [lon + half_lon, lat - half_lat],
+        [lon + half_lon, lat + half_lat],
+        [lon - half_lon, lat + half_lat],
+        [lon - half_lon, lat - half_lat],
+    ]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def polygons(count):
+    radius_deg = BUFFER / 111320.0 * 0.8
+    return [
+        square(
+            LAT + radius_deg * math.sqrt((i + 0.5) / count) * math.sin(i * 2.399963),
+            LON + radius_deg * math.sqrt((i + 0.5) / count) * math.cos(i * 2.399963),
+        )
+        for i in range(count)
+    ]
+
+
+def tile_at(lat, lon, z):
+    """XYZ tile containing the point."""
+    n = 2**z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return x, y
+
+
+def simulation_request(preset, **extra):
+    return {
+        "latitude": LAT,
+        "longitude": LON,
+        "buffer": BUFFER,
+        "preset": preset,
+        **PRESET_FIELDS[preset],
+        **extra,
+    }
+
+
+# --- GeoAnalytics ---
+
+def test_kpis_take_one_getinfo_and_are_memoized(backend):
+    analyzer = GeoAnalytics(LAT, LON, BUFFER)
+    kpis = analyzer.get_kpis(["heat", "NDVI", "AQ"])
+    assert calls(backend) == {"getInfo": 1, "getMapId": 0, "computePixels": 0}
+    assert set(kpis) == {"avg_surface_temp", "avg_NVDI", "avg_air_quality"}
+
+    assert GeoAnalytics(LAT, LON, BUFFER).get_kpis(["heat", "NDVI", "AQ"]) == kpis
+    assert calls(backend)["getInfo"] == 1
+
+    # Only the layers not reduced yet cost a round trip
+    GeoAnalytics(LAT, LON, BUFFER).get_kpis(["heat"])
+    assert calls(backend)["getInfo"] == 1
+
+
+def test_base_tile_url_takes_one_getmapid_and_is_memoized(backend):
+    url = GeoAnalytics(LAT, LON, BUFFER).get_base_tile_url("temp")
+    assert calls(backend) == {"getInfo": 0, "getMapId": 1, "computePixels": 0}
+
+    assert GeoAnalytics(LAT, LON, BUFFER).get_base_tile_url("temp") == url
+    assert calls(backend)["getMapId"] == 1
+
+
+def test_points_in_one_cache_cell_share_the_baseline(backend):
+    first = GeoAnalytics(LAT, LON, BUFFER)
+    second = GeoAnalytics(LAT + 0.0001, LON - 0.0001, BUFFER)
+    assert region_key(LAT, LON, BUFFER) == region_key(LAT + 0.0001, LON - 0.0001, BUFFER)
+    assert first.raster_bounds() == second.raster_bounds()
+
+    first.get_kpis(["heat"])
+    second.get_kpis(["heat"])
+    assert calls(backend)["getInfo"] == 1
+
+
+# --- WindService ---
+
+def test_wind_speeds_are_batched_and_cached(backend):
+    service = WindService()
+    points = [(LAT, LON), (LAT + 0.1, LON), (LAT, LON + 0.1)]
+    speeds = service.speeds(points)
+    assert len(speeds) == 3 and all(len(row) == 3 for row in speeds)
+    assert calls(backend)["getInfo"] == 1
+
+    assert service.speeds(points) == speeds
+    assert calls(backend)["getInfo"] == 1
+
+
+# --- /geo endpoints ---
+
+def test_get_initial_data_takes_one_getmapid(client, backend):
+    response = client.get(f"/geo/get-initial-data/temp?latitude={LAT}&longitude={LON}&buffer={BUFFER}")
+    assert response.status_code == 201
+    assert calls(backend) == {"getInfo": 0, "getMapId": 1, "computePixels": 0}
+
+
+def test_get_kpis_takes_one_getinfo(client, backend):
+    url = f"/geo/get-kpis/heat?latitude={LAT}&longitude={LON}&buffer={BUFFER}"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert calls(backend) == {"getInfo": 1, "getMapId": 0, "computePixels": 0}
+
+    assert client.get(url).get_json() == response.get_json()
+    assert calls(backend)["getInfo"] == 1
+
+
+def test_get_kpis_of_every_layer_takes_one_getinfo(client, backend):
+    response = client.get(f"/geo/get-kpis?layers=heat,NDVI,AQ&latitude={LAT}&longitude={LON}&buffer={BUFFER}")
+    assert response.status_code == 200
+    assert calls(backend) == {"getInfo": 1, "getMapId": 0, "computePixels": 0}
+
+
+def test_simulate_residential(client, backend):
+    response = client.post(
+        "/geo/simulate", json=simulation_request("residential_real", geometry=square(LAT, LON))
+    )
+    assert response.status_code == 201, response.get_json()
+    assert calls(backend) == {"getInfo": 1, "getMapId": 3, "computePixels": 0}
+
+
+def test_simulate_industrial_adds_the_calibration(client, backend):
+    response = client.post(
+        "/geo/simulate", json=simulation_request("industrial", geometry=square(LAT, LON))
+    )
+    assert response.status_code == 201, response.get_json()
+    assert calls(backend) == {"getInfo": 2, "getMapId": 3, "computePixels": 0}
+
+
+def test_simulate_polygons_costs_one_simulation_per_polygon(client, backend):
+    response = client.post(
+        "/geo/simulate-polygons",
+        json=simulation_request("residential_real", geometries=polygons(3)),
+    )
+    assert response.status_code == 201, response.get_json()
+    assert calls(backend) == {"getInfo": 3, "getMapId": 9, "computePixels": 0}
+
+
+def test_simulate_polygons_batch_shares_the_round_trips(client, backend):
+    response = client.post(
+        "/geo/simulate-polygons",
+        json=simulation_request("residential_real", geometries=polygons(10), batch=True),
+    )
+    assert response.status_code == 201, response.get_json()
+    assert len(response.get_json()["payload"]) == 10
+    assert calls(backend) == {"getInfo": 1, "getMapId": 3, "computePixels": 0}
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_local_tiles_pull_the_layer_once(client, backend):
+    x, y = tile_at(LAT, LON, 14)
+    url = f"/geo/tiles/temp/14/{x}/{y}.png?latitude={LAT}&longitude={LON}&buffer={BUFFER}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    with Image.open(io.BytesIO(response.data)) as image:
+        assert image.mode == "RGBA" and image.size == (256, 256)
+    assert calls(backend) == {"getInfo": 0, "getMapId": 0, "computePixels": 1}
+
+    assert client.get(url).data == response.data
+    assert calls(backend)["computePixels"] == 1
+
+
+def test_unknown_simulation_tile_is_404(client, backend):
+    x, y = tile_at(LAT, LON, 14)
+    response = client.get(
+        f"/geo/tiles/sim_temp/14/{x}/{y}.png?latitude={LAT}&longitude={LON}&buffer={BUFFER}&sim_id=missing"
+    )
+    assert response.status_code == 404
+    assert calls(backend)["computePixels"] == 0
@@ -0,0 +1,59 @@
+# tests/test_industry_training.py
+#
+# Publication of the industry model by train_industry_model (utils/industry.py) on a small
+# synthetic feature table: the .pkl and .npz only replace the served files once the export matches.
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from utils import industry, tree_ensemble
+from utils.industry import FEATURE_COLUMNS, INDUSTRY_MODEL, train_industry_model
+from utils.tree_ensemble import TreeEnsemble
+
+
+@pytest.fixture
+def feature_table(monkeypatch):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(120, len(FEATURE_COLUMNS)))
+    y = 30 + 2 * x[:, 0] - x[:, 1] + rng.normal(0, 0.1, 120)
+    table = {"x": x, "y": y, "joined_rows": 120, "cache_hit": True, "sources": {}}
+    monkeypatch.setattr(industry, "load_feature_table", lambda *args, **kwargs: table)
+    return table
+
+
+def train(output_dir):
+    return train_industry_model(str(output_dir), n_iter=1, cv=2, n_jobs=1, progress=lambda message: None)
+
+
+def test_publishes_the_model_and_its_export(tmp_path, feature_table):
+    report = train(tmp_path)
+    assert report["export_max_abs_diff"] <= 1e-9
+    assert sorted(os.listdir(tmp_path)) == [f"{INDUSTRY_MODEL}.{ext}" for ext in ("npz", "pkl", "report.json")]
+
+    with open(tmp_path / f"{INDUSTRY_MODEL}.pkl", "rb") as fh:
+        model = pickle.load(fh)
+    ensemble = TreeEnsemble.load(str(tmp_path / f"{INDUSTRY_MODEL}.npz"))
+    x = feature_table["x"][:20]
+    assert np.max(np.abs(ensemble.predict(x) - model.predict(x))) <= 1e-9
+
+
+def test_rejected_export_leaves_the_served_model_untouched(tmp_path, feature_table, monkeypatch):
+    served = {f"{INDUSTRY_MODEL}.pkl": b"served pkl", f"{INDUSTRY_MODEL}.npz": b"served npz"}
+    for name, content in served.items():
+        (tmp_path / name).write_bytes(content)
+
+    real_export = tree_ensemble.export_tree_ensemble
+
+    def mismatched_export(*args, **kwargs):
+        return {**real_export(*args, **kwargs), "max_abs_diff": 1.0}
+
+    monkeypatch.setattr(tree_ensemble, "export_tree_ensemble", mismatched_export)
+    with pytest.raises(ValueError, match="differs from the model"):
+        train(tmp_path)
+
+    assert {name: (tmp_path / name).read_bytes() for name in os.listdir(tmp_path)} == served
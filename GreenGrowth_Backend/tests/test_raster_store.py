@@ -0,0 +1,130 @@
+# tests/test_raster_store.py
+#
+# RasterStore (utils/raster_store.py) on synthetic rasters.
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from utils.raster_store import RasterStore
+
+BOUNDS = (-100.0, 19.0, -99.0, 20.0)
+
+
+def synthetic(height=40, width=50, seed=0):
+    return np.random.default_rng(seed).normal(30, 5, (height, width)).astype(np.float32)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RasterStore(str(tmp_path / "rasters"), tile_size=16)
+
+
+def layer_bytes(store, tmp_path):
+    """On-disk size of one synthetic layer in `store`."""
+    probe = RasterStore(str(tmp_path / "probe"), tile_size=store.tile_size)
+    probe.put("probe", "temp", synthetic(), BOUNDS)
+    return probe.usage()
+
+
+def test_put_get_round_trip(store):
+    array = synthetic()
+    store.put("cdmx", "temp", array, BOUNDS)
+
+    raster = store.get("cdmx", "temp")
+    assert raster is not None
+    assert (raster.height, raster.width) == array.shape
+    assert raster.bounds == BOUNDS
+    np.testing.assert_array_equal(raster.read(), array)
+    np.testing.assert_array_equal(raster.read(slice(5, 33), slice(7, 49)), array[5:33, 7:49])
+    assert store.get("cdmx", "ndvi") is None
+    assert store.has("cdmx", ["temp"]) and not store.has("cdmx", ["temp", "ndvi"])
+
+
+def test_put_replaces_previous_version(store):
+    store.put("cdmx", "temp", synthetic(seed=1), BOUNDS)
+    usage = store.usage()
+    store.put("cdmx", "temp", synthetic(seed=2), BOUNDS)
+
+    np.testing.assert_array_equal(store.get("cdmx", "temp").read(), synthetic(seed=2))
+    assert store.usage() == usage
+    assert len([p for p in os.listdir(store.root) if p.endswith(".npy")]) == 1
+
+
+def test_tiling_pads_edges_with_nan(store):
+    array = synthetic(40, 50)
+    raster = store.put("cdmx", "temp", array, BOUNDS)
+
+    assert raster.tiles.shape == (3, 4, 16, 16)
+    np.testing.assert_array_equal(raster.tile(0, 0), array[:16, :16])
+    np.testing.assert_array_equal(raster.tile(1, 2), array[16:32, 32:48])
+    edge = raster.tile(2, 3)
+    np.testing.assert_array_equal(edge[:8, :2], array[32:40, 48:50])
+    assert np.isnan(edge[8:, :]).all() and np.isnan(edge[:, 2:]).all()
+
+
+def test_sample_nearest_pixel(store):
+    array = synthetic(40, 50)
+    raster = store.put("cdmx", "temp", array, BOUNDS)
+    west, south, east, north = BOUNDS
+    # Centers of pixels (row 3, col 7) and (row 39, col 49), plus a point outside
+    lons = [west + (7.5 / 50) * (east - west), west + (49.5 / 50) * (east - west), east + 1]
+    lats = [north - (3.5 / 40) * (north - south), north - (39.5 / 40) * (north - south), north]
+
+    values = raster.sample(lons, lats)
+    assert values[0] == array[3, 7] and values[1] == array[39, 49]
+    assert np.isnan(values[2])
+
+
+def test_reads_are_zero_copy_memory_maps(store):
+    store.put("cdmx", "temp", synthetic(), BOUNDS)
+    raster = store.get("cdmx", "temp")
+
+    assert isinstance(raster.tiles, np.memmap)
+    assert raster.tiles.filename.startswith(store.root)
+    tile = raster.tile(1, 1)
+    assert np.shares_memory(tile, raster.tiles)
+    assert not tile.flags.writeable
+
+
+def test_open_maps_survive_eviction(store, tmp_path):
+    store.disk_budget = layer_bytes(store, tmp_path)
+    raster = store.put("a", "temp", synthetic(seed=1), BOUNDS)
+    store.put("b", "temp", synthetic(seed=2), BOUNDS)
+
+    assert store.get("a", "temp") is None
+    np.testing.assert_array_equal(raster.read(), synthetic(seed=1))
+
+
+def test_lru_eviction_by_disk_budget(store, tmp_path):
+    store.disk_budget = 2 * layer_bytes(store, tmp_path)
+    store.put("a", "temp", synthetic(seed=1), BOUNDS)
+    time.sleep(0.01)
+    store.put("b", "temp", synthetic(seed=2), BOUNDS)
+    time.sleep(0.01)
+    assert store.get("a", "temp") is not None  # "a" is now the most recently used
+    time.sleep(0.01)
+    store.put("c", "temp", synthetic(seed=3), BOUNDS)
+
+    assert store.get("b", "temp") is None
+    assert store.get("a", "temp") is not None and store.get("c", "temp") is not None
+    assert store.usage() <= store.disk_budget
+
+
+def test_eviction_keeps_every_layer_of_the_key_being_written(store, tmp_path):
+    # Room for 3 layers: writing the 4th layer of "cdmx" must not evict its other 3
+    store.disk_budget = 3 * layer_bytes(store, tmp_path)
+    layers = ["temp", "ndvi", "ndbi", "aq"]
+    for layer in layers:
+        store.put("cdmx", layer, synthetic(), BOUNDS)
+        time.sleep(0.01)
+
+    assert store.has("cdmx", layers)
+
+    # The next key evicts the least recently used layers of "cdmx" instead
+    store.put("mty", "temp", synthetic(), BOUNDS)
+    assert store.get("mty", "temp") is not None
+    assert store.usage() <= store.disk_budget
+    assert not store.has("cdmx", layers)
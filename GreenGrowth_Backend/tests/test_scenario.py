@@ -0,0 +1,107 @@
+# tests/test_scenario.py
+#
+# Cumulative scenarios (utils/scenario.py) against simulate-polygons on the fake backend: the
+# calibrated regressions must only reach the industrial edits.
+
+import pytest
+
+from tests.test_geo_fake_backend import BUFFER, LAT, LON, PRESET_FIELDS, square
+from utils.geo_backend import ee, evaluate
+from utils.scenario import Scenario
+
+OFFSET = 0.003
+
+
+def request(preset, geometries):
+    return {
+        "latitude": LAT,
+        "longitude": LON,
+        "buffer": BUFFER,
+        "preset": preset,
+        "geometries": geometries,
+        **PRESET_FIELDS["industrial"],
+        **PRESET_FIELDS["residential_real"],
+    }
+
+
+def scenario_report(client, preset, geometries):
+    response = client.post("/geo/simulate-scenario", json=request(preset, geometries))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["payload"]["report"]
+
+
+def polygon_report(client, preset, geometry):
+    response = client.post("/geo/simulate-polygons", json=request(preset, [geometry]))
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["payload"][0]["report"]
+
+
+@pytest.mark.parametrize("preset", ["industrial", "residential_real"])
+def test_single_edit_matches_simulate_polygons(client, backend, preset):
+    geometry = square(LAT, LON)
+    scenario = scenario_report(client, preset, [geometry])
+    polygon = polygon_report(client, preset, geometry)
+
+    for section in ("baseline", "post"):
+        assert scenario[section] == pytest.approx(polygon[section], rel=1e-9)
+    assert scenario["model"] == ("COMPLEX" if preset == "industrial" else "DEFAULT")
+
+
+def test_calibrated_model_only_applies_to_industrial_edits(client, backend):
+    industrial = dict(square(LAT, LON - OFFSET), preset="industrial")
+    residential = dict(square(LAT, LON + OFFSET), preset="residential_real")
+
+    report = scenario_report(client, "industrial", [industrial, residential])
+    assert report["model"] == "MIXED"
+    assert [edit["model"] for edit in report["edits"]] == ["COMPLEX", "DEFAULT"]
+
+    # Without the industrial edit, the residential one is simulated as in simulate-polygons
+    alone = scenario_report(client, "industrial", [residential])
+    assert alone["model"] == "DEFAULT"
+    assert [edit["model"] for edit in alone["edits"]] == ["DEFAULT"]
+
+
+def test_untouched_pixels_keep_their_model_when_an_edit_is_added(backend):
+    industrial = square(LAT, LON - OFFSET)
+    residential = square(LAT, LON + OFFSET)
+    residential_preset = (
+        "residential_real",
+        {
+            "densidad": {"value": 1500, "unit": "buildings_per_km2"},
+            "trafico": {"value": 20000, "unit": "veh_day"},
+            "albedo": {"value": 0.2, "unit": "albedo_0_1"},
+        },
+    )
+    untouched = ee.Geometry(square(LAT + OFFSET, LON, 400))
+
+    def untouched_post(edits):
+        scenario = Scenario(LAT, LON, BUFFER)
+        for geometry, preset, calibrate in edits:
+            scenario.add(geometry, preset, calibrate=calibrate, aq_industry=50)
+        scenario.analyzer.calibrate_precision()
+        layers, _ = scenario._layers(scenario.analyzer.reg_coefs)
+        analyzer = scenario.analyzer
+        return evaluate(
+            ee.Dictionary(
+                {
+                    "temp": analyzer._mean(layers["temp"], 20, untouched),
+                    "aq": analyzer._mean(layers["aq"], 20, untouched),
+                }
+            )
+        )
+
+    alone = untouched_post([(industrial, "industrial", True)])
+    with_residential = untouched_post([(industrial, "industrial", True), (residential, residential_preset, False)])
+    assert with_residential == alone
+
+
+def test_cached_report_counts_only_the_round_trips_it_used(client, backend):
+    geometries = [dict(square(LAT, LON - OFFSET), preset="industrial"), square(LAT, LON + OFFSET)]
+    first = scenario_report(client, "residential_real", geometries)
+    # One report, three maps and the calibration, against (1 + 3) per polygon plus the calibration
+    calibration = first["round_trips"]["used"] - 4
+    assert first["round_trips"]["saved"] == 2 * 4 + calibration - first["round_trips"]["used"]
+
+    cached = scenario_report(client, "residential_real", geometries)
+    assert cached["round_trips"]["used"] == 0
+    assert cached["round_trips"]["saved"] == 2 * 4
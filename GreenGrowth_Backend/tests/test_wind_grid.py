@@ -0,0 +1,119 @@
+# tests/test_wind_grid.py
+#
+# Offline wind climatology (utils/wind_grid.py) on a small synthetic (12, rows, cols) grid whose
+# speed is linear in latitude and longitude, so bilinear samples and disk means are known exactly.
+
+import os
+
+import numpy as np
+import pytest
+
+from utils import wind_grid
+from utils.wind import WindService, reference_month
+from utils.wind_grid import WindGrid, write_wind_grid
+
+BOUNDS = (-100.0, 19.0, -98.0, 21.0)
+RESOLUTION = 0.1
+ROWS = COLS = 20
+
+
+def speed(month, lats, lons):
+    """Synthetic speed field: linear in latitude and longitude, offset by the month."""
+    west, _, _, north = BOUNDS
+    return month + 2.0 * (np.asarray(lons) - west) + 3.0 * (north - np.asarray(lats))
+
+
+def synthetic_data():
+    west, _, _, north = BOUNDS
+    lats = north - (np.arange(ROWS) + 0.5) * RESOLUTION
+    lons = west + (np.arange(COLS) + 0.5) * RESOLUTION
+    grid_lats, grid_lons = np.meshgrid(lats, lons, indexing="ij")
+    return np.stack([speed(month, grid_lats, grid_lons) for month in range(1, 13)])
+
+
+@pytest.fixture
+def grid_path(tmp_path):
+    path = str(tmp_path / "wind_grid.npz")
+    write_wind_grid(path, synthetic_data(), BOUNDS, RESOLUTION, years=[2015, 2024])
+    return path
+
+
+def test_bilinear_sampling_between_cell_centers(grid_path):
+    grid = WindGrid.load(grid_path)
+    lats = np.array([20.03, 19.52, 20.871])
+    lons = np.array([-99.47, -98.96, -99.333])
+    for month in (1, 7, 12):
+        # float16 storage: ~0.01 m/s at these speeds
+        expected = speed(month, lats, lons)
+        assert grid._bilinear(month - 1, lats, lons) == pytest.approx(expected, abs=0.02)
+
+
+def test_disk_means_per_radius(grid_path):
+    grid = WindGrid.load(grid_path)
+    lats, lons = [20.0, 19.6], [-99.0, -99.4]
+    values = grid.speeds(lats, lons, 5, (1000, 5000, 10000))
+    assert values.shape == (2, 3)
+    # The mean of a linear field over a disk is its value at the center
+    for i in range(2):
+        assert values[i] == pytest.approx([speed(5, lats[i], lons[i])] * 3, abs=0.1)
+
+
+def test_missing_cells_and_points_outside_are_nan(tmp_path):
+    # An island of 2 x 2 cells around (20.0, -99.0) in a sea without data
+    data = np.full_like(synthetic_data(), np.nan)
+    data[:, 9:11, 9:11] = synthetic_data()[:, 9:11, 9:11]
+    path = str(tmp_path / "wind_grid.npz")
+    write_wind_grid(path, data, BOUNDS, RESOLUTION)
+    grid = WindGrid.load(path)
+
+    values = grid.speeds([20.0, 19.3, 30.0], [-99.0, -99.8, -99.0], 1, (1000, 50000))
+    # The 1 km disk is on the island, most of the 50 km one is sea
+    assert np.isfinite(values[0, 0]) and np.isnan(values[0, 1])
+    assert np.isnan(values[1]).all()
+    assert np.isnan(values[2]).all()
+
+
+def test_load_memory_maps_the_grid(grid_path):
+    grid = WindGrid.load(grid_path)
+    assert isinstance(grid.data, np.memmap)
+    assert grid.data.shape == (12, ROWS, COLS) and grid.data.dtype == np.float16
+    assert grid.bounds == BOUNDS and grid.meta["years"] == [2015, 2024]
+
+
+def test_rewrite_replaces_data_and_georeferencing_together(grid_path):
+    write_wind_grid(grid_path, synthetic_data(), (-90.0, 19.0, -88.0, 21.0), RESOLUTION)
+    assert os.listdir(os.path.dirname(grid_path)) == ["wind_grid.npz"]
+    grid = WindGrid.load(grid_path)
+    assert grid.bounds == (-90.0, 19.0, -88.0, 21.0)
+    assert "years" not in grid.meta
+
+
+def test_failed_load_is_retried(backend, tmp_path, monkeypatch):
+    path = tmp_path / "wind_grid.npz"
+    path.write_bytes(b"not a grid")
+    monkeypatch.setenv("WIND_GRID_PATH", str(path))
+    assert wind_grid.get_wind_grid() is None
+
+    write_wind_grid(str(path), synthetic_data(), BOUNDS, RESOLUTION)
+    assert wind_grid.get_wind_grid() is None  # Not before LOAD_RETRY_S
+    monkeypatch.setattr(wind_grid, "_grid_retry_at", 0.0)
+    assert wind_grid.get_wind_grid().bounds == BOUNDS
+
+
+def test_wind_service_falls_back_to_earth_engine_where_the_grid_has_no_data(backend, tmp_path, monkeypatch):
+    data = synthetic_data()
+    data[:, :, : COLS // 2] = np.nan  # No data in the western half (sea)
+    path = str(tmp_path / "wind_grid.npz")
+    write_wind_grid(path, data, BOUNDS, RESOLUTION)
+    monkeypatch.setenv("WIND_GRID_PATH", path)
+    service = WindService()
+
+    land = service.speeds([(20.0, -98.5), (19.6, -98.4)])
+    assert backend.stats().get("getInfo", 0) == 0
+    assert land[0] == pytest.approx([speed(reference_month().month, 20.0, -98.5)] * 3, abs=0.1)
+
+    # A sea cell and a point outside the grid: both in one live call
+    mixed = service.speeds([(20.0, -98.5), (20.0, -99.9), (40.0, -80.0)])
+    assert backend.stats().get("getInfo", 0) == 1
+    assert mixed[0] == land[0]
+    assert all(len(row) == 3 for row in mixed[1:])
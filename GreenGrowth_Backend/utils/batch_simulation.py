@@ -0,0 +1,280 @@
+# utils/batch_simulation.py
+#
+# Batch engine for simulate-polygons: every polygon of a request is simulated against ONE shared
+# GeoAnalytics (baseline layers, NDVI percentiles and calibration are built once) and all
+# baseline and post-simulation statistics come back in a single getInfo, so a 100-parcel plan
+# costs a handful of Earth Engine calls instead of several hundred.
+#
+# - Baseline statistics: one reduceRegions per scale over a FeatureCollection of the analysis
+#   areas (polygon + buffer), on the shared baseline images.
+# - Post statistics: each polygon is painted into its own mask inside a server-side map over
+#   the polygons of a group (same model, NDVI target band and buffer). Polygons whose buffers
+#   overlap therefore do not see each other's changes, exactly like the per-polygon path.
+# - Tiles: one "plan" tile set with every polygon's simulated values (3 getMapId per request).
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .ee_metrics import call_site
+from .geo_backend import ee, evaluate
+from .geoprocessor import GeoAnalytics
+
+# Analysis areas with a larger buffer are reduced with bestEffort reduceRegion (inside the same
+# getInfo) instead of reduceRegions, which has no bestEffort and would fail on too many pixels
+MAX_REGIONS_BUFFER_M = int(os.getenv("GEO_BATCH_MAX_REGIONS_BUFFER_M", "5000"))
+
+_BAND_TEMP = "LST_Day_1km"
+_BAND_NDVI = "NDVI"
+_BAND_AQ = "AQ_Composite_0_100"
+
+# Per-polygon modifiers carried as feature properties into the server-side map
+_MODIFIERS = ("ndvi_adj", "lst_extra", "aq_extra")
+_STATS = ("base_temp", "base_ndvi", "base_aq", "post_temp", "post_ndvi", "post_aq")
+
+
+class BatchSimulation:
+    """
+    Simulates many polygons that share the request's lat/lon/buffer and returns one report per
+    polygon, in the same shape as GeoAnalytics.impact_report.
+    """
+
+    def __init__(self, latitude: float, longitude: float, buffer: int = 50000):
+        self.analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
+        self._items: List[Dict[str, Any]] = []
+        self.round_trips = 0
+        self.sim_temp: Optional[ee.Image] = None
+        self.sim_ndvi: Optional[ee.Image] = None
+        self.sim_aq: Optional[ee.Image] = None
+
+    def add(
+        self,
+        geojson_area: Dict[str, Any],
+        preset: Union[str, Tuple[str, Dict[str, Any]]],
+        buffer_m: Optional[int] = None,
+        calibrate: bool = True,
+        temp_industry: float = 0,
+        aq_industry: float = 0,
+    ) -> int:
+        """Queues one polygon (same arguments as impact_report plus its industrial deltas); returns its index."""
+        self._items.append(
+            {
+                "geojson_area": geojson_area,
+                "preset": preset,
+                "buffer_m": buffer_m,
+                "calibrate": calibrate,
+                "temp_industry": temp_industry,
+                "aq_industry": aq_industry,
+            }
+        )
+        return len(self._items) - 1
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _post_map(self, ndvi_p: ee.Image, band: str, reg_coefs, buffer_m: Optional[int], with_baseline: bool):
+        """Per-feature function painting one polygon and reducing its simulated layers over its area."""
+        analyzer = self.analyzer
+        target_base = ndvi_p.select(band).rename("NDVI_target").clamp(0, 1)
+
+        def simulate(feature):
+            feature = ee.Feature(feature)
+            geom = feature.geometry()
+            mask = ee.Image(0).paint(geom, 1)
+            ndvi_target = target_base.add(ee.Number(feature.get("ndvi_adj"))).clamp(0, 1)
+            layers = analyzer._simulated_layers(
+                mask,
+                ndvi_target,
+                ee.Number(feature.get("lst_extra")),
+                ee.Number(feature.get("aq_extra")),
+                reg_coefs,
+            )
+            area = geom.buffer(buffer_m) if buffer_m else geom
+            stats = {
+                "post_temp": analyzer._mean(layers["temp"], 1000, area),
+                "post_ndvi": analyzer._mean(layers["ndvi"], 20, area),
+                "post_aq": analyzer._mean(layers["aq"], 5000, area),
+            }
+            if with_baseline:
+                stats.update(
+                    {
+                        "base_temp": analyzer._mean(analyzer.temp_image, 100, area),
+                        "base_ndvi": analyzer._mean(analyzer.ndvi, 20, area),
+                        "base_aq": analyzer._mean(analyzer.aq_index, 100, area),
+                    }
+                )
+            return feature.set(stats)
+
+        return simulate
+
+    def _plan_layers(self, resolved: Dict[int, Dict[str, Any]], ndvi_p: ee.Image, reg_coefs) -> None:
+        """Simulated images with every polygon painted in, for the plan's map tiles."""
+        analyzer = self.analyzer
+        empty = ee.Image(0)
+        zero = ee.Number(0)
+        background = analyzer._simulated_layers(empty, analyzer.ndvi, zero, zero, reg_coefs)
+        sim_temp, sim_ndvi, sim_aq = background["temp"], background["ndvi"], background["aq"]
+
+        for index, entry in resolved.items():
+            mask = empty.paint(entry["geometry"], 1)
+            ndvi_target = ndvi_p.select(entry["band"]).clamp(0, 1).add(entry["ndvi_adj"]).clamp(0, 1)
+            layers = analyzer._simulated_layers(
+                mask, ndvi_target, entry["lst_extra"], entry["aq_extra"], entry["coefs"]
+            )
+            sim_temp = sim_temp.where(mask, layers["temp"])
+            sim_ndvi = sim_ndvi.where(mask, layers["ndvi"])
+            sim_aq = sim_aq.where(mask, layers["aq"])
+
+        self.sim_temp, self.sim_ndvi, self.sim_aq = sim_temp, sim_ndvi, sim_aq
+
+    def tile_urls(self) -> Dict[str, Optional[str]]:
+        """Tile URLs of the plan (every polygon simulated at once); None before run()."""
+        analyzer = self.analyzer
+        urls = {"sim_temp_url": None, "sim_ndvi_url": None, "sim_aq_url": None}
+        try:
+            if self.sim_temp is not None:
+                urls["sim_temp_url"] = analyzer.get_tile_url(self.sim_temp, analyzer.temp_vis_params)
+            if self.sim_ndvi is not None:
+                urls["sim_ndvi_url"] = analyzer.get_tile_url(self.sim_ndvi, analyzer.ndvi_vis_params)
+            if self.sim_aq is not None:
+                urls["sim_aq_url"] = analyzer.get_tile_url(self.sim_aq, analyzer.aq_vis_params)
+        except Exception as e:
+            print("Warning: failed to generate plan tile URLs:", e)
+        return urls
+
+    @call_site("batch_simulation")
+    def run(self) -> List[Optional[Dict[str, Any]]]:
+        """
+        Simulates every queued polygon and returns their reports in insertion order (None for a
+        polygon whose preset is invalid). Raises if the combined evaluation fails.
+        """
+        analyzer = self.analyzer
+        if not self._items:
+            return []
+
+        calibration_round_trips = 0
+        if any(item["calibrate"] for item in self._items):
+            try:
+                calibration_round_trips = analyzer.calibrate_precision()
+            except Exception as e:
+                print(f"Fine tunning fail, using simple model: {e}")
+        complex_coefs = analyzer.reg_coefs if analyzer.ndbi is not None else None
+
+        ndvi_p = analyzer._ndvi_percentiles_for_month(analyzer._month("2025-05-01"))
+
+        # --- 1. Resolve presets and group polygons sharing model, NDVI target and buffer ---
+        resolved: Dict[int, Dict[str, Any]] = {}
+        groups: Dict[Tuple[bool, str, Optional[int]], List[int]] = {}
+        for index, item in enumerate(self._items):
+            modifiers = analyzer._preset_modifiers(item["preset"], item["temp_industry"], item["aq_industry"])
+            if modifiers is None:
+                continue
+            band, ndvi_adj, lst_extra, aq_extra = modifiers
+            coefs = complex_coefs if item["calibrate"] else None
+            resolved[index] = {
+                "geometry": ee.Geometry(item["geojson_area"]),
+                "band": band,
+                "ndvi_adj": ndvi_adj,
+                "lst_extra": lst_extra,
+                "aq_extra": aq_extra,
+                "coefs": coefs,
+            }
+            groups.setdefault((coefs is not None, band, item["buffer_m"]), []).append(index)
+
+        # --- 2. Baseline: one reduceRegions per scale over every analysis area ---
+        computed: Dict[str, Any] = {}
+        region_features = []
+        for (_, _, buffer_m), indices in groups.items():
+            if buffer_m and buffer_m > MAX_REGIONS_BUFFER_M:
+                continue
+            for index in indices:
+                geom = resolved[index]["geometry"]
+                area = geom.buffer(buffer_m) if buffer_m else geom
+                region_features.append(ee.Feature(area, {"index": index}))
+        if region_features:
+            areas = ee.FeatureCollection(region_features)
+            computed["baseline_100"] = (
+                analyzer.temp_image.addBands(analyzer.aq_index)
+                .reduceRegions(collection=areas, reducer=ee.Reducer.mean(), scale=100, tileScale=4)
+                .select(["index", _BAND_TEMP, _BAND_AQ], None, False)
+            )
+            computed["baseline_20"] = (
+                analyzer.ndvi
+                .reduceRegions(collection=areas, reducer=ee.Reducer.mean(), scale=20, tileScale=4)
+                .select(["index", "mean"], None, False)
+            )
+
+        # --- 3. Post simulation: one server-side map per group ---
+        for group_id, ((_, band, buffer_m), indices) in enumerate(groups.items()):
+            with_baseline = bool(buffer_m and buffer_m > MAX_REGIONS_BUFFER_M)
+            features = ee.FeatureCollection(
+                [
+                    ee.Feature(
+                        resolved[index]["geometry"],
+                        {"index": index, **{name: resolved[index][name] for name in _MODIFIERS}},
+                    )
+                    for index in indices
+                ]
+            )
+            simulate = self._post_map(ndvi_p, band, resolved[indices[0]]["coefs"], buffer_m, with_baseline)
+            computed[f"post_{group_id}"] = features.map(simulate).select(["index", *_STATS], None, False)
+
+        # --- 4. Everything in one round trip ---
+        values = evaluate(ee.Dictionary(computed)) if computed else {}
+        self.round_trips = 1 + calibration_round_trips
+
+        stats: Dict[int, Dict[str, Any]] = {index: {} for index in resolved}
+        for name, collection in (values or {}).items():
+            for feature in (collection or {}).get("features", []):
+                props = feature.get("properties") or {}
+                index = props.get("index")
+                if index is None:
+                    continue
+                entry = stats[int(index)]
+                if name == "baseline_100":
+                    entry["base_temp"] = {_BAND_TEMP: props.get(_BAND_TEMP)}
+                    entry["base_aq"] = {_BAND_AQ: props.get(_BAND_AQ)}
+                elif name == "baseline_20":
+                    entry["base_ndvi"] = {_BAND_NDVI: props.get("mean")}
+                else:
+                    entry.update({k: props[k] for k in _STATS if k in props})
+
+        # --- 5. Reports ---
+        # The per-polygon path evaluates one impact_report (1 getInfo) per polygon
+        legacy_round_trips = len(self._items) + calibration_round_trips
+        reports: List[Optional[Dict[str, Any]]] = []
+        for index, item in enumerate(self._items):
+            if index not in resolved:
+                reports.append(None)
+                continue
+            entry = stats[index]
+            report = analyzer._build_report(
+                item["preset"],
+                {
+                    "baseline": {
+                        "temp_c_mean": entry.get("base_temp"),
+                        "ndvi_mean": entry.get("base_ndvi"),
+                        "aq_mean": entry.get("base_aq"),
+                    },
+                    "post": {
+                        "temp_c_mean": entry.get("post_temp"),
+                        "ndvi_mean": entry.get("post_ndvi"),
+                        "aq_mean": entry.get("post_aq"),
+                    },
+                },
+                self.round_trips,
+                legacy_round_trips,
+                include_metrics=item["calibrate"],
+            )
+            report["round_trips"]["batch_size"] = len(self._items)
+            reports.append(report)
+
+        self._plan_layers(resolved, ndvi_p, complex_coefs if any(r["coefs"] for r in resolved.values()) else None)
+
+        print(
+            f"Batch simulation: {len(self._items)} polygons in {len(groups)} groups, "
+            f"{self.round_trips} round trips (saved {max(legacy_round_trips - self.round_trips, 0)})",
+            flush=True,
+        )
+        return reports
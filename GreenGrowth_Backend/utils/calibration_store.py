@@ -0,0 +1,142 @@
+# utils/calibration_store.py
+#
+# Persistent SQLite store for the regression coefficients fitted by GeoAnalytics.calibrate_precision.
+# Coefficients only depend on the region cell and the date window, so they are shared by every
+# polygon, request and gunicorn worker until they expire.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_PATH = os.path.join(BASE_DIR, "instance", "calibration.sqlite")
+
+
+class CalibrationStore:
+    """
+    Stores fitted coefficients and metrics as plain floats, keyed by region cell and date window.
+    Entries expire after `ttl` seconds and the least recently used ones are evicted above `max_entries`.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ready = False
+        # key -> [lock, waiters]
+        self._key_locks: Dict[str, list] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS calibration (
+                        key TEXT PRIMARY KEY,
+                        coefs TEXT NOT NULL,
+                        metrics TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                    """
+                )
+                conn.commit()
+                self._ready = True
+        return conn
+
+    @staticmethod
+    def make_key(cell: Tuple[float, float, int], window_end: str, *params: Any) -> str:
+        """Key of a region cell (quantized lat, lon, buffer), window end date and fit parameters."""
+        return ":".join(str(part) for part in (*cell, window_end, *params))
+
+    @contextmanager
+    def key_lock(self, key: str):
+        """
+        Serializes the lookup and fit of `key` inside the process, so polygons simulated
+        concurrently in the same region fit the coefficients once and the rest read them back.
+        """
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns {'coefs', 'metrics'} for `key`, or None if missing or expired."""
+        now = time.time()
+        try:
+            conn = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: calibration store unavailable: {e}")
+            return None
+        try:
+            row = conn.execute(
+                "SELECT coefs, metrics, created_at FROM calibration WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl:
+                conn.execute("DELETE FROM calibration WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE calibration SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return {"coefs": json.loads(row[0]), "metrics": json.loads(row[1])}
+        finally:
+            conn.close()
+
+    def put(self, key: str, coefs: Dict[str, Any], metrics: Dict[str, Any]) -> None:
+        now = time.time()
+        try:
+            conn = self._connect()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Warning: calibration store unavailable: {e}")
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO calibration (key, coefs, metrics, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(coefs), json.dumps(metrics), now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM calibration WHERE created_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM calibration WHERE key NOT IN "
+            "(SELECT key FROM calibration ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM calibration")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+calibration_store = CalibrationStore(
+    path=os.getenv("CALIBRATION_STORE_PATH", DEFAULT_PATH),
+    ttl=float(os.getenv("CALIBRATION_STORE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("CALIBRATION_STORE_MAX_ENTRIES", "500")),
+)
@@ -0,0 +1,230 @@
+# utils/ee_metrics.py
+#
+# Instrumentation of the blocking geo backend calls (getInfo, getMapId, computePixels).
+# Every call is timed and labelled with its call site (impact_report, calibrate_precision,
+# get_wind_speed, get_tile_url, ...), grouped per Flask request and exported as Prometheus
+# histograms/counters on /metrics and as a Server-Timing response header.
+#
+# Under gunicorn, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates every worker
+# (see gunicorn.conf.py).
+
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    # prometheus_client writes one file per worker here; it must exist before the first metric
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+EE_CALL_SECONDS = Histogram(
+    "greengrowth_ee_call_seconds",
+    "Latency of blocking Earth Engine calls",
+    ["kind", "site"],
+    buckets=CALL_BUCKETS,
+)
+EE_CALLS = Counter(
+    "greengrowth_ee_calls_total",
+    "Blocking Earth Engine calls",
+    ["kind", "site", "status"],
+)
+REQUEST_EE_CALLS = Histogram(
+    "greengrowth_request_ee_calls",
+    "Earth Engine calls per HTTP request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+REQUEST_EE_SECONDS = Histogram(
+    "greengrowth_request_ee_seconds",
+    "Time per HTTP request spent waiting on Earth Engine",
+    ["endpoint"],
+    buckets=CALL_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "greengrowth_request_seconds",
+    "HTTP request latency",
+    ["endpoint", "method", "status"],
+    buckets=CALL_BUCKETS,
+)
+
+# Innermost instrumented call site of the running code
+_site: contextvars.ContextVar[str] = contextvars.ContextVar("ee_call_site", default="other")
+# Calls of the current Flask request: list of {"kind", "site", "seconds", "error"}
+_request_calls: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "ee_request_calls", default=None
+)
+
+
+def call_site(name: str) -> Callable:
+    """Decorator labelling the Earth Engine calls made inside the function with `name`."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _site.set(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _site.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Runs `fn` in a copy of the current context, so calls made from a thread pool are still
+    grouped with the request that submitted them. Bind once per submitted task.
+    """
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, fn)
+
+
+def record_call(kind: str, seconds: float, error: Optional[BaseException] = None) -> None:
+    site = _site.get()
+    EE_CALL_SECONDS.labels(kind=kind, site=site).observe(seconds)
+    EE_CALLS.labels(kind=kind, site=site, status="error" if error else "ok").inc()
+    calls = _request_calls.get()
+    if calls is not None:
+        calls.append(
+            {"kind": kind, "site": site, "seconds": seconds, "error": type(error).__name__ if error else None}
+        )
+
+
+@contextmanager
+def observe(kind: str):
+    """Times one blocking call and records it, including failed ones."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        record_call(kind, time.perf_counter() - start, e)
+        raise
+    record_call(kind, time.perf_counter() - start)
+
+
+def request_calls() -> List[Dict[str, Any]]:
+    """Calls recorded so far for the current request."""
+    return list(_request_calls.get() or [])
+
+
+def server_timing(calls: List[Dict[str, Any]]) -> str:
+    """
+    Server-Timing header value: the total time waiting on Earth Engine plus one entry per call site,
+    e.g. `ee;dur=812.4;desc="4 calls", ee-impact_report;dur=640.0;desc="1 getInfo 3 getMapId"`.
+    """
+    total = sum(c["seconds"] for c in calls)
+    entries = [f'ee;dur={total * 1000:.1f};desc="{len(calls)} calls"']
+
+    sites: Dict[str, Dict[str, Any]] = {}
+    for call in calls:
+        site = sites.setdefault(call["site"], {"seconds": 0.0, "kinds": {}, "errors": 0})
+        site["seconds"] += call["seconds"]
+        site["kinds"][call["kind"]] = site["kinds"].get(call["kind"], 0) + 1
+        site["errors"] += 1 if call["error"] else 0
+
+    for name, site in sites.items():
+        desc = " ".join(f"{count} {kind}" for kind, count in site["kinds"].items())
+        if site["errors"]:
+            desc += f" {site['errors']} errors"
+        entries.append(f'ee-{name};dur={site["seconds"] * 1000:.1f};desc="{desc}"')
+    return ", ".join(entries)
+
+
+def metrics_registry():
+    """Registry aggregating every gunicorn worker in multiprocess mode, the default one otherwise."""
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def _endpoint() -> str:
+    from flask import request
+
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+def _observe_request(endpoint: str, method: str, status: int, calls: List[Dict[str, Any]], start: float) -> None:
+    REQUEST_EE_CALLS.labels(endpoint=endpoint).observe(len(calls))
+    REQUEST_EE_SECONDS.labels(endpoint=endpoint).observe(sum(c["seconds"] for c in calls))
+    REQUEST_SECONDS.labels(endpoint=endpoint, method=method, status=str(status)).observe(
+        time.perf_counter() - start
+    )
+
+
+def stream(iterable: Iterable, status: int = 200) -> Iterator:
+    """
+    Wraps a streamed response body (call it from the view). The body is generated after the
+    view returns, outside the request's context, so each chunk is produced in a copy of it:
+    its Earth Engine calls stay grouped with the request, and the per-request metrics are
+    recorded when the stream ends. Server-Timing cannot be sent after the headers.
+    """
+    from flask import g, request
+
+    g.ee_metrics_streamed = True
+    ctx = contextvars.copy_context()
+    endpoint, method, start = _endpoint(), request.method, g.get("ee_metrics_start", time.perf_counter())
+
+    def generate():
+        iterator = iter(iterable)
+        try:
+            while True:
+                try:
+                    chunk = ctx.run(next, iterator)
+                except StopIteration:
+                    return
+                yield chunk
+        finally:
+            _observe_request(endpoint, method, status, ctx.run(request_calls), start)
+
+    return generate()
+
+
+def init_app(app) -> None:
+    """Groups Earth Engine calls per request, adds the Server-Timing header and serves /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_ee_metrics():
+        g.ee_metrics_start = time.perf_counter()
+        _request_calls.set([])
+
+    @app.after_request
+    def _finish_ee_metrics(response):
+        calls = _request_calls.get()
+        if calls is None or request.path == "/metrics":
+            return response
+
+        if g.get("ee_metrics_streamed"):
+            # Recorded by stream() once the body has been generated
+            return response
+
+        _observe_request(_endpoint(), request.method, response.status_code, calls, g.ee_metrics_start)
+        response.headers["Server-Timing"] = server_timing(calls)
+        return response
+
+    @app.teardown_request
+    def _clear_ee_metrics(exc):
+        _request_calls.set(None)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,297 @@
+# utils/facility_data.py
+#
+# Columnar cache of the facility inputs: the GHGRP 2023 workbook (data/ghgp_data_2023.xlsx, whose
+# pd.read_excel takes seconds) and the two Earth Engine exports built from it
+# (data/ghg_data_with_lst.csv, data/export_facility_wind_data.csv).
+#
+# Each source is converted once into a directory of typed columns, one .npy per column:
+# numbers as float64/int64/bool and text as int32 category codes (-1 = missing) plus their
+# categories. The directory is named after the source's SHA-256 (FACILITY_DATA_DIR/<name>-<hash>),
+# so an edited source is converted again and a merely touched one is not. Columns are loaded
+# lazily, only the ones asked for, and memory-mapped: opening a table costs a stat and a small
+# JSON read, and every process shares the pages.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+DEFAULT_ROOT = os.path.join(BASE_DIR, "instance", "facility_data")
+
+# Bump when the conversion changes: every cached table is rebuilt
+CACHE_VERSION = 1
+
+
+def source_fingerprint(path: str, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Size, mtime and SHA-256 of a source; the hash is reused while size and mtime are unchanged."""
+    stat = os.stat(path)
+    fingerprint = {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and all(previous.get(k) == fingerprint[k] for k in ("path", "size", "mtime_ns")):
+        fingerprint["sha256"] = previous["sha256"]
+        return fingerprint
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+
+def _read_ghgp(path: str):
+    import pandas as pd
+
+    frame = pd.read_excel(path, sheet_name=0, header=3)
+    frame.columns = frame.columns.astype(str).str.strip()
+    return frame
+
+
+def _read_csv(path: str):
+    import pandas as pd
+
+    return pd.read_csv(path)
+
+
+# name -> (source file, reader returning a DataFrame)
+SOURCES: Dict[str, Any] = {
+    "ghgp": (os.path.join(DATA_DIR, "ghgp_data_2023.xlsx"), _read_ghgp),
+    "lst": (os.path.join(DATA_DIR, "ghg_data_with_lst.csv"), _read_csv),
+    "wind": (os.path.join(DATA_DIR, "export_facility_wind_data.csv"), _read_csv),
+}
+
+
+class FacilityTable:
+    """
+    Read-only columnar view of one converted source. Columns are memory-mapped on first access.
+    """
+
+    def __init__(self, name: str, directory: str, meta: Dict[str, Any]):
+        self.name = name
+        self.directory = directory
+        self.meta = meta
+        self._specs = {column["name"]: column for column in meta["columns"]}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self) -> List[str]:
+        return [column["name"] for column in self.meta["columns"]]
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta["rows"])
+
+    @property
+    def source(self) -> Dict[str, Any]:
+        return self.meta["source"]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._specs
+
+    def _spec(self, column: str) -> Dict[str, Any]:
+        spec = self._specs.get(column)
+        if spec is None:
+            raise KeyError(f"{self.name} has no column '{column}'")
+        return spec
+
+    def _array(self, column: str) -> np.ndarray:
+        array = self._arrays.get(column)
+        if array is None:
+            spec = self._spec(column)
+            array = np.load(os.path.join(self.directory, spec["file"]), mmap_mode="r")
+            with self._lock:
+                self._arrays[column] = array
+        return array
+
+    def is_categorical(self, column: str) -> bool:
+        return self._spec(column)["kind"] == "category"
+
+    def categories(self, column: str) -> List[str]:
+        """Distinct values of a text column; its codes index this list."""
+        return self._spec(column)["categories"]
+
+    def codes(self, column: str) -> np.ndarray:
+        """int32 category codes of a text column (-1 = missing)."""
+        if not self.is_categorical(column):
+            raise TypeError(f"{self.name}.{column} is not a text column")
+        return self._array(column)
+
+    def column(self, column: str) -> np.ndarray:
+        """
+        Values of a column: the memory-mapped array of a numeric column, or the decoded values
+        (object array, None = missing) of a text column.
+        """
+        array = self._array(column)
+        if not self.is_categorical(column):
+            return array
+        categories = np.asarray(self.categories(column) + [None], dtype=object)
+        return categories[array]
+
+    def load(self, columns: Optional[Iterable[str]] = None, decode: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Projection of `columns` (all by default). Text columns come as codes unless `decode`.
+        """
+        names = list(columns) if columns is not None else self.columns
+        return {
+            name: self.column(name) if decode or not self.is_categorical(name) else self.codes(name)
+            for name in names
+        }
+
+    def to_frame(self, columns: Optional[Iterable[str]] = None):
+        """pandas DataFrame of `columns`, text columns as Categoricals (no string parsing)."""
+        import pandas as pd
+
+        names = list(columns) if columns is not None else self.columns
+        data = {}
+        for name in names:
+            if self.is_categorical(name):
+                data[name] = pd.Categorical.from_codes(np.asarray(self.codes(name)), self.categories(name))
+            else:
+                data[name] = np.asarray(self._array(name))
+        return pd.DataFrame(data, columns=names)
+
+
+def _convert(name: str, source_path: str, reader: Callable[[str], Any], directory: str, fingerprint: Dict) -> None:
+    """Writes the columns of one source into `directory` (built aside, renamed into place)."""
+    import pandas as pd
+
+    start = time.perf_counter()
+    frame = reader(source_path)
+    tmp = f"{directory}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp)
+    try:
+        columns = []
+        for i, column in enumerate(frame.columns):
+            series = frame[column]
+            spec: Dict[str, Any] = {"name": str(column), "file": f"c{i:03d}.npy"}
+            kind = series.dtype.kind
+            if kind == "b":
+                values = series.to_numpy(dtype=bool)
+                spec["kind"] = "bool"
+            elif kind in "iu":
+                values = series.to_numpy(dtype=np.int64)
+                spec["kind"] = "int"
+            elif kind == "f":
+                values = series.to_numpy(dtype=np.float64)
+                spec["kind"] = "float"
+            else:
+                # Text (and anything else) as category codes over its string values
+                text = series.where(series.isna(), series.astype(str))
+                codes, categories = pd.factorize(text, sort=True)
+                values = codes.astype(np.int32)
+                spec["kind"] = "category"
+                spec["categories"] = [str(c) for c in categories]
+            np.save(os.path.join(tmp, spec["file"]), np.ascontiguousarray(values))
+            columns.append(spec)
+
+        meta = {
+            "version": CACHE_VERSION,
+            "name": name,
+            "rows": int(len(frame)),
+            "columns": columns,
+            "source": fingerprint,
+            "converted_at": time.time(),
+            "convert_seconds": round(time.perf_counter() - start, 3),
+        }
+        # meta.json last: a directory without it is incomplete
+        with open(os.path.join(tmp, "meta.json"), "w") as fh:
+            json.dump(meta, fh)
+        try:
+            os.rename(tmp, directory)
+        except OSError:
+            # Another process converted the same source first: keep its copy
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    print(f"🗄️ Facility data '{name}' converted in {time.perf_counter() - start:.2f}s ({len(frame)} rows)")
+
+
+class FacilityData:
+    """
+    Process-wide access to the converted sources. A source is checked (stat, and a hash only if
+    its size or mtime changed) the first time it is used and after refresh().
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, sources: Optional[Dict[str, Any]] = None):
+        self.root = root
+        self.sources = dict(SOURCES if sources is None else sources)
+        self._tables: Dict[str, FacilityTable] = {}
+        self._lock = threading.Lock()
+
+    def _pointer_path(self, name: str) -> str:
+        # Last fingerprint seen per source, so an unchanged source is not hashed again
+        return os.path.join(self.root, f"{name}.source.json")
+
+    def _open(self, name: str, force: bool = False) -> FacilityTable:
+        if name not in self.sources:
+            raise KeyError(f"Unknown facility source '{name}'")
+        source_path, reader = self.sources[name]
+
+        previous = None
+        try:
+            with open(self._pointer_path(name)) as fh:
+                previous = json.load(fh)
+        except (OSError, ValueError):
+            pass
+        fingerprint = source_fingerprint(source_path, previous)
+        directory = os.path.join(self.root, f"{name}-v{CACHE_VERSION}-{fingerprint['sha256'][:16]}")
+
+        if force:
+            shutil.rmtree(directory, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, "meta.json")):
+            os.makedirs(self.root, exist_ok=True)
+            shutil.rmtree(directory, ignore_errors=True)
+            _convert(name, source_path, reader, directory, fingerprint)
+            self._prune(name, keep=directory)
+
+        if fingerprint != previous:
+            tmp = f"{self._pointer_path(name)}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(fingerprint, fh)
+            os.replace(tmp, self._pointer_path(name))
+
+        with open(os.path.join(directory, "meta.json")) as fh:
+            meta = json.load(fh)
+        meta["source"] = fingerprint
+        return FacilityTable(name, directory, meta)
+
+    def _prune(self, name: str, keep: str) -> None:
+        """Drops the conversions of older versions of a source (open memory maps stay valid)."""
+        for entry in os.listdir(self.root):
+            path = os.path.join(self.root, entry)
+            if entry.startswith(f"{name}-") and path != keep and os.path.isdir(path) and ".tmp-" not in entry:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def table(self, name: str) -> FacilityTable:
+        """Converted table of a source, converting it on first use if needed."""
+        table = self._tables.get(name)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                table = self._open(name)
+                self._tables[name] = table
+            return table
+
+    def refresh(self, names: Optional[Sequence[str]] = None, force: bool = False) -> Dict[str, FacilityTable]:
+        """Checks the sources again (converting the changed ones, or all with `force`)."""
+        with self._lock:
+            for name in names or list(self.sources):
+                self._tables[name] = self._open(name, force=force)
+            return {name: self._tables[name] for name in names or list(self.sources)}
+
+
+# Process-wide instance
+facility_data = FacilityData(root=os.getenv("FACILITY_DATA_DIR", DEFAULT_ROOT))
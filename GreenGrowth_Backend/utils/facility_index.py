@@ -0,0 +1,310 @@
+# utils/facility_index.py
+#
+# In-memory spatial index over the GHGRP facilities of the Earth Engine exports
+# (data/ghg_data_with_lst.csv joined with data/export_facility_wind_data.csv), read from their
+# columnar cache (utils/facility_data.py).
+#
+# Facilities are projected onto the unit sphere (3D Cartesian coordinates) and indexed with a
+# scipy cKDTree. The straight-line (chord) distance between two such points grows with their
+# great-circle distance, so radius and k-nearest queries are exact on the sphere at any scale,
+# with no per-zone projection. Polygon queries take the facilities in a ball around the polygon's
+# bounding box and test them with a vectorized even-odd rule in lon/lat (like GeoJSON rings).
+#
+# Everything returned per facility is precomputed as columns when the index is built: emissions
+# and CO2e, the 5-year mean LST and wind speed per radius, and, per distinct subpart string,
+# the decoded industries and heat flags.
+
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .model_registry import GWP_CH4, GWP_N2O
+
+# Mean Earth radius (IUGG), meters
+EARTH_RADIUS_M = 6371008.8
+
+# Per-facility numeric fields of a record: output name -> column
+EMISSION_COLUMNS = {
+    "total_reported_direct": "Total reported direct emissions",
+    "co2": "CO2 emissions (non-biogenic)",
+    "ch4": "Methane (CH4) emissions",
+    "n2o": "Nitrous Oxide (N2O) emissions",
+}
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    """(n, 3) points on the unit sphere for latitudes/longitudes in degrees."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _chord(distance_m: float) -> float:
+    """Chord length on the unit sphere of a great-circle distance."""
+    return 2.0 * math.sin(min(max(distance_m, 0.0) / EARTH_RADIUS_M, math.pi) / 2.0)
+
+
+def _arc_m(chord) -> np.ndarray:
+    """Great-circle distance (m) of chord lengths on the unit sphere."""
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0))
+
+
+def parse_polygons(geometry: Dict[str, Any]) -> List[List[np.ndarray]]:
+    """Rings ((m, 2) lon/lat arrays) of each polygon of a GeoJSON Polygon/MultiPolygon/Feature."""
+    if geometry.get("type") == "Feature":
+        geometry = geometry.get("geometry") or {}
+    kind, coordinates = geometry.get("type"), geometry.get("coordinates")
+    if kind == "Polygon":
+        polygons = [coordinates]
+    elif kind == "MultiPolygon":
+        polygons = coordinates
+    else:
+        raise ValueError("geometry must be a GeoJSON Polygon or MultiPolygon")
+
+    result = []
+    for polygon in polygons or []:
+        rings = []
+        for ring in polygon or []:
+            ring = np.asarray(ring, dtype=np.float64)
+            if ring.ndim != 2 or ring.shape[0] < 3 or ring.shape[1] < 2:
+                raise ValueError("Every polygon ring needs at least 3 [lon, lat] positions")
+            rings.append(ring[:, :2])
+        if rings:
+            result.append(rings)
+    if not result:
+        raise ValueError("geometry has no polygon")
+    return result
+
+
+def _inside(rings: Sequence[np.ndarray], lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Even-odd rule over every ring of a polygon (holes included) for many points."""
+    inside = np.zeros(lon.shape[0], dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        # (points, edges): the edge straddles the point's latitude and crosses east of it
+        straddles = (y1 > lat[:, None]) != (y2 > lat[:, None])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing_lon = x1 + (lat[:, None] - y1) * (x2 - x1) / (y2 - y1)
+        crossings = straddles & (lon[:, None] < crossing_lon)
+        inside ^= (np.count_nonzero(crossings, axis=1) % 2).astype(bool)
+    return inside
+
+
+class FacilityIndex:
+    """
+    KD-tree over facilities plus the columns their records are built from.
+
+    `columns` holds "id", "latitude", "longitude" and optionally "subparts"/"sector" (int32 codes
+    into `categories`, -1 = missing), the EMISSION_COLUMNS keys, "co2e", "lst" and "wind_speeds"
+    ((n, len(radii)) arrays). Facilities without coordinates are dropped.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        categories: Optional[Dict[str, List[str]]] = None,
+        radii_km: Sequence[int] = (1, 5, 10),
+    ):
+        start = time.perf_counter()
+        from scipy.spatial import cKDTree
+
+        from .industry import get_heat_flags, industry_subpart_decoder
+
+        lat = np.asarray(columns["latitude"], dtype=np.float64)
+        lon = np.asarray(columns["longitude"], dtype=np.float64)
+        located = np.isfinite(lat) & np.isfinite(lon)
+        self.columns = {name: np.asarray(values)[located] for name, values in columns.items()}
+        self.categories = categories or {}
+        self.radii_km = tuple(radii_km)
+        self.lat = self.columns["latitude"].astype(np.float64)
+        self.lon = self.columns["longitude"].astype(np.float64)
+        self.tree = cKDTree(_unit_vectors(self.lat, self.lon))
+
+        # Decoded once per distinct subpart string (the last entry stands for a missing one)
+        self._industries: List[List[str]] = []
+        self._heat_flags: List[Dict[str, bool]] = []
+        for subparts in list(self.categories.get("subparts", [])) + [""]:
+            codes = [code.strip() for code in subparts.split(",") if code.strip()]
+            industries = [industry_subpart_decoder[c] for c in codes if c in industry_subpart_decoder]
+            self._industries.append(list(dict.fromkeys(industries)))
+            self._heat_flags.append(get_heat_flags(",".join(codes)))
+        self.build_seconds = time.perf_counter() - start
+
+    def __len__(self) -> int:
+        return int(self.lat.shape[0])
+
+    def info(self) -> Dict[str, Any]:
+        return {"facilities": len(self), "build_ms": round(self.build_seconds * 1000, 2), "radii_km": list(self.radii_km)}
+
+    # ------------------------------------------------------------ queries
+
+    def within_radius(self, lat: float, lon: float, radius_m: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and distances (m) of the facilities within `radius_m`, nearest first."""
+        point = _unit_vectors(lat, lon)
+        found = np.asarray(self.tree.query_ball_point(point, _chord(radius_m), return_sorted=False), dtype=np.int64)
+        distances = _arc_m(np.linalg.norm(self.tree.data[found] - point, axis=1))
+        order = np.argsort(distances, kind="stable")
+        return found[order], distances[order]
+
+    def nearest(
+        self, lat: float, lon: float, k: int, max_distance_m: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and distances (m) of the `k` nearest facilities (within `max_distance_m`)."""
+        k = min(int(k), len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        bound = _chord(max_distance_m) if max_distance_m is not None else np.inf
+        chords, found = self.tree.query(_unit_vectors(lat, lon), k=k, distance_upper_bound=bound)
+        chords, found = np.atleast_1d(chords), np.atleast_1d(found)
+        kept = np.isfinite(chords)
+        return found[kept].astype(np.int64), _arc_m(chords[kept])
+
+    def in_polygon(self, geometry: Dict[str, Any]) -> np.ndarray:
+        """Indices of the facilities inside a GeoJSON (Multi)Polygon, in index order."""
+        polygons = parse_polygons(geometry)
+        outer = np.concatenate([rings[0] for rings in polygons])
+        west, south = outer.min(axis=0)
+        east, north = outer.max(axis=0)
+
+        if east - west >= 180.0:
+            candidates = np.arange(len(self))
+        else:
+            # Ball around the bounding box, through points sampled along its edges (padded)
+            center_lat, center_lon = (south + north) / 2.0, (west + east) / 2.0
+            steps = np.linspace(0.0, 1.0, 17)
+            along_lat, along_lon = south + steps * (north - south), west + steps * (east - west)
+            edge_lat = np.concatenate([np.full(17, south), np.full(17, north), along_lat, along_lat])
+            edge_lon = np.concatenate([along_lon, along_lon, np.full(17, west), np.full(17, east)])
+            center = _unit_vectors(center_lat, center_lon)
+            reach = np.linalg.norm(_unit_vectors(edge_lat, edge_lon) - center, axis=1).max() * 1.01 + 1e-9
+            candidates = np.sort(np.asarray(self.tree.query_ball_point(center, reach), dtype=np.int64))
+
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        in_box = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        candidates, lat, lon = candidates[in_box], lat[in_box], lon[in_box]
+
+        inside = np.zeros(candidates.shape[0], dtype=bool)
+        for rings in polygons:
+            inside |= _inside(rings, lon, lat)
+        return candidates[inside]
+
+    # ------------------------------------------------------------ records
+
+    def records(self, indices: Sequence[int], distances: Optional[Sequence[float]] = None) -> List[Dict[str, Any]]:
+        """JSON-ready facilities: location, emissions, industries, heat flags, LST and wind speeds."""
+
+        def number(value) -> Optional[float]:
+            value = float(value)
+            return value if math.isfinite(value) else None
+
+        def category(name: str, i: int) -> Optional[str]:
+            code = int(self.columns[name][i])
+            return self.categories[name][code] if code >= 0 else None
+
+        result = []
+        for n, i in enumerate(np.asarray(indices, dtype=np.int64)):
+            record: Dict[str, Any] = {
+                "id": int(self.columns["id"][i]),
+                "latitude": float(self.lat[i]),
+                "longitude": float(self.lon[i]),
+            }
+            if distances is not None:
+                record["distance_m"] = round(float(distances[n]), 1)
+            if "sector" in self.columns:
+                record["sector"] = category("sector", i)
+            if "subparts" in self.columns:
+                code = int(self.columns["subparts"][i])
+                record["subparts"] = category("subparts", i)
+                record["industries"] = self._industries[code]
+                record["heat_flags"] = self._heat_flags[code]
+            emissions = {name: number(self.columns[name][i]) for name in (*EMISSION_COLUMNS, "co2e") if name in self.columns}
+            if emissions:
+                record["emissions"] = emissions
+            for name in ("lst", "wind_speeds"):
+                if name in self.columns:
+                    record[name] = [number(v) for v in self.columns[name][i]]
+            result.append(record)
+        return result
+
+    # ------------------------------------------------------------ build
+
+    @classmethod
+    def from_facility_data(cls, data=None) -> "FacilityIndex":
+        """Index of the LST export joined with the wind export (utils/facility_data.py)."""
+        from .facility_data import facility_data
+        from .industry import KEY_COLUMN, RADII_KM, YEARS
+
+        data = data or facility_data
+        lst, wind = data.table("lst"), data.table("wind")
+        lst_keys = np.asarray(lst.column(KEY_COLUMN), dtype=np.int64)
+        wind_keys = np.asarray(wind.column(KEY_COLUMN), dtype=np.int64)
+        # Every LST facility is kept; the wind export only adds its speeds
+        wind_rows = np.full(lst_keys.shape[0], -1, dtype=np.int64)
+        _, li, wi = np.intersect1d(lst_keys, wind_keys, return_indices=True)
+        wind_rows[li] = wi
+
+        def numbers(table, column):
+            return np.asarray(table.column(column), dtype=np.float64)
+
+        columns: Dict[str, np.ndarray] = {
+            "id": lst_keys,
+            "latitude": numbers(lst, "Latitude"),
+            "longitude": numbers(lst, "Longitude"),
+            "subparts": np.asarray(lst.codes("Industry Type (subparts)")),
+            "sector": np.asarray(lst.codes("Industry Type (sectors)")),
+        }
+        categories = {
+            "subparts": lst.categories("Industry Type (subparts)"),
+            "sector": lst.categories("Industry Type (sectors)"),
+        }
+        for name, column in EMISSION_COLUMNS.items():
+            columns[name] = numbers(lst, column)
+        columns["co2e"] = columns["co2"] + columns["ch4"] * GWP_CH4 + columns["n2o"] * GWP_N2O
+
+        def mean_over_years(table, pattern, rows):
+            values = np.stack(
+                [np.stack([numbers(table, pattern.format(y=y, r=r))[rows] for y in YEARS], axis=1) for r in RADII_KM],
+                axis=2,
+            )
+            # Mean of the available years (NaN when none is)
+            count = np.isfinite(values).sum(axis=1)
+            with np.errstate(invalid="ignore"):
+                return np.nansum(values, axis=1) / np.where(count > 0, count, np.nan)
+
+        columns["lst"] = mean_over_years(lst, "LST_{y}_{r}km", slice(None))
+
+        has_wind = wind_rows >= 0
+        u = mean_over_years(wind, "u_component_of_wind_10m_{y}_{r}km", wind_rows[has_wind])
+        v = mean_over_years(wind, "v_component_of_wind_10m_{y}_{r}km", wind_rows[has_wind])
+        speeds = np.full((lst_keys.shape[0], len(RADII_KM)), np.nan)
+        speeds[has_wind] = np.sqrt(u**2 + v**2)
+        columns["wind_speeds"] = speeds
+
+        return cls(columns, categories, RADII_KM)
+
+
+_index: Optional[FacilityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_facility_index() -> FacilityIndex:
+    """Process-wide index, built on first use (or at gunicorn boot, see gunicorn.conf.py)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FacilityIndex.from_facility_data()
+            print(f"🏭 Facility index built in {_index.build_seconds * 1000:.1f} ms ({len(_index)} facilities)")
+        return _index
+
+
+def preload_facility_index() -> None:
+    """Builds the index now (gunicorn boot); a failure is only reported and retried on first use."""
+    try:
+        get_facility_index()
+    except Exception as e:
+        print(f"Warning: facility index not built: {e}")
@@ -0,0 +1,1481 @@
+# utils/fake_ee.py
+#
+# Deterministic, offline stand-in for the subset of the Earth Engine client API used by the
+# geo path (GeoAnalytics, wind, geo_router). Images are smooth synthetic fields evaluated
+# lazily on small NumPy grids, so simulations, reductions, sampling and map IDs can be
+# exercised and benchmarked without credentials or network access.
+
+import datetime
+import hashlib
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, List as TList, Optional, Sequence, Tuple
+
+import numpy as np
+
+METERS_PER_DEGREE = 111320.0
+# Largest grid side used to evaluate one reduction (keeps every call in the millisecond range)
+MAX_GRID_SIDE = 64
+# Upper bound of the number of points returned by Image.sample
+MAX_SAMPLES = 1000
+
+# Per-thread memo of the images already evaluated on the grid of the current top-level call
+_evaluation = threading.local()
+
+
+class EEException(Exception):
+    """Mirrors ee.EEException."""
+
+
+# Graph nodes created since import (a measure of client-side graph construction cost)
+_nodes_built = 0
+
+
+def nodes_built() -> int:
+    return _nodes_built
+
+
+def _node(op: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Graph node used to serialize fake objects (for graph-size accounting)."""
+    global _nodes_built
+    _nodes_built += 1
+    return {"op": op, "args": list(args), "kwargs": kwargs}
+
+
+def _serialize(root: Dict[str, Any]) -> str:
+    """Serializes a node DAG, sharing repeated sub-graphs by reference like the EE client does."""
+    ids: Dict[int, str] = {}
+    values: Dict[str, Any] = {}
+
+    def encode(value: Any) -> Any:
+        if isinstance(value, _ComputedObject):
+            value = value._node
+        if isinstance(value, dict) and "op" in value and "args" in value:
+            key = id(value)
+            if key not in ids:
+                ids[key] = str(len(ids))
+                values[ids[key]] = {
+                    "op": value["op"],
+                    "args": [encode(a) for a in value["args"]],
+                    "kwargs": {k: encode(v) for k, v in value["kwargs"].items()},
+                }
+            return {"ref": ids[key]}
+        if isinstance(value, (list, tuple)):
+            return [encode(v) for v in value]
+        if isinstance(value, dict):
+            return {str(k): encode(v) for k, v in value.items()}
+        if callable(value):
+            return getattr(value, "__name__", "fn")
+        if isinstance(value, float) and not math.isfinite(value):
+            return str(value)
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        return str(value)
+
+    result = encode(root)
+    return json.dumps({"result": result, "values": values}, sort_keys=True)
+
+
+def _to_py(value: Any) -> Any:
+    """Converts fake objects (and containers of them) into plain Python values."""
+    if isinstance(value, _ComputedObject):
+        return value.getInfo()
+    if isinstance(value, dict):
+        return {k: _to_py(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_py(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _num(value: Any) -> float:
+    if isinstance(value, Number):
+        return value._value
+    if isinstance(value, _ComputedObject):
+        return float(value.getInfo())
+    return float(value)
+
+
+class _ComputedObject:
+    _node: Dict[str, Any]
+
+    def serialize(self) -> str:
+        return _serialize(self._node)
+
+    def getInfo(self) -> Any:
+        raise NotImplementedError
+
+
+# --------------------------------------------------------------------------------------
+# Scalars and containers
+# --------------------------------------------------------------------------------------
+
+
+class Number(_ComputedObject):
+    def __init__(self, value: Any = 0):
+        if isinstance(value, Number):
+            self._value, self._node = value._value, value._node
+            return
+        self._value = float(_num(value)) if value is not None else math.nan
+        self._node = _node("Number", self._value)
+
+    def _binary(self, other: Any, op: Callable[[float, float], float], name: str) -> "Number":
+        with np.errstate(all="ignore"):
+            result = Number(float(op(np.float64(self._value), np.float64(_num(other)))))
+        result._node = _node(name, self, other)
+        return result
+
+    def add(self, other):
+        return self._binary(other, lambda a, b: a + b, "Number.add")
+
+    def subtract(self, other):
+        return self._binary(other, lambda a, b: a - b, "Number.subtract")
+
+    def multiply(self, other):
+        return self._binary(other, lambda a, b: a * b, "Number.multiply")
+
+    def divide(self, other):
+        return self._binary(other, lambda a, b: a / b, "Number.divide")
+
+    def pow(self, other):
+        return self._binary(other, lambda a, b: a ** b, "Number.pow")
+
+    def min(self, other):
+        return self._binary(other, min, "Number.min")
+
+    def max(self, other):
+        return self._binary(other, max, "Number.max")
+
+    def eq(self, other):
+        return self._binary(other, lambda a, b: float(a == b), "Number.eq")
+
+    def lt(self, other):
+        return self._binary(other, lambda a, b: float(a < b), "Number.lt")
+
+    def gt(self, other):
+        return self._binary(other, lambda a, b: float(a > b), "Number.gt")
+
+    def sqrt(self):
+        return self._binary(0, lambda a, _: np.sqrt(a), "Number.sqrt")
+
+    def abs(self):
+        return self._binary(0, lambda a, _: abs(a), "Number.abs")
+
+    def clamp(self, low, high):
+        result = Number(min(max(self._value, _num(low)), _num(high)))
+        result._node = _node("Number.clamp", self, low, high)
+        return result
+
+    def round(self):
+        return self._binary(0, lambda a, _: np.round(a), "Number.round")
+
+    def int(self):
+        return self._binary(0, lambda a, _: float(int(a)), "Number.int")
+
+    def format(self, pattern: str = "%s"):
+        return String(pattern % self._value)
+
+    def __bool__(self):
+        return bool(self._value) and not math.isnan(self._value)
+
+    def getInfo(self):
+        value = self._value
+        if math.isnan(value):
+            return None
+        return int(value) if float(value).is_integer() and abs(value) < 2 ** 53 else value
+
+
+class String(_ComputedObject):
+    def __init__(self, value: Any):
+        self._value = str(value._value if isinstance(value, String) else value)
+        self._node = _node("String", self._value)
+
+    def getInfo(self):
+        return self._value
+
+
+class List(_ComputedObject):
+    def __init__(self, values: Any = None):
+        if isinstance(values, List):
+            self._values, self._node = list(values._values), values._node
+            return
+        self._values = list(values or [])
+        self._node = _node("List", self._values)
+
+    def length(self):
+        return Number(len(self._values))
+
+    def size(self):
+        return self.length()
+
+    def get(self, index):
+        return self._values[int(_num(index))]
+
+    def slice(self, start, end=None):
+        end = len(self._values) if end is None else int(_num(end))
+        return List(self._values[int(_num(start)) : end])
+
+    def map(self, fn):
+        return List([fn(v) for v in self._values])
+
+    def zip(self, other):
+        return List([[a, b] for a, b in zip(self._values, List(other)._values)])
+
+    def reduce(self, reducer: "Reducer"):
+        values = np.array([_num(v) for v in self._values], dtype=float)
+        return Number(reducer._reduce_1d(values)[reducer._outputs()[0]])
+
+    def add(self, value):
+        return List(self._values + [value])
+
+    def getInfo(self):
+        return _to_py(self._values)
+
+
+class Dictionary(_ComputedObject):
+    def __init__(self, values: Any = None):
+        if isinstance(values, Dictionary):
+            self._values, self._node = dict(values._values), values._node
+            return
+        self._values = dict(values or {})
+        self._node = _node("Dictionary", self._values)
+
+    def get(self, key, default: Any = None):
+        key = _to_py(key)
+        if key not in self._values:
+            if default is not None:
+                return default
+            raise EEException(f"Dictionary does not contain key: {key}")
+        value = self._values[key]
+        return Number(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+    def keys(self):
+        return List(list(self._values))
+
+    def contains(self, key):
+        return Number(float(_to_py(key) in self._values))
+
+    def combine(self, other, overwrite: bool = True):
+        merged = dict(self._values)
+        for k, v in Dictionary(other)._values.items():
+            if overwrite or k not in merged:
+                merged[k] = v
+        return Dictionary(merged)
+
+    def set(self, key, value):
+        merged = dict(self._values)
+        merged[_to_py(key)] = value
+        return Dictionary(merged)
+
+    def getInfo(self):
+        return _to_py(self._values)
+
+
+class Array(_ComputedObject):
+    def __init__(self, values: Any):
+        if isinstance(values, Array):
+            self._values, self._node = values._values, values._node
+            return
+        self._values = np.asarray(_to_py(values) if isinstance(values, _ComputedObject) else values, dtype=float)
+        self._node = _node("Array", self._values.tolist())
+
+    def get(self, position):
+        return Number(self._values[tuple(int(_num(p)) for p in position)])
+
+    def getInfo(self):
+        return _to_py(self._values.tolist())
+
+
+class Date(_ComputedObject):
+    def __init__(self, value: Any):
+        if isinstance(value, Date):
+            self._value = value._value
+        elif isinstance(value, datetime.datetime):
+            self._value = value
+        elif isinstance(value, datetime.date):
+            self._value = datetime.datetime(value.year, value.month, value.day)
+        elif isinstance(value, (int, float)):
+            self._value = datetime.datetime.utcfromtimestamp(value / 1000.0)
+        else:
+            self._value = datetime.datetime.fromisoformat(str(value)[:19])
+        self._node = _node("Date", self._value.isoformat())
+
+    def advance(self, delta, unit: str):
+        delta = _num(delta)
+        value = self._value
+        if unit in ("year", "month"):
+            months = int(delta * (12 if unit == "year" else 1))
+            month_index = value.month - 1 + months
+            year, month = value.year + month_index // 12, month_index % 12 + 1
+            day = min(value.day, [31, 29 if year % 4 == 0 else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month - 1])
+            advanced = value.replace(year=year, month=month, day=day)
+        else:
+            seconds = {"week": 604800, "day": 86400, "hour": 3600, "minute": 60, "second": 1}[unit]
+            advanced = value + datetime.timedelta(seconds=delta * seconds)
+        result = Date(advanced)
+        result._node = _node("Date.advance", self, delta, unit)
+        return result
+
+    def get(self, unit: str):
+        return Number(getattr(self._value, unit))
+
+    def millis(self):
+        epoch = datetime.datetime(1970, 1, 1)
+        return Number((self._value - epoch).total_seconds() * 1000.0)
+
+    def format(self, pattern: Optional[str] = None):
+        return String(self._value.isoformat())
+
+    def getInfo(self):
+        return {"type": "Date", "value": self.millis()._value}
+
+
+# --------------------------------------------------------------------------------------
+# Geometry
+# --------------------------------------------------------------------------------------
+
+
+def _local_meters(lons, lats, lon0, lat0):
+    """Equirectangular projection (meters) around (lon0, lat0)."""
+    cos_lat = math.cos(math.radians(lat0))
+    return (
+        (np.asarray(lons) - lon0) * METERS_PER_DEGREE * cos_lat,
+        (np.asarray(lats) - lat0) * METERS_PER_DEGREE,
+    )
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return np.hypot(px - ax, py - ay)
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / length2, 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def points_in_rings(lons, lats, rings: Sequence[Sequence[Sequence[float]]]) -> np.ndarray:
+    """Even-odd point-in-polygon test of many points against a polygon's rings."""
+    lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+    inside = np.zeros(lons.shape, dtype=bool)
+    for ring in rings:
+        ring = np.asarray(ring, dtype=float)
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > lats) != (by > lats)
+            x_cross = (bx - ax) * (lats - ay) / (by - ay) + ax
+            inside ^= crosses & (lons < x_cross)
+    return inside
+
+
+class Geometry(_ComputedObject):
+    """Point, Polygon and MultiPolygon geometries, optionally buffered."""
+
+    def __init__(self, geo_json: Any = None, _parts: Optional[dict] = None):
+        if isinstance(geo_json, Geometry):
+            self.__dict__.update(geo_json.__dict__)
+            return
+        if _parts is not None:
+            self._type = _parts["type"]
+            self._coords = _parts["coords"]
+            self._buffer = _parts.get("buffer", 0.0)
+        else:
+            if not isinstance(geo_json, dict) or "type" not in geo_json:
+                raise EEException("Invalid GeoJSON geometry")
+            if geo_json["type"] == "Feature":
+                geo_json = geo_json["geometry"]
+            self._type = geo_json["type"]
+            if self._type not in ("Point", "Polygon", "MultiPolygon"):
+                raise EEException(f"Unsupported geometry type: {self._type}")
+            self._coords = geo_json["coordinates"]
+            self._buffer = 0.0
+        self._node = _node("Geometry", self._type, self._coords, self._buffer)
+
+    @staticmethod
+    def Point(coords, lat: Any = None, *args, **kwargs) -> "Geometry":
+        if lat is not None and not isinstance(coords, (list, tuple)):
+            coords = [coords, lat]
+        return Geometry(_parts={"type": "Point", "coords": [_num(coords[0]), _num(coords[1])]})
+
+    @staticmethod
+    def Polygon(coords, *args, **kwargs) -> "Geometry":
+        return Geometry({"type": "Polygon", "coordinates": _to_py(coords)})
+
+    @staticmethod
+    def MultiPolygon(coords, *args, **kwargs) -> "Geometry":
+        return Geometry({"type": "MultiPolygon", "coordinates": _to_py(coords)})
+
+    def buffer(self, distance, *args, **kwargs) -> "Geometry":
+        return Geometry(
+            _parts={
+                "type": self._type,
+                "coords": self._coords,
+                "buffer": self._buffer + _num(distance),
+            }
+        )
+
+    def _polygons(self) -> TList[Sequence]:
+        if self._type == "Polygon":
+            return [self._coords]
+        if self._type == "MultiPolygon":
+            return list(self._coords)
+        return []
+
+    def _vertices(self) -> np.ndarray:
+        if self._type == "Point":
+            return np.asarray([self._coords], dtype=float)
+        return np.concatenate(
+            [np.asarray(ring, dtype=float) for poly in self._polygons() for ring in poly]
+        )
+
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(west, south, east, north) including the buffer."""
+        vertices = self._vertices()
+        west, south = vertices.min(axis=0)
+        east, north = vertices.max(axis=0)
+        lat_mid = (south + north) / 2.0
+        dlat = self._buffer / METERS_PER_DEGREE
+        dlon = self._buffer / (METERS_PER_DEGREE * max(math.cos(math.radians(lat_mid)), 1e-6))
+        return west - dlon, south - dlat, east + dlon, north + dlat
+
+    def centroid(self, *args, **kwargs) -> "Geometry":
+        west, south, east, north = self.bbox()
+        return Geometry.Point([(west + east) / 2.0, (south + north) / 2.0])
+
+    def contains_points(self, lons, lats) -> np.ndarray:
+        lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        inside = np.zeros(lons.shape, dtype=bool)
+        for poly in self._polygons():
+            inside |= points_in_rings(lons, lats, poly)
+        if self._buffer > 0:
+            inside |= self._distance(lons, lats) <= self._buffer
+        return inside
+
+    def _distance(self, lons, lats) -> np.ndarray:
+        """Distance (m) from each point to the unbuffered geometry outline."""
+        vertices = self._vertices()
+        lon0, lat0 = vertices.mean(axis=0)
+        px, py = _local_meters(lons, lats, lon0, lat0)
+        if self._type == "Point":
+            vx, vy = _local_meters(vertices[0, 0], vertices[0, 1], lon0, lat0)
+            return np.hypot(px - vx, py - vy)
+        best = np.full(np.shape(px), np.inf)
+        for poly in self._polygons():
+            for ring in poly:
+                ring = np.asarray(ring, dtype=float)
+                rx, ry = _local_meters(ring[:, 0], ring[:, 1], lon0, lat0)
+                for i in range(len(rx) - 1):
+                    best = np.minimum(best, _segment_distance(px, py, rx[i], ry[i], rx[i + 1], ry[i + 1]))
+        return best
+
+    def area(self, *args, **kwargs) -> Number:
+        lons, lats, inside, cell = _grid(self, 1.0)
+        return Number(float(inside.sum()) * cell)
+
+    def bounds(self, *args, **kwargs) -> "Geometry":
+        west, south, east, north = self.bbox()
+        return Geometry(
+            {"type": "Polygon", "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]}
+        )
+
+    def getInfo(self):
+        info = {"type": self._type, "coordinates": _to_py(self._coords)}
+        if self._buffer:
+            info["buffer"] = self._buffer
+        return info
+
+
+def _grid(geometry: Geometry, scale: float, max_side: int = MAX_GRID_SIDE):
+    """
+    Pixel centers covering the geometry at `scale` meters (capped to max_side per axis).
+    Returns lons, lats, the inside mask and the cell area in m2.
+    """
+    west, south, east, north = geometry.bbox()
+    lat_mid = (south + north) / 2.0
+    width_m = max((east - west) * METERS_PER_DEGREE * math.cos(math.radians(lat_mid)), 1.0)
+    height_m = max((north - south) * METERS_PER_DEGREE, 1.0)
+    nx = int(min(max(math.ceil(width_m / max(scale, 1.0)), 1), max_side))
+    ny = int(min(max(math.ceil(height_m / max(scale, 1.0)), 1), max_side))
+    lons = west + (np.arange(nx) + 0.5) * (east - west) / nx
+    lats = north - (np.arange(ny) + 0.5) * (north - south) / ny
+    grid_lons, grid_lats = np.meshgrid(lons, lats)
+    inside = geometry.contains_points(grid_lons, grid_lats)
+    if not inside.any():
+        # Geometry smaller than one pixel (or a point): use the pixel under its center
+        grid_lons = np.array([[(west + east) / 2.0]])
+        grid_lats = np.array([[(south + north) / 2.0]])
+        inside = np.array([[True]])
+    return grid_lons, grid_lats, inside, (width_m / nx) * (height_m / ny)
+
+
+# --------------------------------------------------------------------------------------
+# Reducers and filters
+# --------------------------------------------------------------------------------------
+
+
+class Reducer(_ComputedObject):
+    def __init__(self, kind: str, params: Optional[dict] = None, parts: Optional[list] = None):
+        self._kind = kind
+        self._params = params or {}
+        self._parts = parts or [self]
+        self._node = _node("Reducer." + kind, self._params)
+
+    @staticmethod
+    def mean():
+        return Reducer("mean")
+
+    @staticmethod
+    def median():
+        return Reducer("median")
+
+    @staticmethod
+    def sum():
+        return Reducer("sum")
+
+    @staticmethod
+    def min():
+        return Reducer("min")
+
+    @staticmethod
+    def max():
+        return Reducer("max")
+
+    @staticmethod
+    def count():
+        return Reducer("count")
+
+    @staticmethod
+    def stdDev():
+        return Reducer("stdDev")
+
+    @staticmethod
+    def percentile(percentiles, outputNames=None, *args, **kwargs):
+        return Reducer("percentile", {"percentiles": list(_to_py(percentiles)), "names": outputNames})
+
+    @staticmethod
+    def linearFit():
+        return Reducer("linearFit")
+
+    @staticmethod
+    def linearRegression(numX, numY=1):
+        return Reducer("linearRegression", {"numX": int(_num(numX)), "numY": int(_num(numY))})
+
+    def combine(self, reducer2: "Reducer", outputPrefix: str = "", sharedInputs: bool = False):
+        combined = Reducer("combined", parts=self._parts + reducer2._parts)
+        combined._node = _node("Reducer.combine", self, reducer2, sharedInputs)
+        return combined
+
+    def _outputs(self) -> TList[str]:
+        names = []
+        for part in self._parts:
+            if part._kind == "percentile":
+                names += part._params.get("names") or [f"p{int(p)}" for p in part._params["percentiles"]]
+            else:
+                names.append(part._kind)
+        return names
+
+    def _reduce_1d(self, values: np.ndarray) -> Dict[str, float]:
+        """Applies every part of the reducer to a 1D array (NaN values are ignored)."""
+        values = values[np.isfinite(values)]
+        out: Dict[str, float] = {}
+        for part in self._parts:
+            kind = part._kind
+            if kind == "percentile":
+                names = part._params.get("names") or [f"p{int(p)}" for p in part._params["percentiles"]]
+                for name, p in zip(names, part._params["percentiles"]):
+                    out[name] = float(np.percentile(values, p)) if values.size else math.nan
+            elif kind == "count":
+                out["count"] = float(values.size)
+            elif kind == "sum":
+                out["sum"] = float(values.sum())
+            elif not values.size:
+                out[kind] = math.nan
+            elif kind == "stdDev":
+                out[kind] = float(values.std())
+            else:
+                out[kind] = float(getattr(np, kind)(values))
+        return out
+
+    def _reduce_stack(self, stack: np.ndarray) -> Dict[str, np.ndarray]:
+        """Applies the reducer along axis 0 of a (images, rows, cols) stack, ignoring NaN."""
+        valid = np.isfinite(stack)
+        count = valid.sum(axis=0)
+        empty = count == 0
+        with np.errstate(all="ignore"):
+            total = np.where(valid, stack, 0.0).sum(axis=0)
+            mean = np.where(empty, np.nan, total / count)
+            ordered = np.sort(stack, axis=0)  # NaN sorts last
+
+            def _percentile(p: float) -> np.ndarray:
+                position = (np.maximum(count, 1) - 1) * p / 100.0
+                low = np.floor(position).astype(int)
+                high = np.minimum(low + 1, np.maximum(count - 1, 0))
+                low_v = np.take_along_axis(ordered, low[None], axis=0)[0]
+                high_v = np.take_along_axis(ordered, high[None], axis=0)[0]
+                return np.where(empty, np.nan, low_v + (high_v - low_v) * (position - low))
+
+            out: Dict[str, np.ndarray] = {}
+            for part in self._parts:
+                kind = part._kind
+                if kind == "percentile":
+                    names = part._params.get("names") or [f"p{int(p)}" for p in part._params["percentiles"]]
+                    for name, p in zip(names, part._params["percentiles"]):
+                        out[name] = _percentile(p)
+                elif kind == "median":
+                    out[kind] = _percentile(50)
+                elif kind == "count":
+                    out[kind] = count.astype(float)
+                elif kind == "sum":
+                    out[kind] = total
+                elif kind == "mean":
+                    out[kind] = mean
+                elif kind == "stdDev":
+                    variance = np.where(valid, (stack - mean) ** 2, 0.0).sum(axis=0) / count
+                    out[kind] = np.where(empty, np.nan, np.sqrt(variance))
+                elif kind == "min":
+                    out[kind] = np.where(empty, np.nan, np.where(valid, stack, np.inf).min(axis=0))
+                elif kind == "max":
+                    out[kind] = np.where(empty, np.nan, np.where(valid, stack, -np.inf).max(axis=0))
+                else:
+                    raise EEException(f"Reducer '{kind}' cannot reduce an image collection")
+        return out
+
+    def getInfo(self):
+        return {"type": "Reducer", "outputs": self._outputs()}
+
+
+class Filter(_ComputedObject):
+    def __init__(self, predicate: Callable[[dict], bool], description: str):
+        self._predicate = predicate
+        self._node = _node("Filter", description)
+
+    @staticmethod
+    def _compare(name, value, op, label):
+        def predicate(props):
+            if name not in props or props[name] is None:
+                # Properties the synthetic data does not model never filter anything out
+                return True
+            return op(_to_py(props[name]), _to_py(value))
+
+        return Filter(predicate, f"{label}:{name}")
+
+    @staticmethod
+    def lt(name, value):
+        return Filter._compare(name, value, lambda a, b: a < b, "lt")
+
+    @staticmethod
+    def lte(name, value):
+        return Filter._compare(name, value, lambda a, b: a <= b, "lte")
+
+    @staticmethod
+    def gt(name, value):
+        return Filter._compare(name, value, lambda a, b: a > b, "gt")
+
+    @staticmethod
+    def gte(name, value):
+        return Filter._compare(name, value, lambda a, b: a >= b, "gte")
+
+    @staticmethod
+    def eq(name, value):
+        return Filter._compare(name, value, lambda a, b: a == b, "eq")
+
+    @staticmethod
+    def notNull(names):
+        names = list(_to_py(names))
+        return Filter(lambda props: all(props.get(n) is not None for n in names), "notNull")
+
+    @staticmethod
+    def calendarRange(start, end=None, field: str = "day_of_year"):
+        return Filter(lambda props: True, f"calendarRange:{field}")
+
+    @staticmethod
+    def date(start, end=None):
+        return Filter(lambda props: True, "date")
+
+    @staticmethod
+    def bounds(geometry, *args):
+        return Filter(lambda props: True, "bounds")
+
+    def getInfo(self):
+        return {"type": "Filter"}
+
+
+# --------------------------------------------------------------------------------------
+# Synthetic datasets
+# --------------------------------------------------------------------------------------
+
+
+def _field(lons, lats, seed: float) -> np.ndarray:
+    """Smooth deterministic field in [0, 1]."""
+    lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+    value = (
+        0.5
+        + 0.25 * np.sin(lons * 7.3 + seed) * np.cos(lats * 5.1 + 2.0 * seed)
+        + 0.25 * np.sin((lons + lats) * 13.7 + 3.0 * seed)
+    )
+    return np.clip(value, 0.0, 1.0)
+
+
+def _vegetation(lons, lats, t: int) -> np.ndarray:
+    return np.clip(_field(lons, lats, 0.0) + 0.03 * math.sin(t), 0.0, 1.0)
+
+
+def _scaled(low, high, seed):
+    return lambda lons, lats, t: low + (high - low) * _field(lons, lats, seed + 0.1 * t)
+
+
+# Dataset id -> band name -> generator(lons, lats, time_index)
+_DATASETS: Dict[str, Dict[str, Callable]] = {
+    "MODIS/061/MOD11A1": {
+        # DN such that DN * 0.02 - 273.15 is between ~18 and ~37 °C, hotter where vegetation is low
+        "LST_Day_1km": lambda lons, lats, t: (
+            273.15 + 18.0 + 16.0 * (1.0 - _vegetation(lons, lats, t)) + 3.0 * _field(lons, lats, 5.0 + t)
+        ) / 0.02,
+    },
+    "COPERNICUS/S2_SR_HARMONIZED": {
+        "B4": lambda lons, lats, t: 300.0 + 900.0 * (1.0 - _vegetation(lons, lats, t)),
+        "B8": lambda lons, lats, t: 1500.0 + 2500.0 * _vegetation(lons, lats, t),
+        "B11": lambda lons, lats, t: 800.0 + 1700.0 * (1.0 - _vegetation(lons, lats, t)) * _field(lons, lats, 7.0),
+        # Scene classification: 4 (vegetation) everywhere except a few "cloudy" (8) patches
+        "SCL": lambda lons, lats, t: np.where(_field(lons, lats, 11.0 + t) > 0.92, 8.0, 4.0),
+    },
+    "ECMWF/ERA5_LAND/HOURLY": {
+        "u_component_of_wind_10m": _scaled(-6.0, 6.0, 21.0),
+        "v_component_of_wind_10m": _scaled(-6.0, 6.0, 23.0),
+    },
+    "ECMWF/ERA5_LAND/MONTHLY_AGGR": {
+        "u_component_of_wind_10m": _scaled(-6.0, 6.0, 21.0),
+        "v_component_of_wind_10m": _scaled(-6.0, 6.0, 23.0),
+    },
+}
+
+_S5P_BANDS = {
+    "L3_NO2": {"tropospheric_NO2_column_number_density": (0.0, 2e-4), "NO2_column_number_density": (0.0, 2e-4)},
+    "L3_SO2": {"SO2_column_number_density": (0.0, 5e-4)},
+    "L3_O3": {"O3_column_number_density": (0.1, 0.15)},
+    "L3_CO": {"CO_column_number_density": (0.0, 0.05)},
+    "L3_AER_AI": {"absorbing_aerosol_index": (-1.0, 2.0)},
+}
+for _product in ("NRTI", "OFFL"):
+    for _suffix, _bands in _S5P_BANDS.items():
+        _DATASETS[f"COPERNICUS/S5P/{_product}/{_suffix}"] = {
+            band: _scaled(low, high, 31.0 + i) for i, (band, (low, high)) in enumerate(_bands.items())
+        }
+
+# Number of synthetic time steps per collection
+_TIME_STEPS = 3
+
+
+def _dataset_images(dataset_id: str) -> TList["Image"]:
+    bands = _DATASETS.get(dataset_id) or {"b1": _scaled(0.0, 1.0, float(sum(map(ord, dataset_id)) % 97))}
+    images = []
+    for t in range(_TIME_STEPS):
+        def fn(lons, lats, t=t):
+            return {name: np.asarray(gen(lons, lats, t), dtype=float) * np.ones(np.shape(lons)) for name, gen in bands.items()}
+
+        image = Image(_fn=fn, _names=list(bands), _node_=_node("Image.load", dataset_id, t))
+        image._properties = {"system:index": f"{t}", "CLOUDY_PIXEL_PERCENTAGE": 10.0}
+        images.append(image)
+    return images
+
+
+# --------------------------------------------------------------------------------------
+# Images
+# --------------------------------------------------------------------------------------
+
+
+def _nan_where_invalid(result, *operands):
+    invalid = np.zeros(np.shape(result), dtype=bool)
+    for operand in operands:
+        invalid |= ~np.isfinite(operand)
+    return np.where(invalid, np.nan, result)
+
+
+class Image(_ComputedObject):
+    def __init__(self, value: Any = None, _fn=None, _names=None, _node_=None):
+        self._properties: Dict[str, Any] = {}
+        if _fn is not None:
+            self._fn, self._names = _fn, list(_names)
+            self._node = _node_ or _node("Image")
+        elif isinstance(value, Image):
+            self._fn, self._names, self._node = value._fn, list(value._names), value._node
+            self._properties = dict(value._properties)
+        elif isinstance(value, str):
+            source = _dataset_images(value)[0]
+            self._fn, self._names = source._fn, source._names
+            self._node = _node("Image.load", value)
+        else:
+            constant = 0.0 if value is None else _num(value)
+            self._fn = lambda lons, lats: {"constant": np.full(np.shape(lons), constant, dtype=float)}
+            self._names = ["constant"]
+            self._node = _node("Image.constant", constant)
+
+    @staticmethod
+    def constant(value) -> "Image":
+        return Image(value)
+
+    def _derive(self, fn, names, op: str, *args) -> "Image":
+        image = Image(_fn=fn, _names=names, _node_=_node(op, self, *args))
+        image._properties = dict(self._properties)
+        return image
+
+    def _evaluate(self, lons, lats) -> Dict[str, np.ndarray]:
+        """
+        Evaluates the image on a grid. Every operation is pixel-wise, so nested evaluations share
+        the grid of the top-level call and each shared sub-graph is computed only once.
+        """
+        memo = getattr(_evaluation, "memo", None)
+        if memo is not None:
+            if id(self) not in memo:
+                memo[id(self)] = self._fn(lons, lats)
+            return memo[id(self)]
+
+        _evaluation.memo = {}
+        try:
+            return self._evaluate(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        finally:
+            _evaluation.memo = None
+
+    def _operand(self, other, lons, lats) -> TList[np.ndarray]:
+        if isinstance(other, Image):
+            return list(other._evaluate(lons, lats).values())
+        return [np.full(np.shape(lons), _num(other), dtype=float)]
+
+    def _binary(self, other, op, name) -> "Image":
+        def fn(lons, lats):
+            bands = self._evaluate(lons, lats)
+            others = self._operand(other, lons, lats)
+            out = {}
+            for i, (band, values) in enumerate(bands.items()):
+                operand = others[i] if len(others) > 1 else others[0]
+                with np.errstate(all="ignore"):
+                    out[band] = _nan_where_invalid(op(values, operand), values, operand)
+            return out
+
+        return self._derive(fn, self._names, "Image." + name, other)
+
+    def add(self, other):
+        return self._binary(other, np.add, "add")
+
+    def subtract(self, other):
+        return self._binary(other, np.subtract, "subtract")
+
+    def multiply(self, other):
+        return self._binary(other, np.multiply, "multiply")
+
+    def divide(self, other):
+        return self._binary(other, np.divide, "divide")
+
+    def pow(self, other):
+        return self._binary(other, np.power, "pow")
+
+    def min(self, other):
+        return self._binary(other, np.minimum, "min")
+
+    def max(self, other):
+        return self._binary(other, np.maximum, "max")
+
+    def eq(self, other):
+        return self._binary(other, lambda a, b: (a == b).astype(float), "eq")
+
+    def neq(self, other):
+        return self._binary(other, lambda a, b: (a != b).astype(float), "neq")
+
+    def lt(self, other):
+        return self._binary(other, lambda a, b: (a < b).astype(float), "lt")
+
+    def lte(self, other):
+        return self._binary(other, lambda a, b: (a <= b).astype(float), "lte")
+
+    def gt(self, other):
+        return self._binary(other, lambda a, b: (a > b).astype(float), "gt")
+
+    def gte(self, other):
+        return self._binary(other, lambda a, b: (a >= b).astype(float), "gte")
+
+    def And(self, other):
+        return self._binary(other, lambda a, b: ((a != 0) & (b != 0)).astype(float), "And")
+
+    def Or(self, other):
+        return self._binary(other, lambda a, b: ((a != 0) | (b != 0)).astype(float), "Or")
+
+    def _unary(self, op, name) -> "Image":
+        def fn(lons, lats):
+            with np.errstate(all="ignore"):
+                return {band: op(values) for band, values in self._evaluate(lons, lats).items()}
+
+        return self._derive(fn, self._names, "Image." + name)
+
+    def sqrt(self):
+        return self._unary(np.sqrt, "sqrt")
+
+    def abs(self):
+        return self._unary(np.abs, "abs")
+
+    def Not(self):
+        return self._unary(lambda v: np.where(np.isfinite(v), (v == 0).astype(float), np.nan), "Not")
+
+    def toFloat(self):
+        return self._unary(lambda v: v, "toFloat")
+
+    def toDouble(self):
+        return self._unary(lambda v: v, "toDouble")
+
+    def clamp(self, low, high):
+        low, high = _num(low), _num(high)
+        return self._unary(lambda v: np.clip(v, low, high), "clamp")
+
+    def reproject(self, *args, **kwargs):
+        return self
+
+    def resample(self, *args, **kwargs):
+        return self
+
+    def set(self, *args):
+        image = Image(self)
+        if len(args) == 1 and isinstance(args[0], dict):
+            image._properties.update(args[0])
+        else:
+            image._properties[args[0]] = args[1]
+        return image
+
+    def get(self, name):
+        return self._properties.get(_to_py(name))
+
+    def bandNames(self):
+        return List(list(self._names))
+
+    def select(self, *selectors, **kwargs) -> "Image":
+        names = selectors[0] if len(selectors) == 1 and isinstance(selectors[0], (list, tuple)) else list(selectors)
+        if len(selectors) == 2 and isinstance(selectors[0], (list, tuple)):
+            names, new_names = list(selectors[0]), list(selectors[1])
+        else:
+            new_names = None
+        resolved = []
+        for name in names:
+            if isinstance(name, int):
+                resolved.append(self._names[name])
+            elif name in self._names:
+                resolved.append(name)
+            else:
+                raise EEException(f"Band '{name}' not found. Available bands: {self._names}")
+        out_names = new_names or resolved
+
+        def fn(lons, lats):
+            bands = self._evaluate(lons, lats)
+            return {new: bands[old] for old, new in zip(resolved, out_names)}
+
+        return self._derive(fn, out_names, "Image.select", resolved)
+
+    def rename(self, *names) -> "Image":
+        names = list(names[0]) if len(names) == 1 and isinstance(names[0], (list, tuple)) else list(names)
+        if len(names) != len(self._names):
+            raise EEException(f"Can't rename {len(self._names)} bands to {len(names)} names")
+
+        def fn(lons, lats):
+            return dict(zip(names, self._evaluate(lons, lats).values()))
+
+        return self._derive(fn, names, "Image.rename", names)
+
+    def addBands(self, other: "Image", names=None, overwrite: bool = False) -> "Image":
+        other = Image(other)
+        merged_names = list(self._names) + [n for n in other._names if n not in self._names]
+
+        def fn(lons, lats):
+            bands = dict(self._evaluate(lons, lats))
+            for name, values in other._evaluate(lons, lats).items():
+                if name not in bands or overwrite:
+                    bands[name] = values
+            return bands
+
+        return self._derive(fn, merged_names, "Image.addBands", other)
+
+    def normalizedDifference(self, band_names) -> "Image":
+        first, second = list(band_names)
+
+        def fn(lons, lats):
+            bands = self._evaluate(lons, lats)
+            a, b = bands[first], bands[second]
+            with np.errstate(all="ignore"):
+                return {"nd": (a - b) / (a + b)}
+
+        return self._derive(fn, ["nd"], "Image.normalizedDifference", [first, second])
+
+    def updateMask(self, mask) -> "Image":
+        def fn(lons, lats):
+            masks = self._operand(mask, lons, lats)
+            out = {}
+            for i, (band, values) in enumerate(self._evaluate(lons, lats).items()):
+                m = masks[i] if len(masks) > 1 else masks[0]
+                out[band] = np.where(np.isfinite(m) & (m != 0), values, np.nan)
+            return out
+
+        return self._derive(fn, self._names, "Image.updateMask", mask)
+
+    def mask(self, mask=None) -> "Image":
+        if mask is not None:
+            return self.updateMask(mask)
+        return self._unary(lambda v: np.isfinite(v).astype(float), "mask")
+
+    def unmask(self, value: Any = 0, sameFootprint: bool = True) -> "Image":
+        def fn(lons, lats):
+            fills = self._operand(value, lons, lats)
+            out = {}
+            for i, (band, values) in enumerate(self._evaluate(lons, lats).items()):
+                fill = fills[i] if len(fills) > 1 else fills[0]
+                out[band] = np.where(np.isfinite(values), values, fill)
+            return out
+
+        return self._derive(fn, self._names, "Image.unmask", value)
+
+    def where(self, test, value) -> "Image":
+        def fn(lons, lats):
+            tests = self._operand(test, lons, lats)
+            values_other = self._operand(value, lons, lats)
+            out = {}
+            for i, (band, values) in enumerate(self._evaluate(lons, lats).items()):
+                t = tests[i] if len(tests) > 1 else tests[0]
+                v = values_other[i] if len(values_other) > 1 else values_other[0]
+                out[band] = np.where(np.isfinite(t) & (t != 0), v, values)
+            return out
+
+        return self._derive(fn, self._names, "Image.where", test, value)
+
+    def paint(self, featureCollection, color: Any = 0, width: Any = None) -> "Image":
+        geometries = _geometries_of(featureCollection)
+        fill = _num(color)
+
+        def fn(lons, lats):
+            inside = np.zeros(np.shape(lons), dtype=bool)
+            for geometry in geometries:
+                inside |= geometry.contains_points(lons, lats)
+            return {band: np.where(inside, fill, values) for band, values in self._evaluate(lons, lats).items()}
+
+        return self._derive(fn, self._names, "Image.paint", featureCollection, fill)
+
+    def clip(self, geometry) -> "Image":
+        geometries = _geometries_of(geometry)
+
+        def fn(lons, lats):
+            inside = np.zeros(np.shape(lons), dtype=bool)
+            for g in geometries:
+                inside |= g.contains_points(lons, lats)
+            return {band: np.where(inside, values, np.nan) for band, values in self._evaluate(lons, lats).items()}
+
+        return self._derive(fn, self._names, "Image.clip", geometry)
+
+    def clipToCollection(self, collection) -> "Image":
+        return self.clip(collection)
+
+    def _reduce_values(self, reducer: Reducer, bands: Dict[str, np.ndarray], single_name: bool = False) -> Dict[str, Any]:
+        outputs = reducer._outputs()
+        result: Dict[str, Any] = {}
+        for band, values in bands.items():
+            reduced = reducer._reduce_1d(values.ravel())
+            for output in outputs:
+                value = reduced[output]
+                if single_name and len(bands) == 1:
+                    key = output
+                elif len(outputs) == 1:
+                    key = band
+                else:
+                    key = f"{band}_{output}"
+                result[key] = None if math.isnan(value) else value
+        return result
+
+    def reduceRegion(self, reducer, geometry=None, scale=None, crs=None, crsTransform=None,
+                     bestEffort=False, maxPixels=None, tileScale=1, **kwargs) -> Dictionary:
+        geometry = Geometry(geometry) if geometry is not None else Geometry.Point([0.0, 0.0]).buffer(50000)
+        lons, lats, inside, _ = _grid(geometry, _num(scale) if scale is not None else 1000.0)
+        bands = {name: values[inside] for name, values in self._evaluate(lons, lats).items()}
+        result = Dictionary(self._reduce_values(reducer, bands))
+        result._node = _node("Image.reduceRegion", self, reducer, geometry, scale)
+        return result
+
+    def reduceRegions(self, collection, reducer, scale=None, crs=None, crsTransform=None,
+                      tileScale=1, **kwargs) -> "FeatureCollection":
+        collection = FeatureCollection(collection)
+        features = []
+        for feature in collection._features:
+            lons, lats, inside, _ = _grid(feature._geometry, _num(scale) if scale is not None else 1000.0)
+            bands = {name: values[inside] for name, values in self._evaluate(lons, lats).items()}
+            stats = self._reduce_values(reducer, bands, single_name=True)
+            features.append(feature.set(stats))
+        result = FeatureCollection(features)
+        result._node = _node("Image.reduceRegions", self, collection, reducer, scale)
+        return result
+
+    def sample(self, region=None, scale=None, projection=None, factor=None, numPixels=None,
+               seed=0, dropNulls=True, tileScale=1, geometries=False, **kwargs) -> "FeatureCollection":
+        region = Geometry(region)
+        target = int(min(_num(numPixels) if numPixels else MAX_SAMPLES, MAX_SAMPLES))
+        lons, lats, inside, _ = _grid(region, _num(scale) if scale else 1000.0, max_side=128)
+        lons, lats = lons[inside], lats[inside]
+        bands = self._evaluate(lons, lats)
+        valid = np.ones(lons.shape, dtype=bool)
+        if dropNulls:
+            for values in bands.values():
+                valid &= np.isfinite(values)
+        index = np.flatnonzero(valid)
+        if index.size > target:
+            index = np.sort(np.random.default_rng(int(_num(seed))).choice(index, target, replace=False))
+        features = []
+        for i in index:
+            props = {name: float(values[i]) for name, values in bands.items()}
+            geometry = Geometry.Point([float(lons[i]), float(lats[i])]) if geometries else None
+            features.append(Feature(geometry, props))
+        result = FeatureCollection(features)
+        result._node = _node("Image.sample", self, region, scale, numPixels, seed)
+        return result
+
+    def getMapId(self, vis_params: Optional[dict] = None) -> Dict[str, Any]:
+        digest = hashlib.sha1((self.serialize() + json.dumps(vis_params or {}, sort_keys=True, default=str)).encode()).hexdigest()[:20]
+        return {
+            "mapid": digest,
+            "token": "",
+            "tile_fetcher": _TileFetcher(f"https://fake-earthengine.local/v1/maps/{digest}/tiles/{{z}}/{{x}}/{{y}}"),
+            "image": self,
+        }
+
+    def getInfo(self):
+        return {"type": "Image", "bands": [{"id": name} for name in self._names], "properties": _to_py(self._properties)}
+
+
+class _TileFetcher:
+    def __init__(self, url_format: str):
+        self.url_format = url_format
+
+
+def _geometries_of(value) -> TList[Geometry]:
+    if isinstance(value, FeatureCollection):
+        return [f._geometry for f in value._features if f._geometry is not None]
+    if isinstance(value, Feature):
+        return [value._geometry]
+    return [Geometry(value)]
+
+
+class ImageCollection(_ComputedObject):
+    def __init__(self, source: Any):
+        if isinstance(source, ImageCollection):
+            self._images, self._node = list(source._images), source._node
+        elif isinstance(source, str):
+            self._images = _dataset_images(source)
+            self._node = _node("ImageCollection.load", source)
+        else:
+            self._images = [Image(i) for i in source]
+            self._node = _node("ImageCollection.fromImages", self._images)
+
+    def _derive(self, images, op: str, *args) -> "ImageCollection":
+        collection = ImageCollection(images)
+        collection._node = _node(op, self, *args)
+        return collection
+
+    def filterBounds(self, geometry):
+        return self._derive(self._images, "ImageCollection.filterBounds", geometry)
+
+    def filterDate(self, start, end=None):
+        return self._derive(self._images, "ImageCollection.filterDate", start, end)
+
+    def filter(self, filter_: Filter):
+        images = [i for i in self._images if filter_._predicate(i._properties)]
+        return self._derive(images, "ImageCollection.filter", filter_)
+
+    def map(self, fn):
+        return self._derive([Image(fn(i)) for i in self._images], "ImageCollection.map", fn)
+
+    def select(self, *selectors):
+        return self._derive([i.select(*selectors) for i in self._images], "ImageCollection.select", selectors)
+
+    def size(self):
+        return Number(len(self._images))
+
+    def first(self):
+        return self._images[0] if self._images else Image()
+
+    def toList(self, count=None, offset=0):
+        return List(self._images[int(_num(offset)):])
+
+    def _composite(self, reducer: Reducer, op: str, suffix: bool) -> Image:
+        images = self._images
+        if not images:
+            return Image(_fn=lambda lons, lats: {}, _names=[], _node_=_node(op, self))
+        names = images[0]._names
+        outputs = reducer._outputs()
+
+        def fn(lons, lats):
+            evaluated = [image._evaluate(lons, lats) for image in images]
+            out = {}
+            for band in names:
+                stack = np.stack([bands[band] for bands in evaluated if band in bands])
+                reduced = reducer._reduce_stack(stack)
+                for output in outputs:
+                    out[f"{band}_{output}" if suffix else band] = reduced[output]
+            return out
+
+        out_names = [f"{band}_{o}" if suffix else band for band in names for o in outputs]
+        return Image(_fn=fn, _names=out_names, _node_=_node(op, self, reducer))
+
+    def mean(self):
+        return self._composite(Reducer.mean(), "ImageCollection.mean", False)
+
+    def median(self):
+        return self._composite(Reducer.median(), "ImageCollection.median", False)
+
+    def min(self):
+        return self._composite(Reducer.min(), "ImageCollection.min", False)
+
+    def max(self):
+        return self._composite(Reducer.max(), "ImageCollection.max", False)
+
+    def sum(self):
+        return self._composite(Reducer.sum(), "ImageCollection.sum", False)
+
+    def mosaic(self):
+        return self._images[-1] if self._images else Image()
+
+    def reduce(self, reducer: Reducer, parallelScale=1):
+        return self._composite(reducer, "ImageCollection.reduce", True)
+
+    def getInfo(self):
+        return {"type": "ImageCollection", "features": [image.getInfo() for image in self._images]}
+
+
+# --------------------------------------------------------------------------------------
+# Features
+# --------------------------------------------------------------------------------------
+
+
+class Feature(_ComputedObject):
+    def __init__(self, geometry: Any = None, properties: Optional[dict] = None):
+        if isinstance(geometry, Feature):
+            self._geometry, self._properties = geometry._geometry, dict(geometry._properties)
+        else:
+            if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+                properties = {**geometry.get("properties", {}), **(properties or {})}
+                geometry = geometry.get("geometry")
+            self._geometry = Geometry(geometry) if geometry is not None else None
+            self._properties = dict(properties or {})
+        self._node = _node("Feature", self._geometry, self._properties)
+
+    def get(self, name):
+        value = self._properties.get(_to_py(name))
+        return Number(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+
+    def set(self, *args):
+        feature = Feature(self)
+        if len(args) == 1 and isinstance(args[0], (dict, Dictionary)):
+            feature._properties.update(args[0]._values if isinstance(args[0], Dictionary) else args[0])
+        else:
+            for key, value in zip(args[::2], args[1::2]):
+                feature._properties[_to_py(key)] = value
+        return feature
+
+    def geometry(self, *args, **kwargs):
+        return self._geometry
+
+    def setGeometry(self, geometry):
+        feature = Feature(self)
+        feature._geometry = Geometry(geometry) if geometry is not None else None
+        return feature
+
+    def buffer(self, distance, *args, **kwargs):
+        return self.setGeometry(self._geometry.buffer(distance))
+
+    def toDictionary(self, properties=None):
+        keys = list(_to_py(properties)) if properties is not None else list(self._properties)
+        return Dictionary({k: self._properties[k] for k in keys if k in self._properties})
+
+    def propertyNames(self):
+        return List(list(self._properties))
+
+    def getInfo(self):
+        return {
+            "type": "Feature",
+            "geometry": self._geometry.getInfo() if self._geometry is not None else None,
+            "properties": _to_py(self._properties),
+        }
+
+
+class FeatureCollection(_ComputedObject):
+    def __init__(self, source: Any = None):
+        if isinstance(source, FeatureCollection):
+            self._features, self._node = list(source._features), source._node
+            return
+        if source is None:
+            features = []
+        elif isinstance(source, (Feature, Geometry)):
+            features = [Feature(source)]
+        elif isinstance(source, dict):
+            if source.get("type") == "FeatureCollection":
+                features = [Feature(f) for f in source.get("features", [])]
+            else:
+                features = [Feature(source)]
+        elif isinstance(source, List):
+            features = [Feature(f) for f in source._values]
+        else:
+            features = [f if isinstance(f, Feature) else Feature(f) for f in source]
+        self._features = features
+        self._node = _node("FeatureCollection", [f._node for f in features])
+
+    def _derive(self, features, op: str, *args) -> "FeatureCollection":
+        collection = FeatureCollection(features)
+        collection._node = _node(op, self, *args)
+        return collection
+
+    def size(self):
+        return Number(len(self._features))
+
+    def filter(self, filter_: Filter):
+        features = [f for f in self._features if filter_._predicate({k: _to_py(v) for k, v in f._properties.items()})]
+        return self._derive(features, "FeatureCollection.filter", filter_)
+
+    def filterBounds(self, geometry):
+        return self._derive(self._features, "FeatureCollection.filterBounds", geometry)
+
+    def map(self, fn):
+        return self._derive([Feature(fn(f)) for f in self._features], "FeatureCollection.map", fn)
+
+    def randomColumn(self, columnName: str = "random", seed: Any = 0, distribution: str = "uniform"):
+        rng = np.random.default_rng(int(_num(seed)))
+        values = rng.random(len(self._features))
+        features = [f.set(columnName, float(v)) for f, v in zip(self._features, values)]
+        return self._derive(features, "FeatureCollection.randomColumn", columnName, seed)
+
+    def aggregate_array(self, prop):
+        prop = _to_py(prop)
+        return List([_to_py(f._properties[prop]) for f in self._features if f._properties.get(prop) is not None])
+
+    def reduceColumns(self, reducer: Reducer, selectors, weightSelectors=None) -> Dictionary:
+        selectors = list(_to_py(selectors))
+        rows = [
+            [_to_py(f._properties.get(s)) for s in selectors]
+            for f in self._features
+        ]
+        rows = [r for r in rows if all(v is not None for v in r)]
+        data = np.asarray(rows, dtype=float).reshape(len(rows), len(selectors))
+        kind = reducer._parts[0]._kind
+        if kind == "linearFit":
+            if len(data) < 2:
+                result = {"scale": None, "offset": None}
+            else:
+                scale, offset = np.polyfit(data[:, 0], data[:, 1], 1)
+                result = {"scale": float(scale), "offset": float(offset)}
+        elif kind == "linearRegression":
+            num_x, num_y = reducer._parts[0]._params["numX"], reducer._parts[0]._params["numY"]
+            x, y = data[:, :num_x], data[:, num_x : num_x + num_y]
+            if len(data) < num_x:
+                coefficients = np.full((num_x, num_y), np.nan)
+                residuals = np.full(num_y, np.nan)
+            else:
+                coefficients, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+                residuals = np.sqrt(np.mean((y - x @ coefficients) ** 2, axis=0))
+            result = {"coefficients": Array(coefficients), "residuals": List(residuals.tolist())}
+        else:
+            reduced = reducer._reduce_1d(data[:, 0] if data.size else np.array([]))
+            result = {k: (None if math.isnan(v) else v) for k, v in reduced.items()}
+        dictionary = Dictionary(result)
+        dictionary._node = _node("FeatureCollection.reduceColumns", self, reducer, selectors)
+        return dictionary
+
+    def select(self, propertySelectors, newProperties=None, retainGeometry: bool = True):
+        selectors = list(_to_py(propertySelectors))
+        names = list(_to_py(newProperties)) if newProperties else selectors
+        features = [
+            Feature(
+                f._geometry if retainGeometry else None,
+                {new: f._properties[old] for old, new in zip(selectors, names) if old in f._properties},
+            )
+            for f in self._features
+        ]
+        return self._derive(features, "FeatureCollection.select", selectors)
+
+    def first(self):
+        return self._features[0] if self._features else Feature(None, {})
+
+    def toList(self, count=None, offset=0):
+        return List(self._features[int(_num(offset)):])
+
+    def getInfo(self):
+        return {"type": "FeatureCollection", "features": [f.getInfo() for f in self._features]}
+
+
+# --------------------------------------------------------------------------------------
+# Algorithms, data and batch namespaces
+# --------------------------------------------------------------------------------------
+
+
+class Algorithms:
+    @staticmethod
+    def If(condition, trueCase, falseCase):
+        value = _to_py(condition) if isinstance(condition, _ComputedObject) else condition
+        return trueCase if value else falseCase
+
+
+class _Data:
+    @staticmethod
+    def getAsset(asset_id: str, *args, **kwargs):
+        raise EEException(f"Asset '{asset_id}' not found (offline backend).")
+
+    @staticmethod
+    def computePixels(request: Dict[str, Any], *args, **kwargs) -> np.ndarray:
+        """Evaluates request['expression'] on the requested grid as a structured NumPy array."""
+        image: Image = request["expression"]
+        grid = request["grid"]
+        width, height = grid["dimensions"]["width"], grid["dimensions"]["height"]
+        transform = grid["affineTransform"]
+        cols = transform["translateX"] + (np.arange(width) + 0.5) * transform["scaleX"]
+        rows = transform["translateY"] + (np.arange(height) + 0.5) * transform["scaleY"]
+        lons, lats = np.meshgrid(cols, rows)
+        bands = image._evaluate(lons, lats)
+        out = np.empty((height, width), dtype=[(name, "<f4") for name in bands])
+        for name, values in bands.items():
+            out[name] = values
+        return out
+
+
+class _Task:
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.id = hashlib.sha1(json.dumps(str(sorted(config))).encode()).hexdigest()[:16]
+
+    def start(self):
+        return None
+
+    def status(self):
+        return {"id": self.id, "state": "COMPLETED"}
+
+
+class _ExportImage:
+    @staticmethod
+    def toAsset(image=None, description="myExportImageTask", assetId=None, **kwargs):
+        return _Task({"description": description, "assetId": assetId, **kwargs})
+
+    @staticmethod
+    def toDrive(image=None, description="myExportImageTask", **kwargs):
+        return _Task({"description": description, **kwargs})
+
+
+class _Export:
+    image = _ExportImage
+
+
+class _Batch:
+    Export = _Export
+
+
+data = _Data()
+batch = _Batch()
+
+
+def Initialize(*args, **kwargs) -> None:
+    return None
+
+
+def ServiceAccountCredentials(*args, **kwargs) -> None:
+    return None
@@ -0,0 +1,237 @@
+# utils/geo_backend.py
+#
+# Pluggable compute backend for the geo path. GeoAnalytics, wind and geo_router build their
+# expressions through the `ee` proxy exported here and evaluate them with `evaluate`,
+# `get_map_id` and `compute_pixels`, so the same code runs against Earth Engine (default) or
+# against the deterministic offline implementation in utils/fake_ee.py (GEO_BACKEND=fake).
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from .ee_metrics import observe
+
+load_dotenv()
+
+
+class GeoBackend:
+    """
+    Base backend. `module` is the ee-compatible namespace (Image, ImageCollection, Reducer, ...)
+    used to build expressions; the evaluation methods are the only blocking calls, and are
+    counted and timed (utils/ee_metrics.py). Subclasses implement the underscored variants.
+
+    At most `max_concurrent` blocking calls are in flight per process (0 = unlimited), however
+    many request, polygon and job threads issue them, so the worker stays within the Earth
+    Engine concurrent request quota.
+    """
+
+    name = "base"
+
+    def __init__(self, max_concurrent: int = 0):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        # Serializing every request graph has a cost, so its size is only measured on demand
+        self.measure_graphs = False
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+
+    @contextmanager
+    def _slot(self):
+        """Waits for one of the `max_concurrent` call slots (the wait is not part of the call time)."""
+        if self._slots is None:
+            yield
+            return
+        with self._slots:
+            yield
+
+    @property
+    def module(self) -> Any:
+        raise NotImplementedError
+
+    def initialize(self) -> None:
+        pass
+
+    def _record(self, kind: str, obj: Any = None) -> None:
+        graph_bytes = len(obj.serialize()) if self.measure_graphs and obj is not None else 0
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            if graph_bytes:
+                self.calls["graph_bytes"] = self.calls.get("graph_bytes", 0) + graph_bytes
+
+    def evaluate(self, obj: Any) -> Any:
+        """Evaluates a computed object (the equivalent of obj.getInfo())."""
+        self._record("getInfo", obj)
+        with self._slot(), observe("getInfo"):
+            return self._evaluate(obj)
+
+    def get_map_id(self, image: Any, vis_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Map ID (with a tile_fetcher.url_format) for an image and visualization parameters."""
+        self._record("getMapId", image)
+        with self._slot(), observe("getMapId"):
+            return self._get_map_id(image, vis_params)
+
+    def compute_pixels(self, request: Dict[str, Any]) -> Any:
+        """Pixels of request['expression'] on request['grid'] as a NumPy structured array."""
+        self._record("computePixels", request["expression"])
+        with self._slot(), observe("computePixels"):
+            return self._compute_pixels(request)
+
+    def _evaluate(self, obj: Any) -> Any:
+        return obj.getInfo()
+
+    def _get_map_id(self, image: Any, vis_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return image.getMapId(vis_params)
+
+    def _compute_pixels(self, request: Dict[str, Any]) -> Any:
+        return self.module.data.computePixels(request)
+
+    def stats(self) -> Dict[str, int]:
+        """Calls per kind (getInfo, getMapId, computePixels) and, if measured, serialized graph bytes."""
+        with self._lock:
+            return dict(self.calls)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+
+class EarthEngineBackend(GeoBackend):
+    """Google Earth Engine through the service account configured in the environment."""
+
+    name = "earthengine"
+
+    @property
+    def module(self) -> Any:
+        import ee
+
+        return ee
+
+    def initialize(self) -> None:
+        import ee
+
+        project_id = os.getenv("GEE_PROJECT")
+        key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+
+        if not project_id:
+            raise ValueError("Variable 'GEE_PROJECT' is not defined, please check your env variables")
+        if not key_path:
+            raise ValueError("Variable 'GOOGLE_APPLICATION_CREDENTIALS' is not defined, please check your env variables")
+
+        try:
+            credentials = ee.ServiceAccountCredentials(None, key_file=key_path)
+
+            ee.Initialize(
+                credentials=credentials,
+                project=project_id,
+                opt_url='https://earthengine-highvolume.googleapis.com'
+            )
+
+            print("GEE LIVE")
+
+        except Exception as e:
+            print(f"Failed to connect to GEE: {e}")
+
+            raise e
+
+
+class FakeEarthEngineBackend(GeoBackend):
+    """
+    Offline backend producing deterministic synthetic rasters. Every blocking call sleeps
+    `latency` seconds to emulate the Earth Engine round trip.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, max_concurrent: int = 0):
+        super().__init__(max_concurrent)
+        self.latency = latency
+
+    @property
+    def module(self) -> Any:
+        from . import fake_ee
+
+        return fake_ee
+
+    def _sleep(self) -> None:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _evaluate(self, obj: Any) -> Any:
+        self._sleep()
+        return super()._evaluate(obj)
+
+    def _get_map_id(self, image: Any, vis_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        self._sleep()
+        return super()._get_map_id(image, vis_params)
+
+    def _compute_pixels(self, request: Dict[str, Any]) -> Any:
+        self._sleep()
+        return super()._compute_pixels(request)
+
+
+_backend: Optional[GeoBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: Optional[str] = None) -> GeoBackend:
+    """
+    Backend selected by `name` or the GEO_BACKEND env variable (earthengine | fake), with at most
+    GEO_EE_MAX_CONCURRENT blocking calls in flight.
+    """
+    name = (name or os.getenv("GEO_BACKEND", "earthengine")).lower()
+    max_concurrent = int(os.getenv("GEO_EE_MAX_CONCURRENT", "10"))
+    if name == "fake":
+        return FakeEarthEngineBackend(
+            latency=float(os.getenv("GEO_FAKE_LATENCY_MS", "0")) / 1000.0,
+            max_concurrent=max_concurrent,
+        )
+    if name in ("earthengine", "ee"):
+        return EarthEngineBackend(max_concurrent)
+    raise ValueError(f"Unknown GEO_BACKEND '{name}'. Valid: earthengine, fake")
+
+
+def get_backend() -> GeoBackend:
+    """Process-wide backend, created and initialized on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend = create_backend()
+            backend.initialize()
+            _backend = backend
+        return _backend
+
+
+def set_backend(backend: GeoBackend, initialize: bool = True) -> GeoBackend:
+    """Replaces the process-wide backend (e.g. a FakeEarthEngineBackend in benchmarks)."""
+    global _backend
+    if initialize:
+        backend.initialize()
+    with _backend_lock:
+        _backend = backend
+    return backend
+
+
+class _EEProxy:
+    """Module-like object resolving `ee.<name>` against the active backend's namespace."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_backend().module, name)
+
+
+ee = _EEProxy()
+
+
+def evaluate(obj: Any) -> Any:
+    return get_backend().evaluate(obj)
+
+
+def get_map_id(image: Any, vis_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return get_backend().get_map_id(image, vis_params)
+
+
+def compute_pixels(request: Dict[str, Any]) -> Any:
+    return get_backend().compute_pixels(request)
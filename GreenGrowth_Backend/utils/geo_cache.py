@@ -0,0 +1,117 @@
+# utils/geo_cache.py
+#
+# Process-wide, thread-safe LRU/TTL caches shared by every GeoAnalytics instance in a worker.
+
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from cachetools import TTLCache
+
+# Number of decimals used to quantize coordinates (3 decimals ~ 110 m)
+COORD_PRECISION = int(os.getenv("GEO_CACHE_COORD_PRECISION", "3"))
+
+
+def region_key(latitude: float, longitude: float, buffer: int) -> Tuple[float, float, int]:
+    """Quantizes a location and buffer so nearby requests share the same cache cell."""
+    return (
+        round(float(latitude), COORD_PRECISION),
+        round(float(longitude), COORD_PRECISION),
+        int(buffer),
+    )
+
+
+class GeoCache:
+    """
+    Bounded LRU cache with time-to-live expiration.
+
+    Values are built through `get_or_create` so concurrent requests for the same key
+    (e.g. the six layer/KPI requests the map page fires at once) only build it once.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Returns the cached value for `key`, building it with `factory` on a miss."""
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have built the value while we waited
+            with self._lock:
+                if key in self._cache:
+                    self.hits += 1
+                    return self._cache[key]
+                self.misses += 1
+
+            try:
+                value = factory()
+                with self._lock:
+                    self._cache[key] = value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._key_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Baseline layers (base_temp, base_ndvi, ndbi, base_aq, region) per location, buffer and date window
+baseline_cache = GeoCache(
+    maxsize=int(os.getenv("GEO_BASELINE_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("GEO_BASELINE_CACHE_TTL", "900")),
+)
+
+# Monthly NDVI p10/p50/p90 composites per region cell and calendar month
+ndvi_percentile_cache = GeoCache(
+    maxsize=int(os.getenv("GEO_NDVI_PERCENTILE_CACHE_SIZE", "128")),
+    ttl=float(os.getenv("GEO_NDVI_PERCENTILE_CACHE_TTL", "86400")),
+)
+
+# Scenario composites (NDVI target and LST/AQ extras with the first n edits painted) per prefix
+scenario_composite_cache = GeoCache(
+    maxsize=int(os.getenv("GEO_SCENARIO_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("GEO_SCENARIO_CACHE_TTL", "900")),
+)
+
+# Evaluated scenario reports and tile URLs per full scenario
+scenario_report_cache = GeoCache(
+    maxsize=int(os.getenv("GEO_SCENARIO_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("GEO_SCENARIO_CACHE_TTL", "900")),
+)
+
+# Wind speeds at the dispersion radii per quantized point and month (utils/wind.py); a past
+# month never changes
+wind_cache = GeoCache(
+    maxsize=int(os.getenv("GEO_WIND_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("GEO_WIND_CACHE_TTL", "604800")),
+)
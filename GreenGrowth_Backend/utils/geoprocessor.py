@@ -1,40 +1,21 @@
-import ee
+from __future__ import annotations
+
+import contextlib
 import json
 from typing import Dict, Any, Tuple, Optional, Union, List
 import os
 from dotenv import load_dotenv
 import datetime
+import math
+import threading
+from .geo_backend import ee, evaluate, get_map_id, compute_pixels
+from .ee_metrics import call_site
+from .geo_cache import baseline_cache, ndvi_percentile_cache, region_key
+from .calibration_store import calibration_store
 load_dotenv()
 
-project_id = os.getenv("GEE_PROJECT")
-key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-
-
-print("="*30)
-print(f"DEBUG: GEE_PROJECT leído: {project_id}")
-print(f"DEBUG: GEE_CREDS_PATH leído: {key_path}")
-print("="*30)
-
-if not project_id:
-    raise ValueError("Variable 'GEE_PROJECT' is not defined, please check your env variables")
-if not key_path:
-    raise ValueError("Variable 'GOOGLE_APPLICATION_CREDENTIALS' is not defined, please check your env variables")
-
-try:
-    credentials = ee.ServiceAccountCredentials(None, key_file=key_path)
-
-    ee.Initialize(
-        credentials=credentials,
-        project=project_id,
-        opt_url='https://earthengine-highvolume.googleapis.com'
-    )
-    
-    print("GEE LIVE")
-
-except Exception as e:
-    print(f"Failed to connect to GEE: {e}")
-
-    raise e
+# The backend (Earth Engine unless GEO_BACKEND=fake) is connected on the first `ee` access,
+# once per worker process, so importing this module needs neither credentials nor the network.
 
 _GA_CFG = {
     "date_month": ("2025-05-01", "2025-05-31"),
@@ -114,6 +95,13 @@ def mask_s2_scl(image):
 class GeoAnalytics:
     _CFG = _GA_CFG
 
+    # KPI layer name -> (image attribute, band, reduction scale in meters, KPI key)
+    _KPI_LAYERS = {
+        "heat": ("temp_image", "LST_Day_1km", 1000, "avg_surface_temp"),
+        "NDVI": ("ndvi", "NDVI", 20, "avg_NVDI"),
+        "AQ": ("aq_index", "AQ_Composite_0_100", 5000, "avg_air_quality"),
+    }
+
     def __init__(
         self,
         latitude: float,
@@ -121,33 +109,29 @@ class GeoAnalytics:
         buffer: int = 50000,
         temp_industry=0,
         aq_industry=0,
+        use_cache: bool = True,
     ):
 
         self.latitude, self.longitude, self.buffer = latitude, longitude, buffer
-        self.region = ee.Geometry.Point(self.longitude, self.latitude).buffer(
-            self.buffer
-        )
+        self.region = None
 
         self.avg_surface_temp = None
         self.avg_NVDI = None
         self.avg_air_quality = None
 
-
-        self.temp_image: ee.Image = None
-        self.ndvi: ee.Image = None
-        self.ndbi: ee.Image = None
-        self.aq_index: ee.Image = None
+        # Base layers (base_temp, base_ndvi, ndbi, base_aq) are properties built on first access
         self.sim_temp: ee.Image = None
         self.sim_ndvi: ee.Image = None
         self.sim_aq: ee.Image = None
-        self.reg_coefs: Optional[Dict[str, List[ee.Number]]] = None
-        self.metrics: Optional[Dict[str, Dict[str, ee.Number]]] = None
+        self.used_model: Optional[str] = None
+        self.reg_coefs: Optional[Dict[str, List[float]]] = None
+        self.metrics: Optional[Dict[str, Dict[str, float]]] = None
         self.attr_norm: Dict[str, Any] = self._CFG["norm_user"]
         self.temp_industry = temp_industry
         self.aq_industry = aq_industry
 
         self._initialize_vis_params()
-        self._calculate_base_layers()
+        self._load_base_layers(use_cache)
 
     # --- Métodos de utilidad estáticos y privados ---
 
@@ -196,11 +180,23 @@ class GeoAnalytics:
         x = ee.Number(x)
         return x.subtract(vmin).divide(ee.Number(vmax).subtract(vmin)).clamp(0, 1)
 
-    def _month(self, date_str: str) -> ee.Number:
-        """Extract the month from an object"""
-        return ee.Date(date_str).get("month")
+    def _month(self, date_str: str) -> int:
+        """Extract the month from an ISO date string"""
+        return datetime.date.fromisoformat(date_str[:10]).month
+
+    def _ndvi_percentiles_for_month(self, month_int: int) -> ee.Image:
+        """
+        NDVI p10/p50/p90 composite of one calendar month over the region.
+        The composite is identical for every polygon in the same region and month, so it is
+        shared by all GeoAnalytics instances through the percentile cache (and optionally
+        exported to a stored asset when NDVI_PERCENTILE_ASSET_ROOT is set).
+        """
+        key = region_key(self.latitude, self.longitude, self.buffer) + (int(month_int),)
+        return ndvi_percentile_cache.get_or_create(
+            key, lambda: self._load_ndvi_percentiles(key, int(month_int))
+        )
 
-    def _ndvi_percentiles_for_month(self, month_int: ee.Number) -> ee.Image:
+    def _build_ndvi_percentiles(self, month_int: int) -> ee.Image:
         s2 = (
             ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
             .filterBounds(self.region)
@@ -213,11 +209,44 @@ class GeoAnalytics:
             ["NDVI_p10", "NDVI_p50", "NDVI_p90"]
         )
 
+    def _load_ndvi_percentiles(self, key: Tuple, month_int: int) -> ee.Image:
+        """Uses the exported asset when available, otherwise builds the composite (and exports it)."""
+        asset_root = os.getenv("NDVI_PERCENTILE_ASSET_ROOT")
+        image = self._build_ndvi_percentiles(month_int)
+        if not asset_root:
+            return image
+
+        asset_id = asset_root.rstrip("/") + "/ndvi_pct_" + "_".join(
+            str(part).replace(".", "p").replace("-", "m") for part in key
+        )
+        try:
+            ee.data.getAsset(asset_id)
+            print(f"NDVI percentiles loaded from asset {asset_id}")
+            return ee.Image(asset_id)
+        except ee.EEException:
+            pass
+
+        try:
+            task = ee.batch.Export.image.toAsset(
+                image=image.clip(self.region),
+                description=asset_id.rsplit("/", 1)[-1],
+                assetId=asset_id,
+                region=self.region,
+                scale=int(os.getenv("NDVI_PERCENTILE_EXPORT_SCALE", "20")),
+                maxPixels=1e13,
+            )
+            task.start()
+            print(f"Exporting NDVI percentiles to {asset_id}")
+        except Exception as e:
+            print(f"Warning: failed to export NDVI percentiles: {e}")
+        return image
+
+    @call_site("get_tile_url")
     def get_tile_url(self, image, vis_params):
         """
         Generates a tile URL for a given Earth Engine image and visualization parameters.
         """
-        map_id = image.clip(self.region).getMapId(vis_params)
+        map_id = get_map_id(image.clip(self.region), vis_params)
         return map_id["tile_fetcher"].url_format
 
     def _get_normalized_gas(
@@ -246,16 +275,231 @@ class GeoAnalytics:
         normalized = self._normalize(collection, vmin, vmax, to=100)
         return normalized.rename("v")
 
-    def _calculate_base_layers(self):
+    @staticmethod
+    def _baseline_end_date() -> datetime.date:
+        """End of the baseline date window, snapped to the day so it can be used as a cache key."""
+        return datetime.date.today() - datetime.timedelta(days=7)
+
+    def _load_base_layers(self, use_cache: bool = True):
+        """
+        Loads the baseline state from the process-wide cache, building it on a miss.
+        The cache is keyed by quantized lat/lon, buffer and the day-snapped date window, and a
+        cached region is centered on the quantized point, so every request of a cell gets the
+        same region whichever came first.
+        Only the region and date windows are prepared here; each layer is built on first access.
+        """
+        if not use_cache:
+            self._baseline = self._calculate_base_layers((self.latitude, self.longitude))
+        else:
+            cell = region_key(self.latitude, self.longitude, self.buffer)
+            key = cell + (self._baseline_end_date().isoformat(),)
+            self._baseline = baseline_cache.get_or_create(key, lambda: self._calculate_base_layers(cell[:2]))
+
+        self.region = self._baseline["region"]
+
+    # Baseline layer -> builder; NDVI and NDBI come from the same Sentinel-2 composite
+    _LAYER_BUILDERS = {
+        "base_temp": "_build_temp_layer",
+        "base_ndvi": "_build_s2_layers",
+        "ndbi": "_build_s2_layers",
+        "base_aq": "_build_aq_layer",
+    }
+
+    def _baseline_layer(self, name: str) -> ee.Image:
+        """Base layer `name`, built once and memoized in the (shared) baseline entry."""
+        layers = self._baseline["layers"]
+        if name not in layers:
+            with self._baseline["lock"]:
+                if name not in layers:
+                    layers.update(getattr(self, self._LAYER_BUILDERS[name])())
+        return layers[name]
+
+    def _baseline_lock(self, section: str, name: str) -> threading.Lock:
+        """Lock guarding the build of `name` in a memo of the baseline entry ('tile_urls', 'kpis')."""
+        with self._baseline["lock"]:
+            return self._baseline["locks"].setdefault((section, name), threading.Lock())
+
+    @property
+    def base_temp(self) -> ee.Image:
+        return self._baseline_layer("base_temp")
+
+    @property
+    def base_ndvi(self) -> ee.Image:
+        return self._baseline_layer("base_ndvi")
+
+    @property
+    def ndbi(self) -> ee.Image:
+        return self._baseline_layer("ndbi")
+
+    @property
+    def base_aq(self) -> ee.Image:
+        return self._baseline_layer("base_aq")
+
+    # The layers used by the KPIs and simulations are the baseline layers
+    temp_image = base_temp
+    ndvi = base_ndvi
+    aq_index = base_aq
+
+    def get_base_tile_url(self, layer_name: str) -> str:
+        """
+        Tile URL of one baseline layer ('temp', 'ndvi' or 'aq'), memoized with the cached baseline.
+        """
+        layer_map = {
+            "temp": (lambda: self.base_temp, self.temp_vis_params),
+            "ndvi": (lambda: self.base_ndvi, self.ndvi_vis_params),
+            "aq": (lambda: self.base_aq, self.aq_vis_params),
+        }
+        if layer_name not in layer_map:
+            raise ValueError(f"Layer '{layer_name}' not supported")
+
+        tile_urls = self._baseline["tile_urls"]
+        if layer_name not in tile_urls:
+            # Concurrent requests for the same layer wait for one getMapId
+            with self._baseline_lock("tile_urls", layer_name):
+                if layer_name not in tile_urls:
+                    image, params = layer_map[layer_name]
+                    tile_urls[layer_name] = self.get_tile_url(image(), params)
+        return tile_urls[layer_name]
+
+    # Raster store layer name -> (baseline entry key, band)
+    _RASTER_LAYERS = {
+        "temp": ("base_temp", "LST_Day_1km"),
+        "ndvi": ("base_ndvi", "NDVI"),
+        "ndbi": ("ndbi", "NDBI"),
+        "aq": ("base_aq", "AQ_Composite_0_100"),
+    }
+    _RASTER_NODATA = -9999.0
+
+    @classmethod
+    def raster_key_for(cls, latitude: float, longitude: float, buffer: int) -> str:
+        """Raster store key of a region cell and the current date window (no GeoAnalytics needed)."""
+        lat, lon, buffer = region_key(latitude, longitude, buffer)
+        return f"{lat}:{lon}:{buffer}:{cls._baseline_end_date().isoformat()}"
+
+    @property
+    def raster_key(self) -> str:
+        """Raster store key of this region cell and date window."""
+        return self.raster_key_for(self.latitude, self.longitude, self.buffer)
+
+    def raster_bounds(self) -> Tuple[float, float, float, float]:
+        """(west, south, east, north) bounding box of the region in degrees."""
+        latitude, longitude = self._baseline["center"]
+        dlat = self.buffer / 111320.0
+        dlon = self.buffer / (111320.0 * max(math.cos(math.radians(latitude)), 1e-6))
+        return (
+            longitude - dlon,
+            latitude - dlat,
+            longitude + dlon,
+            latitude + dlat,
+        )
+
+    @call_site("fetch_rasters")
+    def fetch_rasters(
+        self, images: Dict[str, ee.Image], size: int = 512
+    ) -> Dict[str, Any]:
+        """
+        Pulls several single-band images as NumPy arrays over the region bounding box
+        with one computePixels call. Masked pixels are returned as NaN.
+        """
+        import numpy as np
+
+        names = list(images)
+        stacked = None
+        for name in names:
+            band = images[name].toFloat().unmask(self._RASTER_NODATA).rename(name)
+            stacked = band if stacked is None else stacked.addBands(band)
+
+        west, south, east, north = self.raster_bounds()
+        pixels = compute_pixels(
+            {
+                "expression": stacked,
+                "fileFormat": "NUMPY_NDARRAY",
+                "grid": {
+                    "dimensions": {"width": size, "height": size},
+                    "affineTransform": {
+                        "scaleX": (east - west) / size,
+                        "shearX": 0,
+                        "translateX": west,
+                        "shearY": 0,
+                        "scaleY": -(north - south) / size,
+                        "translateY": north,
+                    },
+                    "crsCode": "EPSG:4326",
+                },
+            }
+        )
+        arrays = {}
+        for name in names:
+            array = np.asarray(pixels[name], dtype=np.float32)
+            array[array == self._RASTER_NODATA] = np.nan
+            arrays[name] = array
+        return arrays
+
+    def cache_base_rasters(
+        self, store=None, size: int = 512, layers: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns memory-mapped base layers (`layers`, default temp, ndvi, ndbi and aq) from the
+        raster store. A missing layer pulls every base layer from Earth Engine with one
+        computePixels, once per region and date window even for concurrent requests.
+        """
+        from .raster_store import get_raster_store
+
+        store = store or get_raster_store()
+        key = self.raster_key
+        layers = list(layers or self._RASTER_LAYERS)
+        rasters = {layer: store.get(key, layer) for layer in layers}
+        if all(raster is not None for raster in rasters.values()):
+            return rasters
+
+        with store.key_lock(key):
+            # Another request may have pulled them while we waited
+            rasters = {layer: rasters[layer] or store.get(key, layer) for layer in layers}
+            if any(raster is None for raster in rasters.values()):
+                arrays = self.fetch_rasters(
+                    {
+                        layer: self._baseline_layer(entry).select([band])
+                        for layer, (entry, band) in self._RASTER_LAYERS.items()
+                    },
+                    size=size,
+                )
+                bounds = self.raster_bounds()
+                # The views returned by put stay valid even if the layer is evicted later
+                stored = {layer: store.put(key, layer, array, bounds) for layer, array in arrays.items()}
+                rasters = {layer: stored[layer] for layer in layers}
+                print(f"🗺️ Base rasters cached for {key}")
+        return rasters
+
+    def cache_sim_rasters(self, sim_id: str, store=None, size: int = 512) -> Dict[str, Any]:
+        """
+        Pulls the simulated layers (sim_temp, sim_ndvi, sim_aq) into the raster store under
+        '<raster_key>:<sim_id>' so their tiles can be rendered locally.
+        """
+        from .raster_store import get_raster_store
+
+        sims = {"sim_temp": self.sim_temp, "sim_ndvi": self.sim_ndvi, "sim_aq": self.sim_aq}
+        if any(image is None for image in sims.values()):
+            raise ValueError("Simulation layers are not computed yet")
+
+        store = store or get_raster_store()
+        key = f"{self.raster_key}:{sim_id}"
+        arrays = self.fetch_rasters(sims, size=size)
+        bounds = self.raster_bounds()
+        return {layer: store.put(key, layer, array, bounds) for layer, array in arrays.items()}
+
+    def _calculate_base_layers(self, center: Tuple[float, float]) -> Dict[str, Any]:
         """
-        Calculates all base data layers from Earth Engine.
-        This is run once on initialization to ensure API endpoints are responsive.
-        Layers: Temperature, NDVI (vegetation), Air Quality (composite index).
+        Prepares the baseline state of a location and date window: region (a buffer around
+        `center`, (lat, lon)), date windows and the (initially empty) layer memo. This is run
+        once per location and date window, the result is shared through the baseline cache.
+        Layers: Temperature, NDVI (vegetation), Air Quality (composite index), built on demand.
         """
-   
+        latitude, longitude = center
+        self.region = ee.Geometry.Point(longitude, latitude).buffer(self.buffer)
+
         #Todays date will always be yesterday-
 
-        end_date = ee.Date(datetime.datetime.now()).advance(-7, 'day')
+        end_date = ee.Date(self._baseline_end_date().isoformat())
 
         #Monthly date will consider the median from the last month.
 
@@ -268,31 +512,54 @@ class GeoAnalytics:
         start_date_annual = end_date.advance(-1, 'year')
         date_range_annual = (start_date_annual, end_date)  
 
-        #Heat layer
-        self.base_temp = (
+        return {
+            "region": self.region,
+            "center": (latitude, longitude),
+            "date_range_monthly": date_range_monthly,
+            "date_range_annual": date_range_annual,
+            # Layers built so far, see _baseline_layer
+            "layers": {},
+            "lock": threading.Lock(),
+            # Results derived from the baseline, shared by every request hitting this entry
+            "tile_urls": {},
+            "kpis": {},
+            # (memo, name) -> lock of its build, see _baseline_lock
+            "locks": {},
+        }
+
+    def _build_temp_layer(self) -> Dict[str, ee.Image]:
+        """Heat layer: monthly MODIS LST median in °C."""
+        base_temp = (
             ee.ImageCollection("MODIS/061/MOD11A1")
             .filterBounds(self.region)
-            .filterDate(*date_range_monthly)
+            .filterDate(*self._baseline["date_range_monthly"])
             .median()
             .select("LST_Day_1km")
             .multiply(0.02)
             .subtract(273.15)
         )
+        print("🌍 Base temperature layer calculated.")
+        return {"base_temp": base_temp}
 
-
-        #NDVI layer
+    def _build_s2_layers(self) -> Dict[str, ee.Image]:
+        """NDVI and NDBI layers from the cloud-masked Sentinel-2 composite."""
         s2_composite = (
             ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
             .filterBounds(self.region)
-            .filterDate(*date_range_annual)
+            .filterDate(*self._baseline["date_range_annual"])
             .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 80))
             .map(mask_s2_scl)  
             .median()
         )
-        self.base_ndvi = s2_composite.normalizedDifference(["B8", "B4"]).rename("NDVI")
-        self.ndbi = s2_composite.normalizedDifference(["B11", "B8"]).rename("NDBI")
+        base_ndvi = s2_composite.normalizedDifference(["B8", "B4"]).rename("NDVI")
+        ndbi = s2_composite.normalizedDifference(["B11", "B8"]).rename("NDBI")
+        print("🌍 Base NDVI/NDBI layers calculated.")
+        return {"base_ndvi": base_ndvi, "ndbi": ndbi}
 
-    
+    def _build_aq_layer(self) -> Dict[str, ee.Image]:
+        """Air quality layer: mean of the normalized Sentinel-5P gases (0-100)."""
+        date_range_monthly = self._baseline["date_range_monthly"]
+        date_range_annual = self._baseline["date_range_annual"]
 
         #Air quality layer
         aq_components = [
@@ -332,64 +599,121 @@ class GeoAnalytics:
                 date_range_annual,
             ),
         ]
-        self.base_aq = (
+        base_aq = (
             ee.ImageCollection(aq_components).mean().rename("AQ_Composite_0_100")
         )
 
+        print("🌍 Base air quality layer calculated.")
+        return {"base_aq": base_aq}
+
+    def get_initial_kpis(self, layer_name):
+        """KPIs of one baseline layer ('heat', 'NDVI' or 'AQ'), memoized with the cached baseline."""
+        if layer_name not in self._KPI_LAYERS:
+            return None
+        return self.get_kpis([layer_name])
 
-        self.temp_image = self.base_temp
-        self.ndvi = self.base_ndvi
-        self.aq_index = self.base_aq
-        print("🌍 Base layers calculated successfully.")
+    @call_site("get_kpis")
+    def get_kpis(
+        self,
+        layer_names: List[str],
+        percentiles: Optional[List[int]] = None,
+        stddev: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Calculates the KPIs of several layers with a single getInfo.
+        Plain means are memoized with the cached baseline: only the layers not computed yet are
+        reduced, and concurrent requests for the same layer wait for one reduction.
+        """
+        unknown = [name for name in layer_names if name not in self._KPI_LAYERS]
+        if unknown:
+            raise ValueError(f"KPI layers not supported: {', '.join(unknown)}")
+        if percentiles or stddev:
+            return self._reduce_kpis(layer_names, percentiles, stddev)
+
+        cached = self._baseline["kpis"]
+        computed: Dict[str, Any] = {}
+        missing = sorted({name for name in layer_names if name not in cached})
+        if missing:
+            # Per-layer locks, always taken in the same (sorted) order
+            with contextlib.ExitStack() as stack:
+                for name in missing:
+                    stack.enter_context(self._baseline_lock("kpis", name))
+                missing = [name for name in missing if name not in cached]
+                if missing:
+                    computed = self._reduce_kpis(missing)
+                    if computed is None:
+                        return None
+                    for name in missing:
+                        kpi_key = self._KPI_LAYERS[name][3]
+                        if computed.get(kpi_key) is not None:
+                            cached[name] = {kpi_key: computed[kpi_key]}
+
+        result: Dict[str, Any] = {}
+        for name in layer_names:
+            kpi_key = self._KPI_LAYERS[name][3]
+            value = cached[name][kpi_key] if name in cached else computed.get(kpi_key)
+            result[kpi_key] = value
+            setattr(self, kpi_key, value)
+        return result
+
+    def _reduce_kpis(
+        self,
+        layer_names: List[str],
+        percentiles: Optional[List[int]] = None,
+        stddev: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        KPIs of several layers with a single getInfo (None if it fails). Bands that share a
+        scale are stacked and reduced together with a combined reducer (mean plus optional
+        percentiles/stdDev); every scale group goes in one ee.Dictionary.
+        """
+        extras = bool(percentiles) or stddev
+        reducer = ee.Reducer.mean()
+        if percentiles:
+            reducer = reducer.combine(ee.Reducer.percentile(list(percentiles)), sharedInputs=True)
+        if stddev:
+            reducer = reducer.combine(ee.Reducer.stdDev(), sharedInputs=True)
+
+        groups: Dict[int, List[str]] = {}
+        for name in layer_names:
+            groups.setdefault(self._KPI_LAYERS[name][2], []).append(name)
+
+        stats = {}
+        for scale, names in groups.items():
+            stacked = None
+            for name in names:
+                attr, band, _, _ = self._KPI_LAYERS[name]
+                image = getattr(self, attr).select([band])
+                stacked = image if stacked is None else stacked.addBands(image)
+            stats[str(scale)] = stacked.reduceRegion(
+                reducer, self.region, scale, maxPixels=1e13, bestEffort=True, tileScale=4
+            )
 
-    def get_initial_kpis(self, layer_name):      
-        if layer_name == 'heat': 
-            try: 
-                temp = self._mean(self.temp_image, 1000, self.region)
-                temp_res = temp.getInfo()
-                temp_kpi = temp_res.get("LST_Day_1km") if temp_res else None
-                self.avg_surface_temp = temp_kpi
+        try:
+            res = evaluate(ee.Dictionary(stats)) or {}
+        except Exception as error:
+            print(f"Error while calculating the kpi's: {error}")
+            return None
 
-                return {
-                    "avg_surface_temp": temp_kpi
-                }
-            except Exception as error: 
-                print(f"Error while calculating the kpi's: {error}")
-                return None 
-                
-                
-        elif layer_name == 'NDVI': 
-            try: 
-                ndvi = self._mean(self.ndvi, 20, self.region)
-                ndvi_res = ndvi.getInfo()
-                nvdi_kpi = ndvi_res.get("NDVI") if ndvi_res else None
-                self.avg_NVDI = nvdi_kpi
-                
-                return {
-                    "avg_NVDI": nvdi_kpi
+        result: Dict[str, Any] = {}
+        detail: Dict[str, Dict[str, Any]] = {}
+        for name in layer_names:
+            _, band, scale, kpi_key = self._KPI_LAYERS[name]
+            values = res.get(str(scale)) or {}
+            # Combined reducers suffix the band name with the output name
+            mean = values.get(f"{band}_mean") if extras else values.get(band)
+            result[kpi_key] = mean
+            setattr(self, kpi_key, mean)
+            if extras:
+                detail[name] = {
+                    key[len(band) + 1:]: value
+                    for key, value in values.items()
+                    if key.startswith(f"{band}_")
                 }
-            except Exception as error: 
-                print(f"Error while calculating the kpi's: {error}")
-                return None
-                
-
-        elif layer_name == 'AQ': 
-            try: 
-                air_q = self._mean(self.aq_index, 5000, self.region)
-                air_q_res = air_q.getInfo()
-                air_q_kpi = air_q_res.get("AQ_Composite_0_100") if air_q_res else None
-                self.avg_air_quality = air_q_kpi
-                
-                return {
-                    "avg_air_quality": air_q_kpi
-                }
-                
-
-            except Exception as error: 
-                print(f"Error while calculating the kpi's: {error}")
-            
 
-        
+        if extras:
+            result["stats"] = detail
+        return result
 
     def _fit_linear_models_simple(
         self, sample_scale: int = 10, n: int = 4000, seed: int = 13
@@ -406,14 +730,9 @@ class GeoAnalytics:
                 seed=seed,
             )
         )
-        count = samples.size().getInfo()
-        print(f"   Scale: {sample_scale}m", flush=True)
-        print(f"   Samples found in polygon: {count}", flush=True)
 
         def _fit(x: str, y: str) -> Dict[str, ee.Number]:
             fit = samples.reduceColumns(ee.Reducer.linearFit(), selectors=[x, y])
-            res = fit.getInfo()
-            print(f"   Fit {y} vs {x}: {res}", flush=True)
             return {"a": ee.Number(fit.get("scale")), "b": ee.Number(fit.get("offset"))}
 
         return {
@@ -459,20 +778,55 @@ class GeoAnalytics:
             _metrics(y.slice(0, n), yhat.slice(0, n), n),
         )
 
+    @call_site("calibrate_precision")
     def calibrate_precision(
         self,
         train_frac: float = 0.7,
         sample_scale: int = 250,
         n_samples: int = 8000,
         seed: int = 42,
+        use_store: bool = True,
+        refresh: bool = False,
     ):
         """
         Adjust multiple linear reg models (LST ~ C + NDVI + NDBI; AQ ~ C + NDVI)
         and the score metrics (R^2, RMSE).
+        Coefficients only depend on the region and date window, so they are fetched as plain
+        floats in one getInfo and persisted in the calibration store for later simulations.
+        refresh=True refits and overwrites the stored entry.
+        Returns the number of Earth Engine round trips used (0 on a store hit).
         """
         if self.ndbi is None:
             print("NDBI no calculated, using simple model for calibration.", flush=True)
-            return
+            return 0
+
+        store_key = calibration_store.make_key(
+            region_key(self.latitude, self.longitude, self.buffer),
+            self._baseline_end_date().isoformat(),
+            train_frac,
+            sample_scale,
+            n_samples,
+            seed,
+        )
+        with calibration_store.key_lock(store_key):
+            return self._calibrate(store_key, train_frac, sample_scale, n_samples, seed, use_store, refresh)
+
+    def _calibrate(
+        self,
+        store_key: str,
+        train_frac: float,
+        sample_scale: int,
+        n_samples: int,
+        seed: int,
+        use_store: bool,
+        refresh: bool,
+    ) -> int:
+        stored = calibration_store.get(store_key) if use_store and not refresh else None
+        if stored is not None:
+            self.reg_coefs, self.metrics = stored["coefs"], stored["metrics"]
+            print("Calibration coefficients loaded from store.")
+            self._print_calibration_metrics()
+            return 0
 
         X = (
             self.ndvi.rename("NDVI")
@@ -527,17 +881,30 @@ class GeoAnalytics:
         mA = ee.List(self._linreg_metrics(yhat_AQ))
         r2_AQ, rmse_AQ = ee.Number(mA.get(0)), ee.Number(mA.get(1))
 
-        # Storing results
-        self.reg_coefs = {"LST": [b0, b1, b2], "AQ": [a0, a1]}
-        self.metrics = {
-            "LST": {"r2": r2_LST, "rmse": rmse_LST},
-            "AQ": {"r2": r2_AQ, "rmse": rmse_AQ},
+        # Storing results as plain floats (single round trip)
+        fitted = evaluate(ee.Dictionary(
+            {
+                "coefs": {"LST": [b0, b1, b2], "AQ": [a0, a1]},
+                "metrics": {
+                    "LST": {"r2": r2_LST, "rmse": rmse_LST},
+                    "AQ": {"r2": r2_AQ, "rmse": rmse_AQ},
+                },
+            }
+        ))
+        self.reg_coefs = {
+            name: [float(c) for c in coefs] for name, coefs in fitted["coefs"].items()
         }
-        print(
-            f"Modelo LST: R^2={r2_LST.getInfo():.3f}, RMSE={rmse_LST.getInfo():.2f}°C"
-        )
-        print(f"Modelo AQ: R^2={r2_AQ.getInfo():.3f}, RMSE={rmse_AQ.getInfo():.2f}")
-
+        self.metrics = fitted["metrics"]
+        if use_store:
+            calibration_store.put(store_key, self.reg_coefs, self.metrics)
+        self._print_calibration_metrics()
+        return 1
+
+    def _print_calibration_metrics(self):
+        for name, unit in (("LST", "°C"), ("AQ", "")):
+            m = (self.metrics or {}).get(name) or {}
+            if m.get("r2") is not None and m.get("rmse") is not None:
+                print(f"Modelo {name}: R^2={m['r2']:.3f}, RMSE={m['rmse']:.2f}{unit}")
 
     def _attr_modifiers_real(
         self, densidad: Dict[str, Any], trafico: Dict[str, Any], albedo: Dict[str, Any]
@@ -592,14 +959,50 @@ class GeoAnalytics:
         aq_extra = ee.Number(aq_extra).clamp(-25.0, 25.0)
         return ndvi_adj, lst_extra, aq_extra
 
-    def _apply_simulation(
+    def _preset_modifiers(
         self,
-        ee_geometry: ee.Geometry,
+        preset: Union[str, Tuple[str, Dict[str, Any]]],
+        temp_industry: float = 0,
+        aq_industry: float = 0,
+    ) -> Optional[Tuple[str, ee.Number, ee.Number, ee.Number]]:
+        """
+        NDVI target percentile band and (ndvi_adj, lst_extra, aq_extra) of a preset, as applied by
+        impact_report. None for an invalid preset.
+        """
+        if isinstance(preset, tuple) and len(preset) == 2 and preset[0] == "residential_real":
+            attrs = preset[1] or {}
+            modifiers = self._attr_modifiers_real(attrs["densidad"], attrs["trafico"], attrs["albedo"])
+            return ("NDVI_p50", *modifiers)
+        if isinstance(preset, tuple) and len(preset) == 2 and preset[0] == "green_real":
+            attrs = preset[1] or {}
+            modifiers = self._attr_modifiers_green(
+                attrs["arboles"], attrs["pasto"], attrs.get("agua", False), attrs["copa"]
+            )
+            return ("NDVI_p90", *modifiers)
+
+        band = self._CFG["presets"].get(preset)
+        if not band:
+            print(f"Preset '{preset}' invalid.")
+            return None
+        if preset == "industrial":
+            return band, ee.Number(0), ee.Number(temp_industry), ee.Number(aq_industry)
+        return band, ee.Number(0), ee.Number(0), ee.Number(0)
+
+    def _simulated_layers(
+        self,
+        mask: ee.Image,
         ndvi_target: ee.Image,
         lst_extra: ee.Number,
         aq_extra: ee.Number,
-    ):
-        
+        reg_coefs: Optional[Dict[str, List[float]]],
+        default_model: Optional[ee.Image] = None,
+    ) -> Dict[str, Any]:
+        """
+        Simulated NDVI, LST and AQ images with `ndvi_target` and the extra LST/AQ (numbers or
+        images) painted where `mask` is set. Uses the calibrated regressions when `reg_coefs` is given, the default
+        NDVI model otherwise; with a `default_model` image, the default model still applies where it is set.
+        Only builds the expressions, so it also runs inside a server-side map.
+        """
         #Default values (to prevent breaking the system if one fails)
         def_lst_slope = ee.Number(-10)
         def_lst_offset = ee.Number(35)
@@ -608,13 +1011,12 @@ class GeoAnalytics:
 
         used_model = "DEFAULT"
 
-        mask = ee.Image(0).paint(ee_geometry, 1)
         ndvi_new = self.ndvi.where(mask, ndvi_target)
 
         #Use the models for LST and AQ
-        if self.reg_coefs is not None and self.ndbi is not None:
-            b0, b1, b2 = self.reg_coefs["LST"]
-            a0, a1 = self.reg_coefs["AQ"]
+        if reg_coefs is not None and self.ndbi is not None:
+            b0, b1, b2 = reg_coefs["LST"]
+            a0, a1 = reg_coefs["AQ"]
             # LST: LST ~ C + NDVI + NDBI
             lst_reg = (
                 ee.Image.constant(b0)
@@ -624,41 +1026,47 @@ class GeoAnalytics:
             # AQ: AQ ~ C + NDVI
             aq_reg = ee.Image.constant(a0).add(ndvi_new.multiply(a1))
             used_model = "COMPLEX"
+            if default_model is not None:
+                lst_reg = lst_reg.where(default_model, ndvi_new.multiply(def_lst_slope).add(def_lst_offset))
+                aq_reg = aq_reg.where(default_model, ndvi_new.multiply(def_aq_slope).add(def_aq_offset))
+                used_model = "MIXED"
         else:
-            try: 
-                # Simple model (LST ~ NDVI, AQ ~ NDVI)
-                s = self._fit_linear_models_simple(sample_scale=250)
-
-                slope_lst = ee.Algorithms.If(s["LST"]["a"], s["LST"]["a"], slope_lst)
-                offset_lst = ee.Algorithms.If(s["LST"]["b"], s["LST"]["b"], offset_lst)
-                slope_aq = ee.Algorithms.If(s["AQ"]["a"], s["AQ"]["a"], slope_aq)
-                offset_aq = ee.Algorithms.If(s["AQ"]["b"], s["AQ"]["b"], offset_aq)
-
-                used_model = "SIMPLE CONFIRMED"
-            except Exception as e: 
-                print(f"⚠️ Simple model crashed (using defaults): {e}")
-                used_model = "DEFAULT (Rescue)"
-
+            # Default model (LST ~ NDVI, AQ ~ NDVI). The simple fit used to be requested here,
+            # but its result was always discarded, so it only cost three Earth Engine round trips.
             lst_reg = ndvi_new.multiply(def_lst_slope).add(def_lst_offset)
             aq_reg = ndvi_new.multiply(def_aq_slope).add(def_aq_offset)
-        
-        print(f"🛡️ Simulation Strategy Used: {used_model}")
-        self.sim_ndvi = ndvi_new
 
-        self.sim_temp = (
+        sim_temp = (
             lst_reg
             .where(mask, lst_reg.add(lst_extra))
             .unmask(lst_extra.add(25)) # Si todo es null, pon 25°C + extra
             .rename("LST_Day_1km")
         )
 
-        self.sim_aq = (
+        sim_aq = (
             aq_reg
             .where(mask, aq_reg.add(aq_extra))
             .unmask(aq_extra.add(30)) # Si todo es null, pon 30 + extra
             .clamp(0, 100)
             .rename("AQ_Composite_0_100")
         )
+        return {"ndvi": ndvi_new, "temp": sim_temp, "aq": sim_aq, "model": used_model}
+
+    def _apply_simulation(
+        self,
+        ee_geometry: ee.Geometry,
+        ndvi_target: ee.Image,
+        lst_extra: ee.Number,
+        aq_extra: ee.Number,
+    ):
+        mask = ee.Image(0).paint(ee_geometry, 1)
+        layers = self._simulated_layers(mask, ndvi_target, lst_extra, aq_extra, self.reg_coefs)
+
+        print(f"🛡️ Simulation Strategy Used: {layers['model']}")
+        self.used_model = layers["model"]
+        self.sim_ndvi = layers["ndvi"]
+        self.sim_temp = layers["temp"]
+        self.sim_aq = layers["aq"]
 
     def predict_residential_with_real_attributes(
         self,
@@ -739,6 +1147,103 @@ class GeoAnalytics:
         self._apply_simulation(ee_geom, ndvi_target_image, lst_extra, aq_extra)
 
 
+    @staticmethod
+    def _report_value(stats: Optional[Dict[str, Any]], key: str) -> Optional[float]:
+        return stats.get(key) if stats else None
+
+    def _build_report(
+        self,
+        preset: Union[str, Tuple[str, Dict[str, Any]]],
+        values: Dict[str, Any],
+        round_trips: int,
+        legacy_round_trips: int,
+        include_metrics: bool = True,
+    ) -> Dict[str, Any]:
+        """Report dictionary (baseline, post, delta, round trips, metrics) from evaluated statistics."""
+        baseline, post = values.get("baseline") or {}, values.get("post") or {}
+        base_temp = self._report_value(baseline.get("temp_c_mean"), "LST_Day_1km")
+        base_ndvi = self._report_value(baseline.get("ndvi_mean"), "NDVI")
+        base_aq = self._report_value(baseline.get("aq_mean"), "AQ_Composite_0_100")
+        post_temp = self._report_value(post.get("temp_c_mean"), "LST_Day_1km")
+        post_ndvi = self._report_value(post.get("ndvi_mean"), "NDVI")
+        post_aq = self._report_value(post.get("aq_mean"), "AQ_Composite_0_100")
+
+        delta_temp = (
+            post_temp - base_temp
+            if (base_temp is not None and post_temp is not None)
+            else None
+        )
+        delta_ndvi = (
+            post_ndvi - base_ndvi
+            if (base_ndvi is not None and post_ndvi is not None)
+            else None
+        )
+        delta_aq = (
+            post_aq - base_aq if (base_aq is not None and post_aq is not None) else None
+        )
+
+        report = {
+            "preset": preset if isinstance(preset, str) else preset[0],
+            "baseline": {
+                "temp_c_mean": base_temp,
+                "ndvi_mean": base_ndvi,
+                "aq_mean_0_100": base_aq,
+            },
+            "post": {
+                "temp_c_mean": post_temp,
+                "ndvi_mean": post_ndvi,
+                "aq_mean_0_100": post_aq,
+            },
+            "delta": {
+                "temp_c_mean": delta_temp,
+                "ndvi_mean": delta_ndvi,
+                "aq_mean_0_100": delta_aq,
+            },
+            "round_trips": {
+                "used": round_trips,
+                "saved": max(legacy_round_trips - round_trips, 0),
+            },
+        }
+
+        if include_metrics and self.metrics:
+            # NaN (empty test split) is not valid JSON
+            report["metrics"] = {
+                name: {
+                    k: (None if isinstance(v, float) and math.isnan(v) else v)
+                    for k, v in m.items()
+                }
+                for name, m in self.metrics.items()
+            }
+        return report
+
+    def _evaluate_report(
+        self, base_stats: Dict[str, ee.Dictionary], post_stats: Dict[str, ee.Dictionary]
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Evaluates baseline and post-simulation statistics with one getInfo.
+        Falls back to one getInfo per dictionary if the combined evaluation fails.
+        Returns the evaluated values and the number of round trips used.
+        """
+        combined = {"baseline": base_stats, "post": post_stats}
+
+        try:
+            return evaluate(ee.Dictionary(combined)) or {}, 1
+        except Exception as e:
+            print(f"Combined report evaluation failed, fetching one by one: {e}")
+
+        def _safe_fetch(obj) -> Optional[Any]:
+            try:
+                return evaluate(ee.Dictionary(obj))
+            except Exception:
+                return None
+
+        values: Dict[str, Any] = {
+            section: {name: _safe_fetch(stats) for name, stats in combined[section].items()}
+            for section in ("baseline", "post")
+        }
+        return values, 1 + len(base_stats) + len(post_stats)
+
+    @call_site("impact_report")
     def impact_report(
         self,
         geojson_area: Dict[str, Any],
@@ -748,13 +1253,16 @@ class GeoAnalytics:
     ) -> Optional[Dict[str, Any]]:
         """
         Calculates and reports the impact of the  simulation (baseline vs. post-simulación)
-        in a geojson geometry
+        in a geojson geometry.
+        Baseline and post-simulation statistics are evaluated in a single round trip; calibration
+        adds one more only when its coefficients are not in the calibration store yet.
         """
         ee_geom = self._geojson_to_ee_geom(geojson_area)
 
+        calibration_round_trips = 0
         if calibrate:
             try:
-                self.calibrate_precision()
+                calibration_round_trips = self.calibrate_precision()
             except Exception as e:
                 print(f"Fine tunning fail, using simple model: {e}")
 
@@ -770,9 +1278,6 @@ class GeoAnalytics:
             "ndvi_mean": self._mean(self.ndvi, 20, area),
             "aq_mean": self._mean(self.aq_index, 100, area),
         }
-        print(f"   Temp Raw: {base_stats['temp_c_mean'].getInfo()}", flush=True)
-        print(f"   NDVI Raw: {base_stats['ndvi_mean'].getInfo()}", flush=True)
-        print(f"   AQ Raw:   {base_stats['aq_mean'].getInfo()}", flush=True)
 
         # Prediction time
         if (
@@ -812,54 +1317,27 @@ class GeoAnalytics:
             "aq_mean": self._mean(self.sim_aq, 5000, area),
         }
 
-        # --- 4. Getting results and reporting them back ---
-        def _safe_fetch(m: ee.Dictionary, key: str) -> Optional[float]:
-            try:
-                val = m.getInfo()
-                return val.get(key) if val else None
-            except Exception:
-                return None
-
-        base_temp = _safe_fetch(base_stats["temp_c_mean"], "LST_Day_1km")
-        base_ndvi = _safe_fetch(base_stats["ndvi_mean"], "NDVI")
-        base_aq = _safe_fetch(base_stats["aq_mean"], "AQ_Composite_0_100")
-        post_temp = _safe_fetch(post_stats["temp_c_mean"], "LST_Day_1km")
-        post_ndvi = _safe_fetch(post_stats["ndvi_mean"], "NDVI")
-        post_aq = _safe_fetch(post_stats["aq_mean"], "AQ_Composite_0_100")
-
-        delta_temp = (
-            post_temp - base_temp
-            if (base_temp is not None and post_temp is not None)
-            else None
-        )
-        delta_ndvi = (
-            post_ndvi - base_ndvi
-            if (base_ndvi is not None and post_ndvi is not None)
-            else None
-        )
-        delta_aq = (
-            post_aq - base_aq if (base_aq is not None and post_aq is not None) else None
+        # --- 4. Getting results (one round trip) and reporting them back ---
+        values, round_trips = self._evaluate_report(base_stats, post_stats)
+        round_trips += calibration_round_trips
+        # Previously: 3 raw baseline prints + 6 separate fetches, plus 4 metric prints when
+        # calibrated or 3 simple-fit fetches when falling back to the default model
+        legacy_round_trips = 3 + len(base_stats) + len(post_stats)
+        if self.metrics is not None:
+            legacy_round_trips += 4
+        if self.used_model != "COMPLEX":
+            legacy_round_trips += 3
+
+        report = self._build_report(preset, values, round_trips, legacy_round_trips)
+        base_temp, post_temp = report["baseline"]["temp_c_mean"], report["post"]["temp_c_mean"]
+        base_ndvi, post_ndvi = report["baseline"]["ndvi_mean"], report["post"]["ndvi_mean"]
+        base_aq, post_aq = report["baseline"]["aq_mean_0_100"], report["post"]["aq_mean_0_100"]
+        delta_temp, delta_ndvi, delta_aq = (
+            report["delta"]["temp_c_mean"],
+            report["delta"]["ndvi_mean"],
+            report["delta"]["aq_mean_0_100"],
         )
 
-        report = {
-            "preset": preset if isinstance(preset, str) else preset[0],
-            "baseline": {
-                "temp_c_mean": base_temp,
-                "ndvi_mean": base_ndvi,
-                "aq_mean_0_100": base_aq,
-            },
-            "post": {
-                "temp_c_mean": post_temp,
-                "ndvi_mean": post_ndvi,
-                "aq_mean_0_100": post_aq,
-            },
-            "delta": {
-                "temp_c_mean": delta_temp,
-                "ndvi_mean": delta_ndvi,
-                "aq_mean_0_100": delta_aq,
-            },
-        }
-
         if all(
             v is not None
             for v in [base_temp, post_temp, base_ndvi, post_ndvi, base_aq, post_aq]
@@ -874,4 +1352,8 @@ class GeoAnalytics:
         print(f"   Post Temp: {post_temp}", flush=True)
         print(f"   Base AQ:   {base_aq}", flush=True)
         print(f"   Post AQ:   {post_aq}", flush=True)
+        print(
+            f"   Round trips: {round_trips} (saved {report['round_trips']['saved']})",
+            flush=True,
+        )
         return report
@@ -1,89 +1,41 @@
-#The following code was commented, but this ilustrates how industry_model.pkl was generated
-
-"""
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split, KFold, RandomizedSearchCV
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.pipeline import Pipeline
-from dotenv import load_dotenv
+# utils/industry.py
+#
+# Training pipeline of the industry model (`flask train-industry-model`): GHGRP facilities with
+# their 2020-2024 land surface temperature and ERA5-Land wind around each site, exported from
+# Earth Engine to data/ghg_data_with_lst.csv and data/export_facility_wind_data.csv.
+#
+# - Both exports are joined on their `system:index` key (the facility's position in the filtered
+#   GHGRP table the export started from); rows whose locations disagree are dropped.
+# - The yearly LST and wind columns are stacked into (facilities, years, radii) arrays and
+#   averaged in one step; wind speed is the magnitude of the mean u/v components.
+# - The exports are read column by column from their columnar cache (utils/facility_data.py).
+#   The feature matrix (INDUSTRY_FEATURES columns, see utils/model_registry.py) and the target
+#   (5-year mean LST within 1 km) are cached in one .npz keyed by the sources' SHA-256: an
+#   unchanged or merely touched source never rebuilds it.
+# - Hyperparameters are searched with randomized cross-validation on every core, candidate batch
+#   by candidate batch, until the candidates or the time budget run out. The best pipeline is
+#   refitted and written to the model registry (.pkl and pickle-free .npz) with a timing report.
+
+import json
 import os
-import ee
-load_dotenv()
-
-
-pd.set_option("display.max_columns", None)
-pd.set_option("display.width", 1000)
-
-data = "data/ghgp_data_2023.xlsx"
-
-try:
-    data_sheets = pd.ExcelFile(data).sheet_names
-    print("Data_sheets found:", data_sheets)
-except Exception as e:
-    print(f"Error reading data: {e}")
-
-try:
-    sheet = data_sheets[0] if data_sheets else None
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
-    df_ghg = pd.read_excel(data, sheet_name=sheet, header=3)
-    print(df_ghg.info())
+import numpy as np
 
-except Exception as e:
-    print(f"\nError al cargar la hoja: {e}")
+from .facility_data import FacilityData, facility_data
+from .model_registry import GWP_CH4, GWP_N2O, INDUSTRIES, INDUSTRY_FEATURES, INDUSTRY_MODEL, MODEL_DIR
 
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, "instance", "industry_features.npz")
 
-df_ghg.columns = df_ghg.columns.str.strip()
-data_selected = [
-    "Latitude",
-    "Longitude",
-    "Industry Type (subparts)",
-    "Industry Type (sectors)",
-    "Stationary Combustion",
-    "Total reported direct emissions",
-    "Methane (CH4) emissions",
-    "CO2 emissions (non-biogenic)",
-    "Nitrous Oxide (N2O) emissions",
-]
-df = df_ghg[data_selected]
-df = df.dropna()
-
-features = []
-for index, row in df.iterrows():
-    geometry = ee.Geometry.Point(row["Longitude"], row["Latitude"])
-    properties = row.to_dict()
-    feature = ee.Feature(geometry, properties)
-    features.append(feature)
-
-facility_collection = ee.FeatureCollection(features)
-
-print(f"FeatureCollection created with {facility_collection.size().getInfo()}")
-
-data = {
-    "Industry Type (subparts)": [
-        "C",
-        "C,D",
-        "C,I",
-        "C",
-        "HH",
-        "C,HH",
-        "C",
-        "C",
-        "HH",
-        "C",
-        "C,D",
-        "C",
-        "C,D",
-        "C",
-        "C",
-        "HH",
-        "C,D",
-        "C,D",
-        "C",
-    ]
-}
+# Bump when the way features are computed changes: invalidates every cached matrix
+FEATURES_VERSION = 1
 
+KEY_COLUMN = "system:index"
+YEARS = (2020, 2021, 2022, 2023, 2024)
+RADII_KM = (1, 5, 10)
 
 industry_subpart_decoder = {
     # Direct Emitters
@@ -148,7 +100,6 @@ industry_subpart_decoder = {
     "SS": "Electric Transmission and Distribution Equipment",
 }
 
-""""""
 heat_potential_index = {
     "H": "High Heat",
     "Q": "High Heat",
@@ -191,341 +142,339 @@ def get_heat_flags(subparts):
     }
 
 
-heat_flags = df["Industry Type (subparts)"].apply(get_heat_flags)
-heat_flags_df = pd.DataFrame(list(heat_flags))
+# Same order as the matrix columns (and as predict_industry_temp's rows)
+FEATURE_COLUMNS = [
+    "Latitude",
+    "Longitude",
+    "Total reported direct emissions",
+    *INDUSTRIES,
+    *(f"Wind Speed {r}km" for r in RADII_KM),
+]
+TARGET_COLUMN = "Heat average in 1k"
 
-df = pd.concat([df, heat_flags_df], axis=1)
+_BASE_COLUMNS = [
+    "Latitude",
+    "Longitude",
+    "Industry Type (subparts)",
+    "Total reported direct emissions",
+    "CO2 emissions (non-biogenic)",
+    "Methane (CH4) emissions",
+    "Nitrous Oxide (N2O) emissions",
+]
+_LST_COLUMNS = [f"LST_{y}_{r}km" for y in YEARS for r in RADII_KM]
+_WIND_COLUMNS = [f"{c}_component_of_wind_10m_{y}_{r}km" for c in ("u", "v") for y in YEARS for r in RADII_KM]
+
+
+def subpart_one_hot(subparts: Sequence[str]) -> np.ndarray:
+    """
+    (len(subparts), len(INDUSTRIES)) one-hot matrix of comma-separated GHGRP subpart codes.
+    Codes outside the model's industries are ignored. Each distinct subpart string is decoded once.
+    """
+    subparts = np.asarray([s if isinstance(s, str) else "" for s in subparts], dtype=object)
+    distinct, inverse = np.unique(subparts, return_inverse=True)
+    decoded = np.zeros((distinct.shape[0], len(INDUSTRIES)), dtype=np.float64)
+    for i, value in enumerate(distinct):
+        for code in value.split(","):
+            column = INDUSTRIES.get(industry_subpart_decoder.get(code.strip(), ""))
+            if column is not None:
+                decoded[i, column] = 1.0
+    return decoded[inverse.ravel()]
+
+
+def _export_columns(table, columns: List[str]) -> None:
+    """Raises if an export lacks one of `columns` or the key."""
+    missing = [c for c in [KEY_COLUMN, *columns] if c not in table]
+    if missing:
+        raise ValueError(f"{os.path.basename(table.source['path'])} is missing columns: {', '.join(missing[:5])}")
+
+
+def build_feature_table(data: Optional[FacilityData] = None) -> Dict[str, np.ndarray]:
+    """
+    Joins both exports on their key and returns the feature matrix `x`, the target `y`, the
+    facility `keys` and the CO2e kept for reporting. Rows with any missing input are dropped.
+    Columns come memory-mapped from the columnar cache (utils/facility_data.py).
+    """
+    data = data or facility_data
+    lst, wind = data.table("lst"), data.table("wind")
+    _export_columns(lst, _BASE_COLUMNS + _LST_COLUMNS)
+    _export_columns(wind, ["Latitude", "Longitude"] + _WIND_COLUMNS)
+
+    lst_keys = np.asarray(lst.column(KEY_COLUMN), dtype=np.int64)
+    wind_keys = np.asarray(wind.column(KEY_COLUMN), dtype=np.int64)
+    for table, keys in ((lst, lst_keys), (wind, wind_keys)):
+        if np.unique(keys).shape[0] != keys.shape[0]:
+            raise ValueError(f"{os.path.basename(table.source['path'])}: duplicated {KEY_COLUMN}")
+    keys, li, wi = np.intersect1d(lst_keys, wind_keys, assume_unique=True, return_indices=True)
+
+    def stack(table, columns, rows):
+        return np.column_stack([np.asarray(table.column(c), dtype=np.float64)[rows] for c in columns])
+
+    # Same facility in both exports: the key is positional, so check it points to the same site
+    lat, lon = stack(lst, ["Latitude", "Longitude"], li).T
+    wind_lat, wind_lon = stack(wind, ["Latitude", "Longitude"], wi).T
+    same_site = np.isclose(lat, wind_lat) & np.isclose(lon, wind_lon)
+
+    n = keys.shape[0]
+    lst_values = stack(lst, _LST_COLUMNS, li).reshape(n, len(YEARS), len(RADII_KM))
+    wind_values = stack(wind, _WIND_COLUMNS, wi).reshape(n, 2, len(YEARS), len(RADII_KM))
+
+    # Target: mean LST within 1 km over the years (a missing year leaves it undefined)
+    y = lst_values[:, :, RADII_KM.index(1)].mean(axis=1)
+    # Wind: mean u and v over the years, then the magnitude per radius
+    u_mean, v_mean = wind_values.mean(axis=2).transpose(1, 0, 2)
+    wind_speed = np.sqrt(u_mean**2 + v_mean**2)
+
+    # One-hot of each distinct subpart string, picked by category code (-1, missing: no industry)
+    subparts = "Industry Type (subparts)"
+    decoded = subpart_one_hot(lst.categories(subparts) + [""])
+
+    x = np.empty((n, INDUSTRY_FEATURES), dtype=np.float64)
+    x[:, 0] = lat
+    x[:, 1] = lon
+    x[:, 2] = stack(lst, ["Total reported direct emissions"], li)[:, 0]
+    x[:, 3 : 3 + len(INDUSTRIES)] = decoded[np.asarray(lst.codes(subparts))[li]]
+    x[:, -len(RADII_KM) :] = wind_speed
+
+    emissions = stack(lst, ["CO2 emissions (non-biogenic)", "Methane (CH4) emissions", "Nitrous Oxide (N2O) emissions"], li)
+    co2e = emissions @ np.array([1.0, GWP_CH4, GWP_N2O])
+
+    # Any missing input drops the facility, like a dropna over the joined table
+    inputs = np.column_stack([x, co2e, lst_values.reshape(n, -1), wind_values.reshape(n, -1)])
+    valid = same_site & np.isfinite(inputs).all(axis=1) & np.isfinite(y)
+    return {
+        "x": x[valid],
+        "y": y[valid],
+        "keys": keys[valid],
+        "co2e": co2e[valid],
+        "joined_rows": np.asarray(n),
+    }
 
-industry_subpart_decoder = {
-    # Direct Emitters
-    "C": "Stationary Combustion",
-    "D": "Electricity Generation",
-    "E": "Adipic Acid Production",
-    "F": "Aluminum Production",
-    "G": "Ammonia Manufacturing",
-    "H": "Cement Production",
-    "I": "Electronics Manufacture",
-    "K": "Ferroalloy Production",
-    "L": "Fluorinated GHG Production",
-    "N": "Glass Production",
-    "O": "HCFC-22 Production and HFC-23 Destruction",
-    "P": "Hydrogen Production",
-    "Q": "Iron and Steel Production",
-    "R": "Lead Production",
-    "S": "Lime Production",
-    "T": "Magnesium Production",
-    "U": "Miscellaneous Use of Carbonates",
-    "V": "Nitric Acid Production",
-    "X": "Petrochemical Production",
-    "Y": "Petroleum Refining",
-    "Z": "Phosphoric Acid Production",
-    "AA": "Pulp and Paper Manufacturing",
-    "BB": "Silicon Carbide Production",
-    "CC": "Soda Ash Manufacturing",
-    "DD": "SF6 from Electrical Equipment",
-    "EE": "Titanium Dioxide Production",
-    "FF": "Underground Coal Mines",
-    "GG": "Zinc Production",
-    "HH": "Municipal Landfills",
-    "II": "Industrial Wastewater Treatment",
-    "TT": "Industrial Waste Landfills",
-    # Oil & Gas (W-Subparts)
-    "W-OFFSH": "Offshore Production",
-    "W-ONSH": "Onshore Production",
-    "W-GB": "Gathering and Boosting",
-    "W-PROC": "Natural Gas Processing",
-    "W-NGTC": "Natural Gas Transmission/Compression",
-    "W-TRANS": "Transmission Pipelines",
-    "W-UNSTG": "Underground Natural Gas Storage",
-    "W-LNGSTG": "Liquified Natural Gas Storage",
-    "W-LNGIE": "Liquified Natural Gas Import/Export Equipment",
-    "W-LDC": "Natural Gas Local Distribution Company",
-    # Suppliers
-    "LL": "Suppliers of Coal Based Liquids Fuels",
-    "MM": "Suppliers of Petroleum Products",
-    "MM-REF": "Petroleum Refinery (Producer)",
-    "MM-IMP": "Petroleum Product Importer",
-    "MM-EXP": "Petroleum Product Exporter",
-    "NN": "Natural Gas and Natural Gas Liquid Supply",
-    "NN-FRAC": "Natural Gas Liquids Fractionator",
-    "NN-LDC": "Natural Gas Local Distribution Company (supply)",
-    "OO": "Non-CO2 Industrial Gas Supply",
-    "PP": "Carbon Dioxide (CO2) Supply",
-    "QQ": "Import and Export of Equipment Containing Fluorinated GHGs",
-    # CO2 Injection
-    "RR": "Geologic Sequestration of Carbon Dioxide",
-    "UU": "Injection of Carbon Dioxide",
-    # Other
-    "SS": "Electric Transmission and Distribution Equipment",
+
+def load_feature_table(
+    cache_path: Optional[str] = None,
+    force: bool = False,
+    data: Optional[FacilityData] = None,
+) -> Dict[str, Any]:
+    """
+    Feature table from the cache when the sources' hashes and FEATURES_VERSION are unchanged,
+    else built and cached. Returns the arrays plus `cache_hit` and `sources` (their fingerprints).
+    """
+    data = data or facility_data
+    cache_path = cache_path or os.getenv("INDUSTRY_FEATURES_CACHE", DEFAULT_CACHE_PATH)
+    sources = {name: data.table(name).source for name in ("lst", "wind")}
+    digests = {name: source["sha256"] for name, source in sources.items()}
+
+    if os.path.exists(cache_path) and not force:
+        try:
+            with np.load(cache_path, allow_pickle=False) as npz:
+                meta = json.loads(bytes(npz["meta"]).decode("utf-8"))
+                if meta.get("version") == FEATURES_VERSION and meta.get("digests") == digests:
+                    cached = {name: npz[name] for name in npz.files if name != "meta"}
+                    return {**cached, "cache_hit": True, "sources": sources}
+        except Exception as e:
+            print(f"Warning: ignoring unreadable feature cache {cache_path}: {e}")
+
+    table = build_feature_table(data)
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    meta = {"version": FEATURES_VERSION, "digests": digests, "columns": FEATURE_COLUMNS, "created_at": time.time()}
+    tmp = f"{cache_path}.tmp.npz"
+    np.savez(tmp, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8), **table)
+    os.replace(tmp, cache_path)
+    return {**table, "cache_hit": False, "sources": sources}
+
+
+PARAM_DISTRIBUTIONS = {
+    "model__n_estimators": [100, 200, 300, 500],
+    "model__learning_rate": [0.01, 0.05, 0.1, 0.2],
+    "model__max_depth": [3, 5, 7],
+    "model__subsample": [0.7, 0.8, 0.9, 1.0],
 }
 
 
-one_hot_encoded = df["Industry Type (subparts)"].str.get_dummies(sep=",")
-one_hot_encoded.columns = one_hot_encoded.columns.map(industry_subpart_decoder)
-df = pd.concat([df, one_hot_encoded], axis=1)
-
-data_2 = "data/ghg_data_with_lst.csv"
-
-try:
-    df_2 = pd.read_csv(data_2)
-    print(df_2.info())
-except Exception as e:
-    print(f"\nError al cargar el CSV: {e}")
-
-data_wind = "data/export_facility_wind_data.csv"
-
-try:
-    df_3 = pd.read_csv(data_wind)
-    print(df_3.info())
-except Exception as e:
-    print(f"\nError al cargar el CSV: {e}")
-
-df.reset_index(drop=True, inplace=True)
-df_2.reset_index(drop=True, inplace=True)
-df_3.reset_index(drop=True, inplace=True)
-df_ = pd.concat([df, df_2], axis=1)
-df_complete = pd.concat([df_, df_3], axis=1)
-df_complete.reset_index(drop=True, inplace=True)
-df_complete = df_complete.loc[:, ~df_complete.columns.duplicated()].copy()
-
-gwp_ch4 = 25
-gwp_n2o = 298
-
-df_complete["Pollution_Index_CO2e"] = (
-    df_complete["CO2 emissions (non-biogenic)"] * 1
-    + df_complete["Methane (CH4) emissions"] * gwp_ch4
-    + df_complete["Nitrous Oxide (N2O) emissions"] * gwp_n2o
-)
-df_complete["Heat difference in 5km"] = (
-    (
-        df_complete["LST_2020_1km"]
-        + df_complete["LST_2021_1km"]
-        + df_complete["LST_2022_1km"]
-        + df_complete["LST_2023_1km"]
-        + df_complete["LST_2024_1km"]
-    )
-    / 5
-) - (
-    (
-        df_complete["LST_2020_5km"]
-        + df_complete["LST_2021_5km"]
-        + df_complete["LST_2022_5km"]
-        + df_complete["LST_2023_5km"]
-        + df_complete["LST_2024_5km"]
-    )
-    / 5
-)
-df_complete["Heat difference in 10km"] = (
-    (
-        df_complete["LST_2020_1km"]
-        + df_complete["LST_2021_1km"]
-        + df_complete["LST_2022_1km"]
-        + df_complete["LST_2023_1km"]
-        + df_complete["LST_2024_1km"]
+def _pipeline(random_state: int):
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return Pipeline(
+        [
+            ("scaler", StandardScaler()),
+            ("model", GradientBoostingRegressor(random_state=random_state)),
+        ]
     )
-    / 5
-) - (
-    (
-        df_complete["LST_2020_10km"]
-        + df_complete["LST_2021_10km"]
-        + df_complete["LST_2022_10km"]
-        + df_complete["LST_2023_10km"]
-        + df_complete["LST_2024_10km"]
+
+
+def _fit_score(estimator, params, x, y, train, test):
+    """R² of one candidate on one fold, and the seconds it took."""
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    model = clone(estimator).set_params(**params)
+    model.fit(x[train], y[train])
+    return model.score(x[test], y[test]), time.perf_counter() - start
+
+
+def search_hyperparameters(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_iter: int = 50,
+    cv: int = 5,
+    budget_s: Optional[float] = None,
+    n_jobs: int = -1,
+    random_state: int = 42,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Randomized search with `cv`-fold cross-validation (R²). Candidates are evaluated in batches
+    of one per core (all their folds in parallel); no new batch starts once `budget_s` is spent,
+    so the search overruns the budget by at most one batch.
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+    from sklearn.model_selection import KFold, ParameterSampler
+
+    estimator = _pipeline(random_state)
+    candidates = list(ParameterSampler(PARAM_DISTRIBUTIONS, n_iter=n_iter, random_state=random_state))
+    folds = list(KFold(n_splits=cv, shuffle=True, random_state=random_state).split(x))
+    batch_size = max(1, effective_n_jobs(n_jobs))
+
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for offset in range(0, len(candidates), batch_size):
+            if budget_s is not None and time.perf_counter() - start >= budget_s:
+                progress(f"Time budget of {budget_s:.0f}s reached after {len(results)} candidates")
+                break
+            batch = candidates[offset : offset + batch_size]
+            scores = parallel(
+                delayed(_fit_score)(estimator, params, x, y, train, test)
+                for params in batch
+                for train, test in folds
+            )
+            for i, params in enumerate(batch):
+                fold_scores = scores[i * cv : (i + 1) * cv]
+                results.append(
+                    {
+                        "params": params,
+                        "mean_r2": float(np.mean([s for s, _ in fold_scores])),
+                        "std_r2": float(np.std([s for s, _ in fold_scores])),
+                        "fit_seconds": float(sum(t for _, t in fold_scores)),
+                    }
+                )
+            best = max(results, key=lambda r: r["mean_r2"])
+            progress(
+                f"{len(results)}/{len(candidates)} candidates, best R² {best['mean_r2']:.4f} "
+                f"({time.perf_counter() - start:.1f}s)"
+            )
+
+    if not results:
+        raise ValueError("No candidate was evaluated; raise the time budget")
+    return {
+        "best": max(results, key=lambda r: r["mean_r2"]),
+        "results": results,
+        "candidates": len(candidates),
+        "evaluated": len(results),
+        "n_jobs": batch_size,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def train_industry_model(
+    output_dir: str = MODEL_DIR,
+    n_iter: int = 50,
+    cv: int = 5,
+    budget_s: Optional[float] = None,
+    n_jobs: int = -1,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    cache_path: Optional[str] = None,
+    rebuild_features: bool = False,
+    progress: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Full pipeline: cached features, parallel search, refit of the best candidate, hold-out R²,
+    then `industry_model.pkl`, `industry_model.npz` and `industry_model.report.json` in
+    `output_dir`. Returns the report.
+    """
+    import pickle
+
+    from sklearn.model_selection import train_test_split
+
+    from .tree_ensemble import export_tree_ensemble
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    table = load_feature_table(cache_path, force=rebuild_features)
+    timings["features"] = time.perf_counter() - started
+    x, y = table["x"], table["y"]
+    progress(
+        f"Feature matrix {x.shape[0]}x{x.shape[1]} "
+        f"({'cache hit' if table['cache_hit'] else 'built'}, {timings['features'] * 1000:.0f} ms)"
     )
-    / 5
-)
-df_complete["Heat average in 1k"] = (
-    df_complete["LST_2020_1km"]
-    + df_complete["LST_2021_1km"]
-    + df_complete["LST_2022_1km"]
-    + df_complete["LST_2023_1km"]
-    + df_complete["LST_2024_1km"]
-) / 5
-
-df_complete["u Component of wind 1km"] = df_complete[
-    [
-        "u_component_of_wind_10m_2020_1km",
-        "u_component_of_wind_10m_2021_1km",
-        "u_component_of_wind_10m_2022_1km",
-        "u_component_of_wind_10m_2023_1km",
-        "u_component_of_wind_10m_2024_1km",
-    ]
-].mean(axis=1)
-
-df_complete["u Component of wind 5km"] = df_complete[
-    [
-        "u_component_of_wind_10m_2020_5km",
-        "u_component_of_wind_10m_2021_5km",
-        "u_component_of_wind_10m_2022_5km",
-        "u_component_of_wind_10m_2023_5km",
-        "u_component_of_wind_10m_2024_5km",
-    ]
-].mean(axis=1)
-
-df_complete["u Component of wind 10km"] = df_complete[
-    [
-        "u_component_of_wind_10m_2020_10km",
-        "u_component_of_wind_10m_2021_10km",
-        "u_component_of_wind_10m_2022_10km",
-        "u_component_of_wind_10m_2023_10km",
-        "u_component_of_wind_10m_2024_10km",
-    ]
-].mean(axis=1)
-
-
-# --- V component ---
-df_complete["v Component of wind 1km"] = df_complete[
-    [
-        "v_component_of_wind_10m_2020_1km",
-        "v_component_of_wind_10m_2021_1km",
-        "v_component_of_wind_10m_2022_1km",
-        "v_component_of_wind_10m_2023_1km",
-        "v_component_of_wind_10m_2024_1km",
-    ]
-].mean(axis=1)
-
-df_complete["v Component of wind 5km"] = df_complete[
-    [
-        "v_component_of_wind_10m_2020_5km",
-        "v_component_of_wind_10m_2021_5km",
-        "v_component_of_wind_10m_2022_5km",
-        "v_component_of_wind_10m_2023_5km",
-        "v_component_of_wind_10m_2024_5km",
-    ]
-].mean(axis=1)
-
-df_complete["v Component of wind 10km"] = df_complete[
-    [
-        "v_component_of_wind_10m_2020_10km",
-        "v_component_of_wind_10m_2021_10km",
-        "v_component_of_wind_10m_2022_10km",
-        "v_component_of_wind_10m_2023_10km",
-        "v_component_of_wind_10m_2024_10km",
-    ]
-].mean(axis=1)
-# Wind speed (magnitude) for each altitude
-df_complete["Wind Speed 1km"] = np.sqrt(
-    df_complete["u Component of wind 1km"] ** 2
-    + df_complete["v Component of wind 1km"] ** 2
-)
-
-df_complete["Wind Speed 5km"] = np.sqrt(
-    df_complete["u Component of wind 5km"] ** 2
-    + df_complete["v Component of wind 5km"] ** 2
-)
-
-df_complete["Wind Speed 10km"] = np.sqrt(
-    df_complete["u Component of wind 10km"] ** 2
-    + df_complete["v Component of wind 10km"] ** 2
-)
-
-df_complete = df_complete.dropna()
-x = df_complete[
-    [
-        "Latitude",
-        "Longitude",
-        "Total reported direct emissions",
-        "Stationary Combustion",
-        "Electricity Generation",
-        "Adipic Acid Production",
-        "Aluminum Production",
-        "Ammonia Manufacturing",
-        "Cement Production",
-        "Electronics Manufacture",
-        "Ferroalloy Production",
-        "Fluorinated GHG Production",
-        "Glass Production",
-        "HCFC-22 Production and HFC-23 Destruction",
-        "Hydrogen Production",
-        "Iron and Steel Production",
-        "Lead Production",
-        "Lime Production",
-        "Magnesium Production",
-        "Miscellaneous Use of Carbonates",
-        "Nitric Acid Production",
-        "Petrochemical Production",
-        "Petroleum Refining",
-        "Phosphoric Acid Production",
-        "Pulp and Paper Manufacturing",
-        "Silicon Carbide Production",
-        "Soda Ash Manufacturing",
-        "SF6 from Electrical Equipment",
-        "Titanium Dioxide Production",
-        "Underground Coal Mines",
-        "Zinc Production",
-        "Municipal Landfills",
-        "Industrial Wastewater Treatment",
-        "Industrial Waste Landfills",
-        "Offshore Production",
-        "Natural Gas Processing",
-        "Natural Gas Transmission/Compression",
-        "Underground Natural Gas Storage",
-        "Liquified Natural Gas Storage",
-        "Liquified Natural Gas Import/Export Equipment",
-        "Petroleum Refinery (Producer)",
-        "Petroleum Product Importer",
-        "Petroleum Product Exporter",
-        "Natural Gas Liquids Fractionator",
-        "Natural Gas Local Distribution Company (supply)",
-        "Non-CO2 Industrial Gas Supply",
-        "Carbon Dioxide (CO2) Supply",
-        "Import and Export of Equipment Containing Fluorinated GHGs",
-        # CO2 Injection
-        "Injection of Carbon Dioxide",
-        # Other
-        "Electric Transmission and Distribution Equipment",
-        "Wind Speed 1km",
-        "Wind Speed 5km",
-        "Wind Speed 10km",
-    ]
-].values
-
-y = df_complete["Heat average in 1k"].values
-
-
-x_train, x_test, y_train, y_test = train_test_split(
-    x, y, test_size=0.2, random_state=42
-)
-pipeline = Pipeline(
-    [
-        ("scaler", StandardScaler()),
-        ("model", GradientBoostingRegressor(random_state=42)),
-    ]
-)
-
-param_distributions = {
-     "model__n_estimators": [100, 200, 300, 500],
-     "model__learning_rate": [0.01, 0.05, 0.1, 0.2],
-     "model__max_depth": [3, 5, 7],
-     "model__subsample": [0.7, 0.8, 0.9, 1.0],
- }
-
-
-cv_strategy = KFold(n_splits=5, shuffle=True, random_state=42)
-
-# Set up RandomizedSearchCV
-# This test different combinations of the parameters using cross-validation.
-random_search = RandomizedSearchCV(
-    estimator=pipeline,
-    param_distributions=param_distributions,
-    n_iter=50,  # Number of parameter settings that are sampled.
-    cv=cv_strategy,
-    scoring="r2",  # The metric to evaluate the models on.
-    n_jobs=-1,  # Use all available CPU cores.
-    random_state=42,
-    verbose=1,  # Prints updates so you can see the progress.
-)
-
-
-print("Starting hyperparameter tuning...")
-random_search.fit(x_train, y_train)
-
-print("\n--- Tuning Complete ---")
-print(f"Best R² score found during search: {random_search.best_score_:.4f}")
-print("Best parameters found:")
-print(random_search.best_params_)
-
-best_model = random_search.best_estimator_
-final_score = best_model.score(x_test, y_test)
-print(f"\nFinal R² score on the unseen test set: {final_score:.4f}")
-"""
+
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=test_size, random_state=random_state)
+
+    step = time.perf_counter()
+    search = search_hyperparameters(x_train, y_train, n_iter, cv, budget_s, n_jobs, random_state, progress)
+    timings["search"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    model = _pipeline(random_state).set_params(**search["best"]["params"])
+    model.fit(x_train, y_train)
+    test_r2 = float(model.score(x_test, y_test))
+    timings["refit"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    pkl_path = os.path.join(output_dir, f"{INDUSTRY_MODEL}.pkl")
+    npz_path = os.path.join(output_dir, f"{INDUSTRY_MODEL}.npz")
+    # Both files are written and verified aside; the served ones are only replaced once the
+    # export matches the model, so a rejected export never reaches the registry
+    suffix = uuid.uuid4().hex[:8]
+    pkl_tmp, npz_tmp = f"{pkl_path}.{suffix}.tmp", f"{npz_path}.{suffix}.tmp.npz"
+    try:
+        with open(pkl_tmp, "wb") as fh:
+            pickle.dump(model, fh)
+        export = export_tree_ensemble(model, npz_tmp, x=x_test)
+        if export["max_abs_diff"] > 1e-9:
+            raise ValueError(f"Exported ensemble differs from the model by {export['max_abs_diff']:.3g}")
+        os.replace(pkl_tmp, pkl_path)
+        # The .npz last: the registry prefers it over the .pkl
+        os.replace(npz_tmp, npz_path)
+    finally:
+        for leftover in (pkl_tmp, npz_tmp):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    timings["export"] = time.perf_counter() - step
+    timings["total"] = time.perf_counter() - started
+
+    import sklearn
+
+    report = {
+        "model": INDUSTRY_MODEL,
+        "trained_at": time.time(),
+        "sklearn_version": sklearn.__version__,
+        "features": {
+            "rows": int(x.shape[0]),
+            "joined_rows": int(table["joined_rows"]),
+            "columns": FEATURE_COLUMNS,
+            "cache_hit": bool(table["cache_hit"]),
+            "sources": table["sources"],
+        },
+        "search": {
+            "candidates": search["candidates"],
+            "evaluated": search["evaluated"],
+            "cv_folds": cv,
+            "n_jobs": search["n_jobs"],
+            "budget_s": budget_s,
+            "best_params": search["best"]["params"],
+            "best_cv_r2": search["best"]["mean_r2"],
+            "results": sorted(search["results"], key=lambda r: -r["mean_r2"]),
+        },
+        "test_r2": test_r2,
+        "export_max_abs_diff": export["max_abs_diff"],
+        "timings_s": {k: round(v, 3) for k, v in timings.items()},
+    }
+    with open(os.path.join(output_dir, f"{INDUSTRY_MODEL}.report.json"), "w") as fh:
+        json.dump(report, fh, indent=2)
+    return report
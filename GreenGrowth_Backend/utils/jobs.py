@@ -0,0 +1,332 @@
+# utils/jobs.py
+#
+# Asynchronous jobs for requests too large to answer within one gunicorn request (e.g.
+# simulate-polygons with hundreds of polygons). A job and its items (one per polygon) are
+# persisted in the `jobs` / `job_items` tables (models/JobModel.py) and run on a bounded
+# thread pool inside each worker.
+#
+# - Handlers are registered by kind: `handler(payload)` prepares whatever is shared by the
+#   items and returns `run_item(index)`, which computes and returns one item's result.
+# - A worker holds a lease on every job it runs and renews it while the job makes progress.
+#   A background sweeper picks up queued jobs and jobs whose lease expired (worker killed,
+#   deploy, crash), so finished items are kept and only the remaining ones run again.
+# - Failed items are retried with exponential backoff up to GEO_JOB_MAX_ATTEMPTS times;
+#   ValueError marks invalid input and is not retried.
+# - Cancellation is a flag checked between items, so it works from any worker.
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_, update
+
+from models import Job, JobItem, db
+
+JOB_WORKERS = int(os.getenv("GEO_JOB_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.getenv("GEO_JOB_MAX_PENDING", "50"))
+MAX_ATTEMPTS = int(os.getenv("GEO_JOB_MAX_ATTEMPTS", "3"))
+RETRY_DELAY = float(os.getenv("GEO_JOB_RETRY_DELAY", "2"))
+LEASE_SECONDS = float(os.getenv("GEO_JOB_LEASE_SECONDS", "60"))
+SWEEP_SECONDS = float(os.getenv("GEO_JOB_SWEEP_SECONDS", "15"))
+
+ACTIVE_STATUSES = ("queued", "running")
+TERMINAL_STATUSES = ("succeeded", "partial", "failed", "cancelled")
+
+_handlers: Dict[str, Callable[[Dict[str, Any]], Callable[[int], Any]]] = {}
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by submit() when GEO_JOB_MAX_PENDING jobs are already queued or running."""
+
+
+def register(kind: str) -> Callable:
+    """Decorator registering `handler(payload) -> run_item(index)` for jobs of `kind`."""
+
+    def decorator(fn: Callable) -> Callable:
+        _handlers[kind] = fn
+        return fn
+
+    return decorator
+
+
+class JobRunner:
+    """Per-process job runner: bounded executor, lease bookkeeping and the resume sweeper."""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_pending: int = MAX_PENDING_JOBS,
+        lease_seconds: float = LEASE_SECONDS,
+        sweep_seconds: float = SWEEP_SECONDS,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        self.sweep_seconds = sweep_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._app = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._active: set = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def init_app(self, app) -> None:
+        """Binds the runner to the app. The sweeper starts on the first request (or from gunicorn)."""
+        self._app = app
+
+        @app.before_request
+        def _start_job_runner():
+            self.start()
+
+    def start(self) -> None:
+        """Creates the job tables if needed and starts the sweeper. Idempotent, once per process."""
+        with self._lock:
+            if self._started or self._app is None:
+                return
+            self._started = True
+            # Created after fork (gunicorn workers), never in the master
+            self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="geo-job")
+
+        with self._app.app_context():
+            db.metadata.create_all(db.engine, tables=[Job.__table__, JobItem.__table__])
+
+        threading.Thread(target=self._sweep_forever, name="geo-job-sweeper", daemon=True).start()
+
+    # ---------------------------------------------------------------- API
+
+    def submit(self, kind: str, payload: Dict[str, Any], total: int) -> Job:
+        """Persists a job with `total` pending items and schedules it. Needs an app context."""
+        if kind not in _handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        self.start()
+
+        pending = db.session.query(func.count(Job.id)).filter(Job.status.in_(ACTIVE_STATUSES)).scalar()
+        if pending >= self.max_pending:
+            raise JobQueueFull(f"Too many pending jobs ({pending}), try again later")
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status="queued",
+            payload=json.dumps(payload),
+            total=total,
+            max_attempts=MAX_ATTEMPTS,
+        )
+        job.items = [JobItem(index=i) for i in range(total)]
+        db.session.add(job)
+        db.session.commit()
+
+        self._schedule(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return db.session.get(Job, job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Requests cancellation. The worker running the job stops before its next item; a job
+        nobody holds a lease on is cancelled right away. Finished items keep their results.
+        """
+        job = db.session.get(Job, job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+
+        job.cancel_requested = True
+        if job.lease_expires_at is None or job.lease_expires_at < time.time():
+            self._finalize(job)
+        db.session.commit()
+        return job
+
+    # ---------------------------------------------------------------- leases
+
+    def _claim(self, job_id: str) -> bool:
+        """Takes the lease of a queued job or of a job whose lease expired. Atomic across workers."""
+        now = time.time()
+        result = db.session.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.status.in_(ACTIVE_STATUSES),
+                or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now),
+            )
+            .values(lease_owner=self.owner, lease_expires_at=now + self.lease_seconds)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _renew(self, job_id: str) -> bool:
+        """Extends our lease; False if another worker took the job over."""
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.lease_owner == self.owner)
+            .values(lease_expires_at=time.time() + self.lease_seconds)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _schedule(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._active:
+                return False
+        if not self._claim(job_id):
+            return False
+        with self._lock:
+            self._active.add(job_id)
+        self._executor.submit(self._run, job_id)
+        return True
+
+    def _sweep_forever(self) -> None:
+        while True:
+            try:
+                with self._app.app_context():
+                    self._sweep()
+            except Exception as e:
+                print(f"Warning: job sweep failed: {e}")
+            time.sleep(self.sweep_seconds)
+
+    def _sweep(self) -> None:
+        """Renews the leases of our running jobs and takes over queued or abandoned ones."""
+        with self._lock:
+            active = list(self._active)
+        for job_id in active:
+            self._renew(job_id)
+
+        free = self.workers - len(active)
+        if free <= 0:
+            return
+        candidates: List[str] = [
+            job_id
+            for (job_id,) in db.session.query(Job.id)
+            .filter(
+                Job.status.in_(ACTIVE_STATUSES),
+                or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < time.time()),
+            )
+            .order_by(Job.created_at)
+            .limit(free)
+        ]
+        for job_id in candidates:
+            if self._schedule(job_id):
+                print(f"Resuming job {job_id}")
+
+    # ---------------------------------------------------------------- execution
+
+    def _run(self, job_id: str) -> None:
+        try:
+            with self._app.app_context():
+                self._execute(job_id)
+        except Exception:
+            print(f"Job {job_id} crashed:\n{traceback.format_exc()}")
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _execute(self, job_id: str) -> None:
+        job = db.session.get(Job, job_id)
+        if job is None or job.lease_owner != self.owner:
+            return
+        if job.cancel_requested:
+            self._finalize(job)
+            db.session.commit()
+            return
+
+        job.status = "running"
+        job.started_at = job.started_at or time.time()
+        job.attempts += 1
+        db.session.commit()
+
+        try:
+            run_item = _handlers[job.kind](job.get_payload())
+        except Exception as e:
+            # Nothing can run without the shared preparation: retry the whole job later
+            db.session.rollback()
+            job.error = str(e)
+            if isinstance(e, ValueError) or job.attempts >= job.max_attempts:
+                job.status = "failed"
+                self._finalize(job)
+            else:
+                print(f"Job {job_id} failed to start (attempt {job.attempts}/{job.max_attempts}): {e}")
+                job.status = "queued"
+                job.lease_owner = None
+                job.lease_expires_at = time.time() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            db.session.commit()
+            return
+
+        # "running" items were interrupted by a restart and run again
+        for item in [i for i in job.items if i.status in ("pending", "running")]:
+            db.session.refresh(job, attribute_names=["cancel_requested"])
+            if job.cancel_requested:
+                break
+            if not self._renew(job_id):
+                print(f"Job {job_id}: lease lost, leaving it to {job.lease_owner}")
+                return
+            self._run_item(job, item, run_item)
+
+        self._finalize(job)
+        db.session.commit()
+
+    def _run_item(self, job: Job, item: JobItem, run_item: Callable[[int], Any]) -> None:
+        while True:
+            item.status = "running"
+            item.attempts += 1
+            item.updated_at = time.time()
+            db.session.commit()
+
+            try:
+                result = json.dumps(run_item(item.index))
+            except Exception as e:
+                db.session.rollback()
+                item.error = str(e)
+                item.updated_at = time.time()
+                if isinstance(e, ValueError) or item.attempts >= job.max_attempts:
+                    item.status = "failed"
+                    job.failed += 1
+                    db.session.commit()
+                    return
+                print(f"Job {job.id}: item {item.index} failed (attempt {item.attempts}/{job.max_attempts}): {e}")
+                item.status = "pending"
+                db.session.commit()
+                time.sleep(RETRY_DELAY * 2 ** (item.attempts - 1))
+                continue
+
+            item.result = result
+            item.error = None
+            item.status = "done"
+            item.updated_at = time.time()
+            job.completed += 1
+            db.session.commit()
+            return
+
+    def _finalize(self, job: Job) -> None:
+        """Sets the final status and counters of a job and releases its lease (caller commits)."""
+        # Items that never ran: the job failed before them or was cancelled
+        leftover = "failed" if job.status == "failed" else "cancelled"
+        for item in job.items:
+            if item.status in ("pending", "running"):
+                item.status = leftover
+                item.updated_at = time.time()
+
+        job.completed = sum(1 for i in job.items if i.status == "done")
+        job.failed = sum(1 for i in job.items if i.status == "failed")
+        if job.status != "failed":
+            if job.cancel_requested and any(i.status == "cancelled" for i in job.items):
+                job.status = "cancelled"
+            elif job.failed == 0:
+                job.status = "succeeded"
+            elif job.completed == 0:
+                job.status = "failed"
+            else:
+                job.status = "partial"
+        job.finished_at = time.time()
+        job.lease_owner = None
+        job.lease_expires_at = None
+
+
+# Process-wide runner (bound to the app in app.py)
+job_runner = JobRunner()
@@ -0,0 +1,259 @@
+# utils/model_registry.py
+#
+# Registry of the ML models served by the API (today the industrial temperature model).
+# Each model is loaded once per process and shared by every request and thread; with gunicorn's
+# preload_app it is loaded once in the master, before fork, and the workers share its pages.
+# `<name>.npz` (utils/tree_ensemble.py, memory-mapped, no scikit-learn) is preferred over the
+# `<name>.pkl` it was exported from.
+# The registry records where each model came from, a content hash used as its version and how
+# long it took to load.
+#
+# predict_industry_temp() assembles the feature matrix of many facilities at once (the 47-wide
+# one-hot `INDUSTRIES` vector is filled with one vectorized assignment) and predicts them in a
+# single call.
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+MODEL_DIR = os.getenv("ML_MODEL_DIR", os.path.join(BASE_DIR, "ML_Models"))
+
+# Global warming potentials used to express CH4 and N2O as CO2e
+GWP_CH4 = 25
+GWP_N2O = 298
+
+# Industry -> column of the one-hot block of the industry model (training order in utils/industry.py)
+INDUSTRIES = {
+    "Stationary Combustion": 0,
+    "Electricity Generation": 1,
+    "Adipic Acid Production": 2,
+    "Aluminum Production": 3,
+    "Ammonia Manufacturing": 4,
+    "Cement Production": 5,
+    "Electronics Manufacture": 6,
+    "Ferroalloy Production": 7,
+    "Fluorinated GHG Production": 8,
+    "Glass Production": 9,
+    "HCFC-22 Production and HFC-23 Destruction": 10,
+    "Hydrogen Production": 11,
+    "Iron and Steel Production": 12,
+    "Lead Production": 13,
+    "Lime Production": 14,
+    "Magnesium Production": 15,
+    "Miscellaneous Use of Carbonates": 16,
+    "Nitric Acid Production": 17,
+    "Petrochemical Production": 18,
+    "Petroleum Refining": 19,
+    "Phosphoric Acid Production": 20,
+    "Pulp and Paper Manufacturing": 21,
+    "Silicon Carbide Production": 22,
+    "Soda Ash Manufacturing": 23,
+    "SF6 from Electrical Equipment": 24,
+    "Titanium Dioxide Production": 25,
+    "Underground Coal Mines": 26,
+    "Zinc Production": 27,
+    "Municipal Landfills": 28,
+    "Industrial Wastewater Treatment": 29,
+    "Industrial Waste Landfills": 30,
+    "Offshore Production": 31,
+    "Natural Gas Processing": 32,
+    "Natural Gas Transmission/Compression": 33,
+    "Underground Natural Gas Storage": 34,
+    "Liquified Natural Gas Storage": 35,
+    "Liquified Natural Gas Import/Export Equipment": 36,
+    "Petroleum Refinery (Producer)": 37,
+    "Petroleum Product Importer": 38,
+    "Petroleum Product Exporter": 39,
+    "Natural Gas Liquids Fractionator": 40,
+    "Natural Gas Local Distribution Company (supply)": 41,
+    "Non-CO2 Industrial Gas Supply": 42,
+    "Carbon Dioxide (CO2) Supply": 43,
+    "Import and Export of Equipment Containing Fluorinated GHGs": 44,
+    "Injection of Carbon Dioxide": 45,
+    "Electric Transmission and Distribution Equipment": 46,
+}
+
+# latitude, longitude, reported emissions, one-hot industries, wind speed at 1/5/10 km
+INDUSTRY_FEATURES = 3 + len(INDUSTRIES) + 3
+
+INDUSTRY_MODEL = "industry_model"
+
+
+class ModelUnavailable(RuntimeError):
+    """Raised when a model has no artifact in MODEL_DIR or its artifact cannot be loaded."""
+
+
+def _load_tree_ensemble(path: str) -> Any:
+    from .tree_ensemble import TreeEnsemble
+
+    return TreeEnsemble.load(path)
+
+
+def _load_pickle(path: str) -> Any:
+    import pickle
+
+    with open(path, "rb") as fh:
+        return pickle.load(fh)
+
+
+class LoadedModel:
+    """A model object plus where it came from, its version and how long it took to load."""
+
+    def __init__(self, name: str, path: str, model: Any, load_seconds: float):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.pid = os.getpid()
+        with open(path, "rb") as fh:
+            self.version = hashlib.sha256(fh.read()).hexdigest()[:12]
+
+    def predict(self, x):
+        return self.model.predict(x)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "file": os.path.basename(self.path),
+            "version": self.version,
+            "type": type(self.model).__name__,
+            "load_ms": round(self.load_seconds * 1000, 2),
+            "loaded_at": self.loaded_at,
+            "loaded_in_pid": self.pid,
+        }
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe model cache. Artifacts are looked up as MODEL_DIR/<name><ext> for
+    every registered extension, in registration order.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR):
+        self.model_dir = model_dir
+        # The pickle-free ensemble (utils/tree_ensemble.py) wins: it needs no scikit-learn
+        self._loaders: Dict[str, Callable[[str], Any]] = {".npz": _load_tree_ensemble, ".pkl": _load_pickle}
+        self._models: Dict[str, LoadedModel] = {}
+        self._lock = threading.Lock()
+
+    def register_loader(self, extension: str, loader: Callable[[str], Any], first: bool = False) -> None:
+        """Adds a loader for artifacts with `extension`; `first` makes it win over the others."""
+        if first:
+            self._loaders = {extension: loader, **{k: v for k, v in self._loaders.items() if k != extension}}
+        else:
+            self._loaders[extension] = loader
+
+    def _artifact(self, name: str) -> Optional[str]:
+        for extension in self._loaders:
+            path = os.path.join(self.model_dir, name + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, name: str = INDUSTRY_MODEL) -> LoadedModel:
+        """Returns the loaded model, loading it on first use. Raises ModelUnavailable."""
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is not None:
+                return loaded
+
+            path = self._artifact(name)
+            if path is None:
+                raise ModelUnavailable(f"Model '{name}' not found in {self.model_dir}")
+            start = time.perf_counter()
+            try:
+                model = self._loaders[os.path.splitext(path)[1]](path)
+            except Exception as e:
+                raise ModelUnavailable(f"Failed to load model '{name}' from {path}: {e}") from e
+            loaded = LoadedModel(name, path, model, time.perf_counter() - start)
+            self._models[name] = loaded
+            print(f"🤖 Model '{name}' {loaded.version} loaded in {loaded.load_seconds * 1000:.1f} ms")
+            return loaded
+
+    def preload(self, names: Iterable[str] = (INDUSTRY_MODEL,)) -> None:
+        """Loads `names` now (gunicorn master or worker boot); missing models are only reported."""
+        for name in names:
+            try:
+                self.get(name)
+            except ModelUnavailable as e:
+                print(f"Warning: {e}")
+
+    def reload(self, name: str = INDUSTRY_MODEL) -> LoadedModel:
+        with self._lock:
+            self._models.pop(name, None)
+        return self.get(name)
+
+    def info(self) -> List[Dict[str, Any]]:
+        return [loaded.info() for loaded in list(self._models.values())]
+
+
+# Process-wide registry
+model_registry = ModelRegistry()
+
+
+def reported_emissions(co2: float, ch4: float, n2o: float) -> float:
+    """CO2-equivalent emissions from the reported CO2, CH4 and N2O."""
+    return co2 + (ch4 * GWP_CH4) + (n2o * GWP_N2O)
+
+
+def industry_features(rows: List[Dict[str, Any]], wind_speeds: Optional[List[List[float]]] = None):
+    """
+    Feature matrix (len(rows), INDUSTRY_FEATURES) of the industry model. Each row has latitude,
+    longitude, co2, ch4, n2o and industries_used (names; unknown ones are ignored). Wind speeds
+    come from `wind_speeds` or, for rows without "wind_speeds", from one batched WindService call.
+    Returns the matrix and the unknown industries of each row.
+    """
+    import numpy as np
+
+    n = len(rows)
+    x = np.zeros((n, INDUSTRY_FEATURES), dtype=float)
+    x[:, 0] = [float(r["latitude"]) for r in rows]
+    x[:, 1] = [float(r["longitude"]) for r in rows]
+    x[:, 2] = [
+        reported_emissions(float(r.get("co2") or 0), float(r.get("ch4") or 0), float(r.get("n2o") or 0))
+        for r in rows
+    ]
+
+    unknown: List[List[str]] = [[] for _ in rows]
+    row_index, column_index = [], []
+    for i, row in enumerate(rows):
+        for industry in row.get("industries_used") or []:
+            column = INDUSTRIES.get(industry)
+            if column is None:
+                unknown[i].append(industry)
+            else:
+                row_index.append(i)
+                column_index.append(3 + column)
+    x[row_index, column_index] = 1.0
+
+    if wind_speeds is None:
+        missing = [i for i, r in enumerate(rows) if r.get("wind_speeds") is None]
+        wind_speeds = [r.get("wind_speeds") for r in rows]
+        if missing:
+            from .wind import wind_service
+
+            fetched = wind_service.speeds([(x[i, 0], x[i, 1]) for i in missing])
+            for i, speeds in zip(missing, fetched):
+                wind_speeds[i] = speeds
+    x[:, -3:] = np.asarray(wind_speeds, dtype=float).reshape(n, 3)
+    return x, unknown
+
+
+def predict_industry_temp(rows: List[Dict[str, Any]], wind_speeds: Optional[List[List[float]]] = None) -> List[int]:
+    """
+    Industrial temperature increase (°C, truncated like the single-row path) of many facilities
+    with one model call. Raises ModelUnavailable if the model is not deployed.
+    """
+    if not rows:
+        return []
+    model = model_registry.get(INDUSTRY_MODEL)
+    x, _ = industry_features(rows, wind_speeds)
+    return [int(p) for p in model.predict(x)]
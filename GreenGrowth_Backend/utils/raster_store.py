@@ -0,0 +1,275 @@
+# utils/raster_store.py
+#
+# On-disk raster cache for the GeoAnalytics base layers. Each layer is split into fixed-size
+# float32 tiles stored in one memory-mapped .npy file, with a small SQLite index and
+# LRU eviction by disk budget, so popular cities are pulled from Earth Engine only once.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_ROOT = os.path.join(BASE_DIR, "instance", "raster_store")
+
+# (west, south, east, north) in degrees
+Bounds = Tuple[float, float, float, float]
+
+
+class TiledRaster:
+    """
+    Read-only view over a tiled layer. Tiles are returned as zero-copy views of the memory map.
+    """
+
+    def __init__(self, tiles: np.ndarray, height: int, width: int, bounds: Bounds):
+        self.tiles = tiles  # (tiles_y, tiles_x, tile_size, tile_size)
+        self.height = height
+        self.width = width
+        self.bounds = bounds
+        self.tile_size = tiles.shape[2]
+
+    def tile(self, ty: int, tx: int) -> np.ndarray:
+        """Zero-copy view of one tile (NaN padded at the right/bottom edges)."""
+        return self.tiles[ty, tx]
+
+    def read(self, rows: Optional[slice] = None, cols: Optional[slice] = None) -> np.ndarray:
+        """Assembles a window (whole raster by default) into a regular 2D array."""
+        r0, r1, _ = (rows or slice(0, self.height)).indices(self.height)
+        c0, c1, _ = (cols or slice(0, self.width)).indices(self.width)
+        t = self.tile_size
+        ty0, ty1 = r0 // t, (r1 - 1) // t + 1
+        tx0, tx1 = c0 // t, (c1 - 1) // t + 1
+        block = self.tiles[ty0:ty1, tx0:tx1]
+        mosaic = block.transpose(0, 2, 1, 3).reshape((ty1 - ty0) * t, (tx1 - tx0) * t)
+        return np.array(mosaic[r0 - ty0 * t : r1 - ty0 * t, c0 - tx0 * t : c1 - tx0 * t])
+
+    def sample(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Nearest-pixel values at the given coordinates, NaN outside the raster."""
+        west, south, east, north = self.bounds
+        lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        cols = np.floor((lons - west) / (east - west) * self.width).astype(np.int64)
+        rows = np.floor((north - lats) / (north - south) * self.height).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height)
+
+        out = np.full(lons.shape, np.nan, dtype=np.float32)
+        r, c = rows[inside], cols[inside]
+        t = self.tile_size
+        out[inside] = self.tiles[r // t, c // t, r % t, c % t]
+        return out
+
+
+class RasterStore:
+    """
+    Stores 2D float32 layers per (key, layer). `key` identifies the region and date window.
+    Least recently accessed layers are evicted when the store exceeds `disk_budget` bytes.
+    """
+
+    def __init__(self, root: str, tile_size: int = 256, disk_budget: int = 1024 * 1024 * 1024):
+        self.root = root
+        self.tile_size = tile_size
+        self.disk_budget = disk_budget
+        self._lock = threading.Lock()
+        self._ready = False
+        # key -> [lock, waiters]
+        self._key_locks: Dict[str, list] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=30)
+        if not self._ready:
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS rasters (
+                        key TEXT NOT NULL,
+                        layer TEXT NOT NULL,
+                        path TEXT NOT NULL,
+                        height INTEGER NOT NULL,
+                        width INTEGER NOT NULL,
+                        bounds TEXT NOT NULL,
+                        nbytes INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL,
+                        PRIMARY KEY (key, layer)
+                    )
+                    """
+                )
+                conn.commit()
+                self._ready = True
+        return conn
+
+    def _tile(self, array: np.ndarray) -> np.ndarray:
+        """Pads a 2D array with NaN and reshapes it into (tiles_y, tiles_x, tile, tile)."""
+        t = self.tile_size
+        height, width = array.shape
+        tiles_y, tiles_x = -(-height // t), -(-width // t)
+        padded = np.full((tiles_y * t, tiles_x * t), np.nan, dtype=np.float32)
+        padded[:height, :width] = array
+        return np.ascontiguousarray(
+            padded.reshape(tiles_y, t, tiles_x, t).transpose(0, 2, 1, 3)
+        )
+
+    @contextmanager
+    def key_lock(self, key: str):
+        """
+        Serializes the pull of `key` inside the process, so concurrent requests for a region
+        that is not stored yet pull it from Earth Engine once and the rest read it back.
+        """
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def put(self, key: str, layer: str, array: np.ndarray, bounds: Sequence[float]) -> TiledRaster:
+        """Writes a layer (replacing any previous version) and returns a memory-mapped view of it."""
+        array = np.asarray(array, dtype=np.float32)
+        if array.ndim != 2:
+            raise ValueError("Raster layers must be 2D arrays")
+
+        tiles = self._tile(array)
+        os.makedirs(self.root, exist_ok=True)
+        filename = f"{uuid.uuid4().hex}.npy"
+        path = os.path.join(self.root, filename)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as fh:
+            np.save(fh, tiles)
+        os.replace(tmp_path, path)
+        # Mapped before it is indexed: an eviction by another process cannot pull it away
+        mapped = np.load(path, mmap_mode="r")
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            old = conn.execute(
+                "SELECT path FROM rasters WHERE key = ? AND layer = ?", (key, layer)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO rasters "
+                "(key, layer, path, height, width, bounds, nbytes, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    layer,
+                    filename,
+                    array.shape[0],
+                    array.shape[1],
+                    json.dumps([float(b) for b in bounds]),
+                    os.path.getsize(path),
+                    now,
+                    now,
+                ),
+            )
+            conn.commit()
+            if old:
+                self._remove_file(old[0])
+            self._evict(conn, keep=key)
+        finally:
+            conn.close()
+
+        return TiledRaster(mapped, array.shape[0], array.shape[1], tuple(bounds))
+
+    def get(self, key: str, layer: str) -> Optional[TiledRaster]:
+        """Memory-mapped view of a stored layer, or None if it is not cached."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT path, height, width, bounds FROM rasters WHERE key = ? AND layer = ?",
+                (key, layer),
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                tiles = np.load(os.path.join(self.root, row[0]), mmap_mode="r")
+            except FileNotFoundError:
+                conn.execute("DELETE FROM rasters WHERE key = ? AND layer = ?", (key, layer))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE rasters SET last_access = ? WHERE key = ? AND layer = ?",
+                (time.time(), key, layer),
+            )
+            conn.commit()
+            return TiledRaster(tiles, row[1], row[2], tuple(json.loads(row[3])))
+        finally:
+            conn.close()
+
+    def has(self, key: str, layers: Sequence[str]) -> bool:
+        conn = self._connect()
+        try:
+            placeholders = ",".join("?" for _ in layers)
+            count = conn.execute(
+                f"SELECT COUNT(*) FROM rasters WHERE key = ? AND layer IN ({placeholders})",
+                (key, *layers),
+            ).fetchone()[0]
+            return count == len(set(layers))
+        finally:
+            conn.close()
+
+    def usage(self) -> int:
+        """Bytes used by the stored layers."""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM rasters").fetchone()[0]
+        finally:
+            conn.close()
+
+    def _remove_file(self, filename: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, filename))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> None:
+        """
+        Drops least recently accessed layers until the store fits in the disk budget. Layers of
+        `keep` (the key being written) are never dropped: its layers are written one by one and
+        are used together, so the store may stay over budget until another key can go.
+        """
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM rasters").fetchone()[0]
+        if total <= self.disk_budget:
+            return
+        rows = conn.execute(
+            "SELECT key, layer, path, nbytes FROM rasters ORDER BY last_access ASC"
+        ).fetchall()
+        for key, layer, path, nbytes in rows:
+            if total <= self.disk_budget:
+                break
+            if key == keep:
+                continue
+            conn.execute("DELETE FROM rasters WHERE key = ? AND layer = ?", (key, layer))
+            conn.commit()
+            # Open memory maps stay valid after the file is unlinked
+            self._remove_file(path)
+            total -= nbytes
+
+
+_store: Optional[RasterStore] = None
+_store_lock = threading.Lock()
+
+
+def get_raster_store() -> RasterStore:
+    """Process-wide raster store configured from the environment."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RasterStore(
+                root=os.getenv("RASTER_STORE_DIR", DEFAULT_ROOT),
+                tile_size=int(os.getenv("RASTER_STORE_TILE_SIZE", "256")),
+                disk_budget=int(float(os.getenv("RASTER_STORE_BUDGET_MB", "1024")) * 1024 * 1024),
+            )
+        return _store
@@ -0,0 +1,237 @@
+# utils/scenario.py
+#
+# Cumulative scenarios: several interventions (any mix of industrial, residential_real and
+# green_real polygons) composed into ONE simulated image and reported together, so a park drawn
+# next to a new residential block shows their combined effect.
+#
+# - Edits are painted in the order they are added; where polygons overlap, the later edit wins
+#   (its NDVI target and LST/AQ extras replace the earlier ones). The LST/AQ models then run once
+#   on the composite NDVI, so every pixel is simulated exactly once.
+# - With an industrial edit, the calibrated LST/AQ regressions apply everywhere except inside
+#   the other edits, which keep the default model as in simulate-polygons. Adding a residential
+#   or green polygon therefore never changes the model of the pixels it does not cover.
+# - The combined report covers the union of the edits, buffered by `report_buffer_m`, and is
+#   evaluated in a single getInfo (plus calibration the first time, if an edit is industrial).
+# - The composite after each prefix of edits is cached per worker, so adding one more polygon
+#   to a scenario only paints the new edit on top of the cached composite. A combination that
+#   was already evaluated is answered from the report cache without any Earth Engine call.
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .ee_metrics import call_site
+from .geo_backend import ee
+from .geo_cache import region_key, scenario_composite_cache, scenario_report_cache
+from .geoprocessor import GeoAnalytics
+
+# Simulated layers, each served through one map ID
+SIM_LAYERS = ("temp", "ndvi", "aq")
+
+
+class Scenario:
+    """
+    Ordered set of edits over the baseline of one region, simulated as a single composite.
+    """
+
+    def __init__(self, latitude: float, longitude: float, buffer: int = 50000, report_buffer_m: int = 1000):
+        self.analyzer = GeoAnalytics(latitude=latitude, longitude=longitude, buffer=buffer)
+        self.report_buffer_m = report_buffer_m
+        self._edits: List[Dict[str, Any]] = []
+        self._base_key = region_key(latitude, longitude, buffer) + (
+            self.analyzer._baseline_end_date().isoformat(),
+        )
+        # Edits taken from a cached composite in the last run()
+        self.reused_edits = 0
+
+    def add(
+        self,
+        geojson_area: Dict[str, Any],
+        preset: Union[str, Tuple[str, Dict[str, Any]]],
+        calibrate: bool = False,
+        temp_industry: float = 0,
+        aq_industry: float = 0,
+    ) -> int:
+        """Appends one edit on top of the previous ones; returns its position in the scenario."""
+        if geojson_area.get("type") not in ("Polygon", "MultiPolygon"):
+            raise ValueError("Scenario edits must be Polygon or MultiPolygon geometries")
+        edit = {
+            "geojson_area": geojson_area,
+            "preset": preset,
+            "calibrate": calibrate,
+            "temp_industry": temp_industry,
+            "aq_industry": aq_industry,
+        }
+        edit["key"] = hashlib.sha1(
+            json.dumps(
+                [geojson_area, preset, temp_industry, aq_industry], sort_keys=True, default=str
+            ).encode("utf-8")
+        ).hexdigest()
+        self._edits.append(edit)
+        return len(self._edits) - 1
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def _prefix_keys(self) -> List[Tuple]:
+        """Cache key of the composite after each prefix of edits (1..n)."""
+        keys = [e["key"] for e in self._edits]
+        return [self._base_key + tuple(keys[: n + 1]) for n in range(len(keys))]
+
+    def _paint_edit(self, state: Dict[str, ee.Image], edit: Dict[str, Any], ndvi_p: ee.Image) -> Dict[str, ee.Image]:
+        modifiers = self.analyzer._preset_modifiers(edit["preset"], edit["temp_industry"], edit["aq_industry"])
+        if modifiers is None:
+            raise ValueError(f"Invalid preset for scenario edit: {edit['preset']}")
+        band, ndvi_adj, lst_extra, aq_extra = modifiers
+
+        mask = ee.Image(0).paint(ee.Geometry(edit["geojson_area"]), 1)
+        ndvi_target = ndvi_p.select(band).clamp(0, 1).add(ndvi_adj).clamp(0, 1)
+        return {
+            "ndvi": state["ndvi"].where(mask, ndvi_target),
+            "lst_extra": state["lst_extra"].where(mask, ee.Image.constant(lst_extra)),
+            "aq_extra": state["aq_extra"].where(mask, ee.Image.constant(aq_extra)),
+            "default_model": state["default_model"].where(mask, ee.Image.constant(0 if edit["calibrate"] else 1)),
+        }
+
+    def _composite(self, keys: List[Tuple]) -> Dict[str, ee.Image]:
+        """Composite of every edit, built on the longest cached prefix."""
+        state, start = None, 0
+        for n in range(len(keys), 0, -1):
+            state = scenario_composite_cache.get(keys[n - 1])
+            if state is not None:
+                start = n
+                break
+        if state is None:
+            state = {
+                "ndvi": self.analyzer.ndvi,
+                "lst_extra": ee.Image.constant(0),
+                "aq_extra": ee.Image.constant(0),
+                "default_model": ee.Image.constant(0),
+            }
+
+        self.reused_edits = start
+        ndvi_p = self.analyzer._ndvi_percentiles_for_month(self.analyzer._month("2025-05-01"))
+        for n in range(start, len(keys)):
+            state = self._paint_edit(state, self._edits[n], ndvi_p)
+            scenario_composite_cache.set(keys[n], state)
+        return state
+
+    def _footprint(self) -> ee.Geometry:
+        """Union of the edits as one MultiPolygon (buffering it buffers every edit)."""
+        polygons = []
+        for edit in self._edits:
+            area = edit["geojson_area"]
+            polygons.extend([area["coordinates"]] if area["type"] == "Polygon" else area["coordinates"])
+        return ee.Geometry.MultiPolygon(polygons)
+
+    def _layers(self, reg_coefs: Optional[Dict[str, List[float]]]) -> Tuple[Dict[str, Any], ee.Geometry]:
+        """Simulated layers of the composite (calibrated with `reg_coefs` if given) and the footprint."""
+        composite = self._composite(self._prefix_keys())
+        footprint = self._footprint()
+        mask = ee.Image(0).paint(footprint, 1)
+        default_model = None if all(edit["calibrate"] for edit in self._edits) else composite["default_model"]
+        layers = self.analyzer._simulated_layers(
+            mask, composite["ndvi"], composite["lst_extra"], composite["aq_extra"], reg_coefs, default_model
+        )
+        return layers, footprint
+
+    def _per_polygon_round_trips(self, calibration_round_trips: int) -> int:
+        """
+        Round trips of simulate-polygons on the same edits: one report and one map per simulated
+        layer for every polygon, after the same calibration.
+        """
+        return len(self._edits) * (1 + len(SIM_LAYERS)) + calibration_round_trips
+
+    @call_site("scenario")
+    def run(self) -> Dict[str, Any]:
+        """
+        Simulates the scenario and returns its combined report and tile URLs (same entry shape as
+        simulate-polygons), plus whether it came from the cache and how many edits were reused.
+        """
+        if not self._edits:
+            raise ValueError("A scenario needs at least one edit")
+        analyzer = self.analyzer
+
+        calibrate = any(edit["calibrate"] for edit in self._edits)
+        calibration_round_trips = 0
+        if calibrate:
+            try:
+                calibration_round_trips = analyzer.calibrate_precision()
+            except Exception as e:
+                print(f"Fine tunning fail, using simple model: {e}")
+        reg_coefs = analyzer.reg_coefs if calibrate else None
+
+        keys = self._prefix_keys()
+        report_key = keys[-1] + (self.report_buffer_m, json.dumps(reg_coefs, sort_keys=True))
+        cached = scenario_report_cache.get(report_key)
+        if cached is not None:
+            entry = copy.deepcopy(cached)
+            per_polygon = self._per_polygon_round_trips(calibration_round_trips)
+            entry["report"]["round_trips"] = {
+                "used": calibration_round_trips,
+                "saved": max(per_polygon - calibration_round_trips, 0),
+            }
+            entry.update({"cached": True, "reused_edits": len(self._edits)})
+            self.reused_edits = len(self._edits)
+            print(f"Scenario of {len(self._edits)} edits served from cache", flush=True)
+            return entry
+
+        layers, footprint = self._layers(reg_coefs)
+        print(f"🛡️ Simulation Strategy Used: {layers['model']}")
+
+        area = footprint.buffer(self.report_buffer_m) if self.report_buffer_m else footprint
+        base_stats = {
+            "temp_c_mean": analyzer._mean(analyzer.temp_image, 100, area),
+            "ndvi_mean": analyzer._mean(analyzer.ndvi, 20, area),
+            "aq_mean": analyzer._mean(analyzer.aq_index, 100, area),
+        }
+        post_stats = {
+            "temp_c_mean": analyzer._mean(layers["temp"], 1000, area),
+            "ndvi_mean": analyzer._mean(layers["ndvi"], 20, area),
+            "aq_mean": analyzer._mean(layers["aq"], 5000, area),
+        }
+        values, round_trips = analyzer._evaluate_report(base_stats, post_stats)
+        round_trips += calibration_round_trips
+
+        urls: Dict[str, Any] = {f"sim_{layer}_url": None for layer in SIM_LAYERS}
+        vis_params = {"temp": analyzer.temp_vis_params, "ndvi": analyzer.ndvi_vis_params, "aq": analyzer.aq_vis_params}
+        try:
+            for layer in SIM_LAYERS:
+                round_trips += 1
+                urls[f"sim_{layer}_url"] = analyzer.get_tile_url(layers[layer], vis_params[layer])
+        except Exception as e:
+            print("Warning: failed to generate scenario tile URLs:", e)
+
+        # Simulating the edits one by one costs more round trips and misses their interaction
+        report = analyzer._build_report(
+            "scenario",
+            values,
+            round_trips,
+            self._per_polygon_round_trips(calibration_round_trips),
+            include_metrics=calibrate,
+        )
+        report["model"] = layers["model"]
+        report["overlap"] = "last_wins"
+        report["edits"] = [
+            {
+                "index": i,
+                "preset": e["preset"] if isinstance(e["preset"], str) else e["preset"][0],
+                "model": "COMPLEX" if reg_coefs is not None and e["calibrate"] else "DEFAULT",
+            }
+            for i, e in enumerate(self._edits)
+        ]
+        entry: Dict[str, Any] = {"report": report, **urls}
+
+        if all(entry[k] is not None for k in ("sim_temp_url", "sim_ndvi_url", "sim_aq_url")):
+            scenario_report_cache.set(report_key, copy.deepcopy(entry))
+
+        print(
+            f"Scenario: {len(self._edits)} edits ({self.reused_edits} from cache), "
+            f"{round_trips} round trips",
+            flush=True,
+        )
+        entry.update({"cached": False, "reused_edits": self.reused_edits})
+        return entry
@@ -0,0 +1,109 @@
+# utils/tile_renderer.py
+#
+# Renders XYZ (Web Mercator) PNG tiles locally from cached rasters using the
+# min/max/palette visualization parameters from _GA_CFG["vis"].
+
+import io
+import math
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+from .geo_cache import GeoCache
+
+TILE_SIZE = 256
+LUT_SIZE = 256
+
+# Layer name -> visualization key in _GA_CFG["vis"]
+LAYER_VIS = {
+    "temp": "temp",
+    "ndvi": "ndvi",
+    "aq": "aq",
+    "sim_temp": "temp",
+    "sim_ndvi": "ndvi",
+    "sim_aq": "aq",
+}
+
+# Rendered PNGs per (raster key, layer, z, x, y)
+tile_cache = GeoCache(
+    maxsize=int(os.getenv("TILE_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("TILE_CACHE_TTL", "3600")),
+)
+
+
+def _hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    color = color.lstrip("#")
+    return tuple(int(color[i : i + 2], 16) for i in (0, 2, 4))
+
+
+@lru_cache(maxsize=16)
+def _lut(palette: Tuple[str, ...]) -> np.ndarray:
+    """(LUT_SIZE, 4) RGBA table interpolating the palette linearly, like Earth Engine does."""
+    colors = np.array([_hex_to_rgb(c) for c in palette], dtype=float)
+    stops = np.linspace(0.0, 1.0, len(colors))
+    positions = np.linspace(0.0, 1.0, LUT_SIZE)
+    lut = np.empty((LUT_SIZE, 4), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.round(np.interp(positions, stops, colors[:, channel]))
+    lut[:, 3] = 255
+    return lut
+
+
+def build_lut(vis: Dict[str, Any]) -> np.ndarray:
+    return _lut(tuple(vis["palette"]))
+
+
+def tile_lonlat(z: int, x: int, y: int, size: int = TILE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Longitudes (per column) and latitudes (per row) of the pixel centers of an XYZ tile."""
+    n = 2.0 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lons = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * (y + offsets) / n))))
+    return lons, lats
+
+
+def colorize(values: np.ndarray, vis: Dict[str, Any]) -> np.ndarray:
+    """Maps values to RGBA through the precomputed lookup table; NaN pixels are transparent."""
+    vmin, vmax = float(vis["min"]), float(vis["max"])
+    scaled = (values - vmin) / (vmax - vmin) * (LUT_SIZE - 1)
+    valid = np.isfinite(scaled)
+    index = np.clip(np.nan_to_num(scaled, nan=0.0), 0, LUT_SIZE - 1).astype(np.uint8)
+    rgba = build_lut(vis)[index]
+    rgba[~valid, 3] = 0
+    return rgba
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    # A (rows, cols, 4) uint8 array is read as RGBA
+    Image.fromarray(rgba).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_tile(raster, vis: Dict[str, Any], z: int, x: int, y: int) -> bytes:
+    """Renders one XYZ tile of a TiledRaster as PNG bytes."""
+    lons, lats = tile_lonlat(z, x, y)
+    west, south, east, north = raster.bounds
+    if lons[-1] < west or lons[0] > east or lats[0] < south or lats[-1] > north:
+        values = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+    else:
+        grid_lons = np.broadcast_to(lons[None, :], (TILE_SIZE, TILE_SIZE))
+        grid_lats = np.broadcast_to(lats[:, None], (TILE_SIZE, TILE_SIZE))
+        values = raster.sample(grid_lons, grid_lats)
+    return encode_png(colorize(values, vis))
+
+
+def get_tile(
+    raster_key: str, layer: str, load_raster: Callable[[], Any], vis: Dict[str, Any], z: int, x: int, y: int
+) -> bytes:
+    """
+    Rendered tile from the LRU tile cache. Only a miss calls `load_raster()` (the raster
+    store lookup) and renders; a cached tile touches neither the store nor Earth Engine.
+    """
+    return tile_cache.get_or_create(
+        (raster_key, layer, z, x, y), lambda: render_tile(load_raster(), vis, z, x, y)
+    )
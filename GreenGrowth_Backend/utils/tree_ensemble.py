@@ -0,0 +1,271 @@
+# utils/tree_ensemble.py
+#
+# Pickle-free format for the industry model (StandardScaler + GradientBoostingRegressor, see
+# utils/industry.py) and a pure-NumPy evaluator for it. Loading and predicting need neither
+# scikit-learn nor pickle, so a worker starts without importing sklearn.
+#
+# Layout: one uncompressed .npz. Every member is stored (not deflated), so load() maps it with
+# np.memmap and gunicorn workers share the pages through the page cache.
+#   mean, scale             scaler parameters (float64, n_features)
+#   feature, threshold      split of every node of every tree, concatenated (int32 / float64)
+#   child                   global index of each node's left child; the right child is the next
+#                           node (siblings are renumbered next to each other). A leaf points to
+#                           itself with threshold +inf, so extra traversal steps keep it in place
+#   value                   leaf value of every node (float64)
+#   roots                   index of each tree's root node, in stage order
+#   params                  init (baseline prediction), learning_rate, max_depth, n_features
+#   meta                    UTF-8 JSON (source model, sklearn version, export time)
+#
+# Predictions follow sklearn exactly: the scaled input is cast to float32 before the splits are
+# compared (like sklearn's trees do) and the raw prediction is init + learning_rate * sum(leaves).
+
+import json
+import os
+import time
+import zipfile
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+_ARRAYS = ("mean", "scale", "feature", "threshold", "child", "value", "roots", "params", "meta")
+
+# Size of the (rows, trees) node-index matrix evaluated at once: small enough to stay in cache
+PREDICT_CHUNK_NODES = 16384
+
+
+def _split_pipeline(model: Any):
+    """(scaler or None, gradient boosting regressor) of a Pipeline or a bare regressor."""
+    steps = [step for _, step in model.steps] if hasattr(model, "steps") else [model]
+    scaler = None
+    for step in steps[:-1]:
+        if type(step).__name__ != "StandardScaler" or scaler is not None:
+            raise ValueError(f"Unsupported pipeline step: {type(step).__name__}")
+        scaler = step
+    regressor = steps[-1]
+    if type(regressor).__name__ != "GradientBoostingRegressor":
+        raise ValueError(f"Unsupported model: {type(regressor).__name__}")
+    return scaler, regressor
+
+
+def _sibling_order(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+    """Breadth-first node order of one sklearn tree in which every right child follows its left one."""
+    order = [0]
+    for node in order:
+        if children_left[node] != -1:
+            order.extend((children_left[node], children_right[node]))
+    return np.asarray(order, dtype=np.int64)
+
+
+class TreeEnsemble:
+    """
+    Flattened scaler + gradient boosted trees. `predict` matches the sklearn model it was built
+    from (to float rounding, well below 1e-9).
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        # Plain ndarray views (still backed by the mapped file): np.memmap slows down indexing
+        self.mean = np.asarray(arrays["mean"])
+        self.scale = np.asarray(arrays["scale"])
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.child = np.asarray(arrays["child"])
+        self.value = np.asarray(arrays["value"])
+        self.roots = np.asarray(arrays["roots"])
+        init, learning_rate, max_depth, n_features = (float(v) for v in arrays["params"])
+        self.init = init
+        self.learning_rate = learning_rate
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.meta = json.loads(bytes(arrays["meta"]).decode("utf-8"))
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.roots.shape[0])
+
+    @property
+    def n_nodes(self) -> int:
+        return int(self.feature.shape[0])
+
+    # ------------------------------------------------------------ build / save / load
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "TreeEnsemble":
+        """Flattens a Pipeline(StandardScaler, GradientBoostingRegressor) or a bare regressor."""
+        scaler, gbr = _split_pipeline(model)
+        n_features = int(gbr.n_features_in_)
+
+        mean = np.zeros(n_features)
+        scale = np.ones(n_features)
+        if scaler is not None:
+            if getattr(scaler, "mean_", None) is not None:
+                mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if getattr(scaler, "scale_", None) is not None:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in gbr.estimators_[:, 0]:
+            tree = estimator.tree_
+            order = _sibling_order(tree.children_left, tree.children_right)
+            new_id = np.empty_like(order)
+            new_id[order] = np.arange(order.shape[0])
+
+            left = tree.children_left[order]
+            leaf = left == -1
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature[order]).astype(np.int32))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold[order]).astype(np.float64))
+            children.append((np.where(leaf, np.arange(order.shape[0]), new_id[left]) + offset).astype(np.int32))
+            values.append(tree.value[order, 0, 0].astype(np.float64))
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += order.shape[0]
+
+        # Baseline (the init estimator's constant) through the model itself
+        init = float(gbr._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0])
+
+        import sklearn
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "source": type(model).__name__,
+            "estimator": type(gbr).__name__,
+            "sklearn_version": sklearn.__version__,
+            "n_estimators": len(roots),
+            "exported_at": time.time(),
+        }
+        return cls(
+            {
+                "mean": mean,
+                "scale": scale,
+                "feature": np.concatenate(features),
+                "threshold": np.concatenate(thresholds),
+                "child": np.concatenate(children),
+                "value": np.concatenate(values),
+                "roots": np.asarray(roots, dtype=np.int32),
+                "params": np.asarray([init, float(gbr.learning_rate), max_depth, n_features], dtype=np.float64),
+                "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            }
+        )
+
+    def save(self, path: str) -> None:
+        """Writes the uncompressed .npz; replaces an existing file atomically."""
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, **{name: np.ascontiguousarray(self.arrays[name]) for name in _ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "TreeEnsemble":
+        """Loads an exported ensemble; with `mmap` every array is a read-only view of the file."""
+        if not mmap:
+            with np.load(path, allow_pickle=False) as npz:
+                return cls({name: npz[name] for name in _ARRAYS})
+        return cls(_mmap_npz(path))
+
+    # ------------------------------------------------------------ predict
+
+    def _leaf_sum(self, x32: np.ndarray) -> np.ndarray:
+        """Sum of the leaf values reached by each row over every tree."""
+        flat = x32.ravel()
+        row_offset = (np.arange(x32.shape[0], dtype=np.int64) * x32.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots.astype(np.int64), (x32.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            values = flat.take(row_offset + self.feature.take(nodes))
+            # Right child when the split fails; a leaf's +inf threshold keeps it in place
+            nodes = self.child.take(nodes) + (values > self.threshold.take(nodes))
+        return self.value.take(nodes).sum(axis=1)
+
+    def predict(self, x) -> np.ndarray:
+        """Predictions (float64) for a (rows, n_features) matrix."""
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 1:
+            x = x[None, :]
+        if x.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {x.shape[1]}")
+
+        # Same operations as StandardScaler.transform, then the float32 cast of sklearn's trees
+        x32 = ((x - self.mean) / self.scale).astype(np.float32)
+        out = np.empty(x.shape[0])
+        rows = max(1, PREDICT_CHUNK_NODES // max(self.n_trees, 1))
+        for start in range(0, x.shape[0], rows):
+            chunk = x32[start : start + rows]
+            out[start : start + chunk.shape[0]] = self.init + self.learning_rate * self._leaf_sum(chunk)
+        return out
+
+
+def mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Maps every stored member of an uncompressed .npz with np.memmap (np.load cannot)."""
+    arrays: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as fh:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: member '{name}' is compressed and cannot be memory-mapped")
+            # Local file header: 30 bytes + file name + extra field, then the .npy file
+            fh.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(fh.read(4), dtype="<u2")
+            fh.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+            if dtype.hasobject:
+                raise ValueError(f"{path}: member '{name}' holds Python objects")
+            arrays[name] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=fh.tell(),
+                shape=shape,
+                order="F" if fortran_order else "C",
+            )
+    return arrays
+
+
+def _mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Memory-mapped arrays of an exported ensemble."""
+    arrays = mmap_npz(path)
+    missing = [name for name in _ARRAYS if name not in arrays]
+    if missing:
+        raise ValueError(f"{path}: not a tree ensemble (missing {', '.join(missing)})")
+    return arrays
+
+
+def _probe_rows(ensemble: TreeEnsemble, rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Inputs that reach both sides of many splits: every feature is drawn around the model's own
+    thresholds (mapped back to the unscaled space).
+    """
+    rng = np.random.default_rng(seed)
+    x = np.zeros((rows, ensemble.n_features))
+    is_split = ensemble.child != np.arange(ensemble.n_nodes)
+    for f in range(ensemble.n_features):
+        thresholds = ensemble.threshold[is_split & (ensemble.feature == f)]
+        if thresholds.size == 0:
+            thresholds = np.zeros(1)
+        scaled = rng.choice(thresholds, rows) + rng.normal(0, 0.05, rows)
+        x[:, f] = scaled * ensemble.scale[f] + ensemble.mean[f]
+    return x
+
+
+def export_tree_ensemble(model: Any, path: str, check_rows: int = 2000, x: Optional[np.ndarray] = None) -> Dict:
+    """
+    Exports `model` to `path` and checks the exported ensemble against it on `x` (or on probe
+    rows around its split thresholds). Returns the metadata plus the largest absolute difference.
+    """
+    ensemble = TreeEnsemble.from_sklearn(model)
+    ensemble.save(path)
+
+    loaded = TreeEnsemble.load(path)
+    probe = x if x is not None else _probe_rows(loaded, check_rows)
+    max_abs_diff = float(np.max(np.abs(loaded.predict(probe) - model.predict(probe)))) if len(probe) else 0.0
+    return {
+        **loaded.meta,
+        "n_nodes": loaded.n_nodes,
+        "bytes": os.path.getsize(path),
+        "checked_rows": int(len(probe)),
+        "max_abs_diff": max_abs_diff,
+    }
@@ -1,92 +1,185 @@
-import ee
-import math
+# utils/wind.py
+#
+# Wind speeds (m/s) around a point at the 1/5/10 km dispersion radii used by the industry model.
+#
+# The speed image is the ERA5-Land monthly aggregate of one month (a single image instead of
+# ~720 hourly ones), and every radius of every point is reduced with one reduceRegions over
+# concentric buffers. Results are memoized per quantized coordinate and month in a bounded
+# process-wide cache, so every polygon of a request (and every request in the same area) shares
+# one Earth Engine call. Points covered by the offline climatology grid (utils/wind_grid.py,
+# `flask export-wind-grid`) are answered locally without any call.
+
+from __future__ import annotations
+
+import os
 from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
 from dotenv import load_dotenv
-import os
+
+from .ee_metrics import call_site
+from .geo_backend import ee, evaluate
+from .geo_cache import GeoCache, wind_cache
 
 load_dotenv()
 
+DATASET_ID = "ECMWF/ERA5_LAND/MONTHLY_AGGR"
+DISPERSION_RADII = (1000, 5000, 10000)  # Radius in meters (1km, 5km, 10km)
+
+# ERA5-Land has a ~9 km grid: 2 decimals (~1 km) never changes the reduced value noticeably
+WIND_COORD_PRECISION = int(os.getenv("GEO_WIND_COORD_PRECISION", "2"))
+
+
+def reference_month(today: Optional[date] = None) -> date:
+    """First day of the month one year back, the month the industry model is fed with."""
+    target_date = (today or date.today()) - timedelta(days=365)
+    return target_date.replace(day=1)
+
+
+class WindService:
+    """
+    Memoized, batched wind speeds at DISPERSION_RADII around points.
+    """
+
+    def __init__(self, cache: GeoCache = wind_cache, radii: Sequence[int] = DISPERSION_RADII):
+        self.cache = cache
+        self.radii = tuple(radii)
+
+    @staticmethod
+    def _key(lat: float, lon: float, month: date) -> Tuple[float, float, str]:
+        return (
+            round(float(lat), WIND_COORD_PRECISION),
+            round(float(lon), WIND_COORD_PRECISION),
+            month.isoformat(),
+        )
+
+    @staticmethod
+    def _speed_image(month: date) -> ee.Image:
+        if month.month == 12:
+            end_month = month.replace(year=month.year + 1, month=1)
+        else:
+            end_month = month.replace(month=month.month + 1)
+
+        print(f"📅 Calculating wind speed for {month.strftime('%Y-%m')}")
+        monthly = (
+            ee.ImageCollection(DATASET_ID)
+            .filterDate(month.isoformat(), end_month.isoformat())
+            .select(["u_component_of_wind_10m", "v_component_of_wind_10m"])
+            .mean()
+        )
+        u_mean = monthly.select("u_component_of_wind_10m")
+        v_mean = monthly.select("v_component_of_wind_10m")
+        return u_mean.pow(2).add(v_mean.pow(2)).sqrt().rename("wind_speed")
+
+    def _fetch(self, keys: List[Tuple[float, float, str]]) -> Dict[Tuple[float, float, str], List[float]]:
+        """Speeds of every key with one reduceRegions per month; 0.0 where there is no data."""
+        results: Dict[Tuple[float, float, str], List[float]] = {}
+        by_month: Dict[str, List[Tuple[float, float, str]]] = {}
+        for key in keys:
+            by_month.setdefault(key[2], []).append(key)
+
+        for month, month_keys in by_month.items():
+            rings = ee.FeatureCollection(
+                [
+                    ee.Feature(ee.Geometry.Point([lon, lat]).buffer(radius), {"point": i, "radius": radius})
+                    for i, (lat, lon, _) in enumerate(month_keys)
+                    for radius in self.radii
+                ]
+            )
+            reduced = self._speed_image(date.fromisoformat(month)).reduceRegions(
+                collection=rings, reducer=ee.Reducer.mean(), scale=1000
+            )
+            info = evaluate(reduced.select(["point", "radius", "mean"], None, False)) or {}
+
+            speeds = {key: [0.0] * len(self.radii) for key in month_keys}
+            for feature in info.get("features", []):
+                props = feature.get("properties") or {}
+                value = props.get("mean")
+                if value is None or props.get("point") is None:
+                    continue
+                key = month_keys[int(props["point"])]
+                speeds[key][self.radii.index(int(props["radius"]))] = round(value, 2)
+            results.update(speeds)
+        return results
+
+    def _grid_speeds(
+        self, points: Sequence[Tuple[float, float]], month: date
+    ) -> List[Optional[List[float]]]:
+        """Speeds from the offline climatology grid; None for points it does not cover."""
+        from .wind_grid import get_wind_grid
+
+        grid = get_wind_grid()
+        if grid is None or not points:
+            return [None] * len(points)
+
+        import numpy as np
+
+        lats, lons = zip(*points)
+        values = grid.speeds(lats, lons, month.month, self.radii)
+        return [
+            [round(float(v), 2) for v in row] if np.isfinite(row).all() else None
+            for row in values
+        ]
+
+    @call_site("get_wind_speed")
+    def speeds(
+        self, points: Iterable[Tuple[float, float]], month: Optional[date] = None
+    ) -> List[List[float]]:
+        """
+        Wind speeds [r1, r2, r3] for each (lat, lon), in order. Points covered by the offline grid
+        (utils/wind_grid.py) need no Earth Engine call; cached points cost nothing and all the
+        others are computed together. A point whose evaluation fails gets zeros (not cached).
+        """
+        points = [(float(lat), float(lon)) for lat, lon in points]
+        month = month or reference_month()
+        results = self._grid_speeds(points, month)
+        live = [i for i, value in enumerate(results) if value is None]
+        if not live:
+            return results
+
+        keys = [self._key(points[i][0], points[i][1], month) for i in live]
+        found = {key: self.cache.get(key) for key in set(keys)}
+        missing = [key for key, value in found.items() if value is None]
+        if len(missing) == 1:
+            # Concurrent requests for the same point wait for one computation
+            key = missing[0]
+            try:
+                found[key] = self.cache.get_or_create(key, lambda: self._fetch([key])[key])
+            except Exception as e:
+                print(f"Error GEE computing wind speed: {e}")
+        elif missing:
+            try:
+                fetched = self._fetch(missing)
+                for key, value in fetched.items():
+                    self.cache.set(key, value)
+                found.update(fetched)
+            except Exception as e:
+                print(f"Error GEE computing wind speeds: {e}")
+
+        zeros = [0.0] * len(self.radii)
+        for i, key in zip(live, keys):
+            results[i] = list(found.get(key) or zeros)
+        return results
+
+    def speed(self, lat: float, lon: float, month: Optional[date] = None) -> List[float]:
+        return self.speeds([(lat, lon)], month)[0]
+
+
+# Process-wide service
+wind_service = WindService()
+
+
 def get_wind_speed(lat, lon):
     """
     Obtains wind speed for the industrial prediction model
     """
-
-    point = ee.Geometry.Point([lon, lat])
-    today = date.today()
-    target_date = today - timedelta(days=365)
-    start_month = target_date.replace(day=1)
-    
-    if start_month.month == 12:
-        end_month = start_month.replace(year=start_month.year + 1, month=1)
-    else:
-        end_month = start_month.replace(month=start_month.month + 1)
-        
-    start_date = start_month.isoformat()
-    end_date = end_month.isoformat()
-    # ----------------------------------------------------
-
-    # --- (ERA5_LAND/HOURLY) -----------------------------
-    DATASET_ID = "ECMWF/ERA5_LAND/HOURLY"
-    dataset_full = ee.ImageCollection(DATASET_ID).select(["u_component_of_wind_10m", "v_component_of_wind_10m"])
-    
-    def wind_speed_ee(u, v):
-        return u.pow(2).add(v.pow(2)).sqrt()
-    
-    print(f"📅 Calculating median for {start_month.strftime('%Y-%m')}")
-
-
-
-    dataset_filtered = dataset_full.filterDate(start_date, end_date)
-    mean_image = dataset_filtered.mean() 
-    
-    if mean_image is None:
-        print(f"Data not found in the range provided.")
-        return [0.0, 0.0, 0.0]
-
-    u_mean = mean_image.select("u_component_of_wind_10m")
-    v_mean = mean_image.select("v_component_of_wind_10m")
-    
-    speed_image = wind_speed_ee(u_mean, v_mean)
-
-    DISPERSION_RADII = [1000, 5000, 10000] # Radius in meters (1km, 5km, 10km)
-
-    results_list = []
-    
-    for radius in DISPERSION_RADII:
-        buffered_point = point.buffer(radius) 
-        
-        try:
-            value = speed_image.reduceRegion(
-                reducer=ee.Reducer.mean(), 
-                geometry=buffered_point, 
-                scale=1000,               
-                maxPixels=1e13
-            ).getInfo()
-
-            if value:
-                speed_key = list(value.keys())[0]
-                total_speed = round(value[speed_key], 2)
-                results_list.append(total_speed)
-                print(f"Wind speed in {radius/1000}km radius of: {total_speed} m/s")
-            else:
-                results_list.append(0.0)
-                print(f"Null value in {radius/1000} km radio.")
-
-        except Exception as e:
-            results_list.append(0.0)
-            print(f"Error GEE in radius {radius/1000}km: {e}")
-
-    # 4. Returns the array
-    return results_list
+    wind_data = wind_service.speed(lat, lon)
+    for radius, speed in zip(DISPERSION_RADII, wind_data):
+        print(f"Wind speed in {radius/1000}km radius of: {speed} m/s")
+    return wind_data
 
 
 # Ejemplo de uso (la lat/lon debe ser tu punto de interés)
-# coords = {"lat": 19.4326, "lon": -99.1332} 
+# coords = {"lat": 19.4326, "lon": -99.1332}
 # wind_data = get_wind_speed(coords["lat"], coords["lon"])
-
-#print("\n--------------------------------------------------")
-#print("🌬️ Array final para el Modelo:")
-#print(f"# -- Wind Speed --")
-#print(f"{wind_data[0]},           # Wind Speed 1km Radius")
-#print(f"{wind_data[1]},           # Wind Speed 5km Radius")
-#print(f"{wind_data[2]}            # Wind Speed 10km Radius")
\ No newline at end of file
+# many = wind_service.speeds([(19.4326, -99.1332), (25.6866, -100.3161)])
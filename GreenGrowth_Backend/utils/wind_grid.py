@@ -0,0 +1,251 @@
+# utils/wind_grid.py
+#
+# Offline monthly wind-speed climatology for the industry model. `flask export-wind-grid` pulls
+# the ERA5-Land monthly means of a region (or the whole land surface) once, and WindService then
+# answers points from the memory-mapped grid with no Earth Engine call. Cells without data
+# (sea, outside the exported bounds) are NaN and fall back to the live service.
+#
+# Layout (WIND_GRID_PATH, default data/wind_grid.npz): one uncompressed .npz, replaced in a
+# single step so the data and its georeferencing always come from the same export.
+#   data   float16 array (12, rows, cols): mean 10 m wind speed (m/s) per calendar month at the
+#          cell centers of a regular lat/lon grid, north to south (memory-mapped)
+#   meta   UTF-8 JSON: bounds (west, south, east, north), resolution, shape, years and dataset
+#
+# The speed at a radius is the mean of bilinear samples spread uniformly over the disk, so the
+# 1/5/10 km values of thousands of points come out of a few vectorized NumPy operations.
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_PATH = os.path.join(BASE_DIR, "data", "wind_grid.npz")
+
+DATASET_ID = "ECMWF/ERA5_LAND/MONTHLY_AGGR"
+METERS_PER_DEGREE = 111320.0
+# Land surface covered by ERA5-Land
+GLOBAL_BOUNDS = (-180.0, -60.0, 180.0, 84.0)
+
+# Points per disk used for the area mean of one radius
+DISK_SAMPLES = 16
+_NODATA = -9999.0
+# Seconds before a worker tries again to load a grid that failed to load
+LOAD_RETRY_S = 60.0
+
+# (west, south, east, north) in degrees
+Bounds = Tuple[float, float, float, float]
+
+
+def _disk_offsets(samples: int = DISK_SAMPLES) -> Tuple[np.ndarray, np.ndarray]:
+    """Unit-disk offsets (x, y) on a golden-angle spiral: equal area per sample."""
+    k = np.arange(samples, dtype=float)
+    r = np.sqrt((k + 0.5) / samples)
+    angle = k * 2.399963
+    return r * np.cos(angle), r * np.sin(angle)
+
+
+class WindGrid:
+    """
+    Read-only view over an exported climatology. Lookups read only the pages they touch.
+    """
+
+    def __init__(self, data: np.ndarray, bounds: Bounds, resolution: float, meta: Optional[Dict] = None):
+        self.data = data  # (12, rows, cols)
+        self.bounds = tuple(float(b) for b in bounds)
+        self.resolution = float(resolution)
+        self.meta = meta or {}
+        self._offsets = _disk_offsets()
+
+    @classmethod
+    def load(cls, path: str) -> "WindGrid":
+        from .tree_ensemble import mmap_npz
+
+        arrays = mmap_npz(path)
+        if "data" not in arrays or "meta" not in arrays:
+            raise ValueError(f"{path}: not a wind grid (needs 'data' and 'meta')")
+        meta = json.loads(bytes(arrays["meta"]).decode("utf-8"))
+        data = arrays["data"]
+        if data.ndim != 3 or list(data.shape) != list(meta["shape"]):
+            raise ValueError(f"{path}: grid shape {data.shape} does not match its metadata {meta['shape']}")
+        return cls(data, meta["bounds"], meta["resolution"], meta)
+
+    def _bilinear(self, month_index: int, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Bilinear value between the four surrounding cell centers, ignoring NaN neighbours."""
+        west, _, _, north = self.bounds
+        _, rows, cols = self.data.shape
+        fy = (north - lats) / self.resolution - 0.5
+        fx = (lons - west) / self.resolution - 0.5
+        inside = (fy > -1) & (fy < rows) & (fx > -1) & (fx < cols)
+
+        y0 = np.floor(fy).astype(np.int64)
+        x0 = np.floor(fx).astype(np.int64)
+        wy, wx = fy - y0, fx - x0
+        layer = self.data[month_index]
+
+        total = np.zeros(lats.shape)
+        weight = np.zeros(lats.shape)
+        for dy, dx, w in ((0, 0, (1 - wy) * (1 - wx)), (0, 1, (1 - wy) * wx), (1, 0, wy * (1 - wx)), (1, 1, wy * wx)):
+            yy = np.clip(y0 + dy, 0, rows - 1)
+            xx = np.clip(x0 + dx, 0, cols - 1)
+            values = np.asarray(layer[yy, xx], dtype=float)
+            valid = np.isfinite(values) & inside
+            total += np.where(valid, values * w, 0.0)
+            weight += np.where(valid, w, 0.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(weight > 0, total / weight, np.nan)
+
+    def speeds(
+        self, lats: Sequence[float], lons: Sequence[float], month: int, radii: Sequence[int]
+    ) -> np.ndarray:
+        """
+        Mean wind speed (m/s) within each radius (m) around each point: array (points, radii).
+        NaN where the grid has no data around the point.
+        """
+        lats = np.asarray(lats, dtype=float)[:, None]
+        lons = np.asarray(lons, dtype=float)[:, None]
+        ox, oy = self._offsets
+        cos_lat = np.maximum(np.cos(np.radians(lats)), 1e-6)
+
+        out = np.empty((lats.shape[0], len(radii)))
+        for i, radius in enumerate(radii):
+            sample_lats = lats + oy[None, :] * radius / METERS_PER_DEGREE
+            sample_lons = lons + ox[None, :] * radius / (METERS_PER_DEGREE * cos_lat)
+            values = self._bilinear(month - 1, sample_lats, sample_lons)
+            valid = np.isfinite(values)
+            counts = valid.sum(axis=1)
+            sums = np.where(valid, values, 0.0).sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                # Half the disk without data (coast) is not an area mean anymore
+                out[:, i] = np.where(counts * 2 >= values.shape[1], sums / counts, np.nan)
+        return out
+
+
+def write_wind_grid(path: str, data: np.ndarray, bounds: Bounds, resolution: float, **meta) -> None:
+    """Writes a (12, rows, cols) climatology and its metadata; replaces an existing grid atomically."""
+    if data.ndim != 3 or data.shape[0] != 12:
+        raise ValueError("Wind grid data must have shape (12, rows, cols)")
+    meta = {"bounds": list(bounds), "resolution": resolution, "shape": list(data.shape), **meta}
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp.npz"
+    try:
+        np.savez(
+            tmp,
+            data=np.asarray(data, dtype=np.float16),
+            meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+        )
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _climatology_image(years: Tuple[int, int]):
+    """12-band image (m01..m12) of the mean monthly 10 m wind speed over `years`."""
+    from .geo_backend import ee
+
+    collection = (
+        ee.ImageCollection(DATASET_ID)
+        .filterDate(f"{years[0]}-01-01", f"{years[1] + 1}-01-01")
+        .select(["u_component_of_wind_10m", "v_component_of_wind_10m"])
+    )
+    image = None
+    for month in range(1, 13):
+        monthly = collection.filter(ee.Filter.calendarRange(month, month, "month")).mean()
+        speed = (
+            monthly.select("u_component_of_wind_10m").pow(2)
+            .add(monthly.select("v_component_of_wind_10m").pow(2))
+            .sqrt()
+            .toFloat()
+            .unmask(_NODATA)
+            .rename(f"m{month:02d}")
+        )
+        image = speed if image is None else image.addBands(speed)
+    return image
+
+
+def export_wind_grid(
+    path: str,
+    bounds: Bounds = GLOBAL_BOUNDS,
+    resolution: float = 0.1,
+    years: Tuple[int, int] = (2015, 2024),
+    chunk: int = 256,
+    progress: Callable[[str], None] = print,
+) -> Dict:
+    """
+    Pulls the monthly climatology of `bounds` at `resolution` degrees with one computePixels per
+    chunk x chunk window and writes it to `path`. Returns the metadata written.
+    """
+    from .geo_backend import compute_pixels
+
+    west, south, east, north = bounds
+    cols = int(round((east - west) / resolution))
+    rows = int(round((north - south) / resolution))
+    if rows <= 0 or cols <= 0:
+        raise ValueError(f"Empty bounds: {bounds}")
+
+    image = _climatology_image(years)
+    data = np.full((12, rows, cols), np.nan, dtype=np.float16)
+    windows = [(r, c) for r in range(0, rows, chunk) for c in range(0, cols, chunk)]
+    start = time.perf_counter()
+    for n, (r0, c0) in enumerate(windows, 1):
+        height, width = min(chunk, rows - r0), min(chunk, cols - c0)
+        pixels = compute_pixels(
+            {
+                "expression": image,
+                "fileFormat": "NUMPY_NDARRAY",
+                "grid": {
+                    "dimensions": {"width": width, "height": height},
+                    "affineTransform": {
+                        "scaleX": resolution,
+                        "shearX": 0,
+                        "translateX": west + c0 * resolution,
+                        "shearY": 0,
+                        "scaleY": -resolution,
+                        "translateY": north - r0 * resolution,
+                    },
+                    "crsCode": "EPSG:4326",
+                },
+            }
+        )
+        for month in range(1, 13):
+            values = np.asarray(pixels[f"m{month:02d}"], dtype=np.float32)
+            values[values == _NODATA] = np.nan
+            data[month - 1, r0 : r0 + height, c0 : c0 + width] = values
+        progress(f"Window {n}/{len(windows)} ({time.perf_counter() - start:.1f}s)")
+
+    meta = {"years": list(years), "dataset": DATASET_ID, "created_at": time.time()}
+    write_wind_grid(path, data, bounds, resolution, **meta)
+    return {"bounds": list(bounds), "resolution": resolution, "shape": list(data.shape), **meta}
+
+
+_grid: Optional[WindGrid] = None
+_grid_loaded = False
+_grid_retry_at = 0.0
+_grid_lock = threading.Lock()
+
+
+def get_wind_grid() -> Optional[WindGrid]:
+    """
+    Process-wide grid at WIND_GRID_PATH, loaded on first use; None if it was never exported.
+    A grid that fails to load is tried again after LOAD_RETRY_S seconds.
+    """
+    global _grid, _grid_loaded, _grid_retry_at
+    with _grid_lock:
+        if not _grid_loaded and time.monotonic() >= _grid_retry_at:
+            path = os.getenv("WIND_GRID_PATH", DEFAULT_PATH)
+            if not os.path.exists(path):
+                _grid_loaded = True
+                return None
+            try:
+                _grid = WindGrid.load(path)
+                _grid_loaded = True
+                print(f"🌬️ Wind grid loaded from {path} ({_grid.data.shape[1]}x{_grid.data.shape[2]})")
+            except Exception as e:
+                _grid_retry_at = time.monotonic() + LOAD_RETRY_S
+                print(f"Warning: failed to load wind grid {path}: {e}")
+        return _grid
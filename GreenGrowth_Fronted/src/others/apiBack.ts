@@ -31,6 +31,51 @@ export async function fetchLayerData(
   return data;
 }
 
+// Buffer (m) used by the editor to compute the initial KPIs
+export const KPI_BUFFER = 5000;
+
+const bootstrapRequests = new Map<string, Promise<any>>();
+
+/**
+ * Obtiene en una sola petición las URLs de todas las capas base y los KPIs iniciales.
+ * Las peticiones simultáneas con los mismos parámetros comparten la misma promesa.
+ */
+export function fetchBootstrap(
+  lat: number,
+  lng: number,
+  buffer = 50000,
+  kpiBuffer = KPI_BUFFER
+) {
+  const params = new URLSearchParams({
+    latitude: lat.toString(),
+    longitude: lng.toString(),
+    buffer: buffer.toString(),
+    kpi_buffer: kpiBuffer.toString(),
+  });
+  const key = params.toString();
+
+  const pending = bootstrapRequests.get(key);
+  if (pending) {
+    return pending;
+  }
+
+  const url = `${BACKEND_API}/geo/bootstrap?${key}`;
+  console.log("📡 Requesting bootstrap data");
+
+  const request = fetch(url)
+    .then(async (res) => {
+      if (!res.ok) {
+        throw new Error(`HTTP ${res.status}: ${res.statusText}`);
+      }
+      const data = await res.json();
+      return data.payload;
+    })
+    .finally(() => bootstrapRequests.delete(key));
+
+  bootstrapRequests.set(key, request);
+  return request;
+}
+
 /**
  * Función que obtiene todas las capas ambientales disponibles.
  * Devuelve un objeto con key → payload válido.
@@ -40,20 +85,15 @@ export async function fetchAllEnvironmentalLayers(
   lng: number,
   buffer = 50000
 ) {
-  const layerKeys: ("temp" | "aq" | "ndvi")[] = ["temp", "aq", "ndvi"];
-
-  const results = await Promise.allSettled(
-    layerKeys.map((key) => fetchLayerData(key, { lat, lng, buffer }))
-  );
+  const payload = await fetchBootstrap(lat, lng, buffer);
 
   const validLayers: Record<string, any> = {};
 
-  results.forEach((result, index) => {
-    const key = layerKeys[index];
-    if (result.status === "fulfilled" && result.value?.payload?.url) {
-      validLayers[key] = result.value.payload;
+  Object.entries(payload?.layers ?? {}).forEach(([key, layer]: [string, any]) => {
+    if (layer?.url) {
+      validLayers[key] = layer;
     } else {
-      console.warn(`⚠️ Layer ${key} could not be loaded`, result);
+      console.warn(`⚠️ Layer ${key} could not be loaded`, payload?.errors?.[key]);
     }
   });
 
@@ -4,7 +4,7 @@ import PolygonMaker from "../components/polygons/polygonMaker";
 import Sidebar from "../components/maps/siderbar/sidebar";
 import SimulationResults from "../components/maps/results/SimulationResults";
 
-import { fetchInitialKPIs } from "../others/apiBack";
+import { fetchBootstrap, KPI_BUFFER } from "../others/apiBack";
 import { useCoordinates } from "../others/coordinateProvider";
 import { usePolygons } from "../others/simulationProvider";
 import { useState, useEffect } from "react";
@@ -28,29 +28,18 @@ const EditPage = () => {
 
   const getKPIs = async () => {
     try {
-      const heat = await fetchInitialKPIs(
-        "heat",
+      // Same parameters as EnvironmentalLayers, so both share a single bootstrap request
+      const { kpis } = await fetchBootstrap(
         coordinates.lat,
         coordinates.lng,
-        5000
-      );
-      const ndvi = await fetchInitialKPIs(
-        "NDVI",
-        coordinates.lat,
-        coordinates.lng,
-        5000
-      );
-      const aq = await fetchInitialKPIs(
-        "AQ",
-        coordinates.lat,
-        coordinates.lng,
-        5000
+        50000,
+        KPI_BUFFER
       );
 
       const data: KPIData = {
-        temp: heat.avg_surface_temp,
-        AQ: aq.avg_air_quality,
-        NDVI: ndvi.avg_NVDI,
+        temp: kpis.avg_surface_temp,
+        AQ: kpis.avg_air_quality,
+        NDVI: kpis.avg_NVDI,
       };
 
       setCurrentData(data);